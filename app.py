@@ -1,12 +1,33 @@
+import csv
+import hashlib
+import io
+import json
+import math
+import os
 import streamlit as st
-import pandas as pd
-import numpy as np
-import datetime
-import plotly.graph_objects as go
-import plotly.express as px
+
+from stroke_pipeline.cases import neurology_notes, radiology_reports, aspect_images, extraction_results, reviewer_edits
+from stroke_pipeline.attribution import default_attributor
+from stroke_pipeline.calibration import CalibrationHistogram
+from stroke_pipeline.cohort import CohortStats
+from stroke_pipeline.images import ImageService
+from stroke_pipeline.extraction import DEFAULT_MODEL, Extractor, OpenAICompatibleBackend, StubBackend
+from stroke_pipeline.retrieval import VectorIndex, retrieve_evidence
+from stroke_pipeline.similarity import SIMILARITY_THRESHOLD
+from stroke_pipeline.synthetic import synthetic_cohort
+from stroke_pipeline.metrics import CI_LEVEL, evaluate, evaluation_predictions
+from stroke_pipeline.prediction import DEFAULT_MODEL_KIND, MODELS, PROBABILITY_COLUMN, default_model, predict_poor_outcome
+from stroke_pipeline.profiling import PROFILER
+from stroke_pipeline.registry import default_rules
+from stroke_pipeline.schema import BINARY_FIELDS, BINARY_VALUES, INTEGER_FIELDS, SEX_VALUES, WEAKNESS_SIDES
+from stroke_pipeline.validation import hitl_correction
+from stroke_pipeline.incremental import IncrementalValidator
 
 st.set_page_config(page_title="Stroke Pipeline Demo", layout="wide")
 
+# Whole-rerun timer; the pipeline stages record their own spans
+rerun_token = PROFILER.start()
+
 # ===============================================================
 # 1) PIPELINE FLOW DIAGRAM (TOP) 
 # ===============================================================
@@ -25,163 +46,172 @@ st.markdown("""
 # Pipeline Flow Diagram - WITH PIPELINE GROUPING
 st.markdown("### 📊 Pipeline Architecture")
 
-fig_flow = go.Figure()
-
-# Define all stages
-input_stage = "Clinical\nData"
-pipeline_stages = ["LLM\nExtract", "Rule\nValidation", "RAG\nVerify", 
-                   "Cosine\nCheck", "HITL\nReview", "Corrected\nData", "Prediction\nModel"]
-output_stages = ["Risk\nScore"]
-management_stage = "Patient Info\nManagement"
-
-# Positioning 
-input_x = 0
-pipeline_x_start = 3.3 
-pipeline_x_spacing = 1.6
-output_x_start = pipeline_x_start + len(pipeline_stages) * pipeline_x_spacing + 1.6 
-management_x = output_x_start + 3.5  # More gap
-
-y_pos = 0
-
-# Colors
-input_color = '#667eea'
-pipeline_colors = ['#667eea', '#ffc107', '#ffc107', '#ffc107', '#ffc107', '#28a745', '#dc3545']
-output_colors = ['#dc3545']
-management_color = '#6c757d'
-
-# Add background rectangle for pipeline group
-pipeline_x_positions = [pipeline_x_start + i * pipeline_x_spacing for i in range(len(pipeline_stages))]
-fig_flow.add_shape(
-    type="rect",
-    x0=min(pipeline_x_positions) - 1.1,  # Increased margin
-    x1=max(pipeline_x_positions) + 1.1,  # Increased margin
-    y0=-0.65,
-    y1=0.65,
-    line=dict(color="#9370DB", width=3, dash="dash"),
-    fillcolor="rgba(147, 112, 219, 0.1)",
-    layer="below"
-)
-
-# Add pipeline label
-fig_flow.add_annotation(
-    x=(min(pipeline_x_positions) + max(pipeline_x_positions)) / 2,
-    y=0.75,
-    text="<b>The Pipeline</b>",
-    showarrow=False,
-    font=dict(size=14, color="#9370DB", family="Arial Black"),
-    bgcolor="rgba(255,255,255,0.9)",
-    bordercolor="#9370DB",
-    borderwidth=2,
-    borderpad=4
-)
+@st.cache_resource
+def pipeline_flow_figure():
+    """Static architecture diagram; built once per server process, not on every rerun."""
+    import plotly.graph_objects as go
+
+    fig_flow = go.Figure()
+
+    # Define all stages
+    input_stage = "Clinical\nData"
+    pipeline_stages = ["LLM\nExtract", "Rule\nValidation", "RAG\nVerify", 
+                       "Cosine\nCheck", "HITL\nReview", "Corrected\nData", "Prediction\nModel"]
+    output_stages = ["Risk\nScore"]
+    management_stage = "Patient Info\nManagement"
+
+    # Positioning 
+    input_x = 0
+    pipeline_x_start = 3.3 
+    pipeline_x_spacing = 1.6
+    output_x_start = pipeline_x_start + len(pipeline_stages) * pipeline_x_spacing + 1.6 
+    management_x = output_x_start + 3.5  # More gap
+
+    y_pos = 0
+
+    # Colors
+    input_color = '#667eea'
+    pipeline_colors = ['#667eea', '#ffc107', '#ffc107', '#ffc107', '#ffc107', '#28a745', '#dc3545']
+    output_colors = ['#dc3545']
+    management_color = '#6c757d'
+
+    # Add background rectangle for pipeline group
+    pipeline_x_positions = [pipeline_x_start + i * pipeline_x_spacing for i in range(len(pipeline_stages))]
+    fig_flow.add_shape(
+        type="rect",
+        x0=min(pipeline_x_positions) - 1.1,  # Increased margin
+        x1=max(pipeline_x_positions) + 1.1,  # Increased margin
+        y0=-0.65,
+        y1=0.65,
+        line=dict(color="#9370DB", width=3, dash="dash"),
+        fillcolor="rgba(147, 112, 219, 0.1)",
+        layer="below"
+    )
 
-# 1) Input Stage (Clinical Data)
-fig_flow.add_trace(go.Scatter(
-    x=[input_x], y=[y_pos],
-    mode='markers+text',
-    marker=dict(size=115, color=input_color, line=dict(width=3, color='white')),
-    text=input_stage.replace('\n', '<br>'),
-    textposition='middle center',
-    textfont=dict(color='white', size=11, family='Arial Black'),
-    hoverinfo='text',
-    hovertext="Input: Clinical Data",
-    showlegend=False
-))
-
-# Arrow: Input → Pipeline
-fig_flow.add_annotation(
-    x=pipeline_x_positions[0] - 0.7,
-    y=y_pos,
-    ax=input_x + 0.65,
-    ay=y_pos,
-    xref='x', yref='y', axref='x', ayref='y',
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1.5,
-    arrowwidth=3,
-    arrowcolor='#333'
-)
+    # Add pipeline label
+    fig_flow.add_annotation(
+        x=(min(pipeline_x_positions) + max(pipeline_x_positions)) / 2,
+        y=0.75,
+        text="<b>The Pipeline</b>",
+        showarrow=False,
+        font=dict(size=14, color="#9370DB", family="Arial Black"),
+        bgcolor="rgba(255,255,255,0.9)",
+        bordercolor="#9370DB",
+        borderwidth=2,
+        borderpad=4
+    )
 
-# 2) Pipeline Stages 
-for i, stage in enumerate(pipeline_stages):
-    x = pipeline_x_positions[i]
+    # 1) Input Stage (Clinical Data)
     fig_flow.add_trace(go.Scatter(
-        x=[x], y=[y_pos],
+        x=[input_x], y=[y_pos],
         mode='markers+text',
-        marker=dict(size=90, color=pipeline_colors[i], line=dict(width=3, color='white')),  # Reduced to 90
-        text=stage.replace('\n', '<br>'),
+        marker=dict(size=115, color=input_color, line=dict(width=3, color='white')),
+        text=input_stage.replace('\n', '<br>'),
         textposition='middle center',
-        textfont=dict(color='white', size=9, family='Arial Black'),  # Keep original size
+        textfont=dict(color='white', size=11, family='Arial Black'),
         hoverinfo='text',
-        hovertext=f"Pipeline Stage {i+1}: {stage}",
+        hovertext="Input: Clinical Data",
         showlegend=False
     ))
 
-# Arrow: Pipeline → Output
-fig_flow.add_annotation(
-    x=output_x_start - 0.8,  # Adjusted for larger gap
-    y=y_pos,
-    ax=max(pipeline_x_positions) + 0.65,
-    ay=y_pos,
-    xref='x', yref='y', axref='x', ayref='y',
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1.5,
-    arrowwidth=3,
-    arrowcolor='#333'
-)
+    # Arrow: Input → Pipeline
+    fig_flow.add_annotation(
+        x=pipeline_x_positions[0] - 0.7,
+        y=y_pos,
+        ax=input_x + 0.65,
+        ay=y_pos,
+        xref='x', yref='y', axref='x', ayref='y',
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1.5,
+        arrowwidth=3,
+        arrowcolor='#333'
+    )
 
-# 3) Output Stages
-for i, stage in enumerate(output_stages):
-    x = output_x_start + i * 1.3
+    # 2) Pipeline Stages 
+    for i, stage in enumerate(pipeline_stages):
+        x = pipeline_x_positions[i]
+        fig_flow.add_trace(go.Scatter(
+            x=[x], y=[y_pos],
+            mode='markers+text',
+            marker=dict(size=90, color=pipeline_colors[i], line=dict(width=3, color='white')),  # Reduced to 90
+            text=stage.replace('\n', '<br>'),
+            textposition='middle center',
+            textfont=dict(color='white', size=9, family='Arial Black'),  # Keep original size
+            hoverinfo='text',
+            hovertext=f"Pipeline Stage {i+1}: {stage}",
+            showlegend=False
+        ))
+
+    # Arrow: Pipeline → Output
+    fig_flow.add_annotation(
+        x=output_x_start - 0.8,  # Adjusted for larger gap
+        y=y_pos,
+        ax=max(pipeline_x_positions) + 0.65,
+        ay=y_pos,
+        xref='x', yref='y', axref='x', ayref='y',
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1.5,
+        arrowwidth=3,
+        arrowcolor='#333'
+    )
+
+    # 3) Output Stages
+    for i, stage in enumerate(output_stages):
+        x = output_x_start + i * 1.3
+        fig_flow.add_trace(go.Scatter(
+            x=[x], y=[y_pos],
+            mode='markers+text',
+            marker=dict(size=115, color=output_colors[i], line=dict(width=3, color='white')),
+            text=stage.replace('\n', '<br>'),
+            textposition='middle center',
+            textfont=dict(color='white', size=11, family='Arial Black'),
+            hoverinfo='text',
+            hovertext=f"Output: {stage}",
+            showlegend=False
+        ))
+
+    # Arrow: Output → Management
+    output_last_x = output_x_start + (len(output_stages) - 1) * 1.3
+    fig_flow.add_annotation(
+        x=management_x - 0.8,  # Adjusted for larger gap
+        y=y_pos,
+        ax=output_last_x + 0.65,
+        ay=y_pos,
+        xref='x', yref='y', axref='x', ayref='y',
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1.5,
+        arrowwidth=3,
+        arrowcolor='#333'
+    )
+
+    # 4) Management Stage
     fig_flow.add_trace(go.Scatter(
-        x=[x], y=[y_pos],
+        x=[management_x], y=[y_pos],
         mode='markers+text',
-        marker=dict(size=115, color=output_colors[i], line=dict(width=3, color='white')),
-        text=stage.replace('\n', '<br>'),
+        marker=dict(size=115, color=management_color, line=dict(width=3, color='white')),
+        text=management_stage.replace('\n', '<br>'),
         textposition='middle center',
-        textfont=dict(color='white', size=11, family='Arial Black'),
+        textfont=dict(color='white', size=10, family='Arial Black'),  # Keep original size
         hoverinfo='text',
-        hovertext=f"Output: {stage}",
+        hovertext="Outcome: Patient Information Management",
         showlegend=False
     ))
 
-# Arrow: Output → Management
-output_last_x = output_x_start + (len(output_stages) - 1) * 1.3
-fig_flow.add_annotation(
-    x=management_x - 0.8,  # Adjusted for larger gap
-    y=y_pos,
-    ax=output_last_x + 0.65,
-    ay=y_pos,
-    xref='x', yref='y', axref='x', ayref='y',
-    showarrow=True,
-    arrowhead=2,
-    arrowsize=1.5,
-    arrowwidth=3,
-    arrowcolor='#333'
-)
+    fig_flow.update_layout(
+        height=280,
+        xaxis=dict(showgrid=False, showticklabels=False, zeroline=False),
+        yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, range=[-1, 1]),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        margin=dict(l=20, r=20, t=60, b=20)
+    )
+    return fig_flow
 
-# 4) Management Stage
-fig_flow.add_trace(go.Scatter(
-    x=[management_x], y=[y_pos],
-    mode='markers+text',
-    marker=dict(size=115, color=management_color, line=dict(width=3, color='white')),
-    text=management_stage.replace('\n', '<br>'),
-    textposition='middle center',
-    textfont=dict(color='white', size=10, family='Arial Black'),  # Keep original size
-    hoverinfo='text',
-    hovertext="Outcome: Patient Information Management",
-    showlegend=False
-))
-
-fig_flow.update_layout(
-    height=280,
-    xaxis=dict(showgrid=False, showticklabels=False, zeroline=False),
-    yaxis=dict(showgrid=False, showticklabels=False, zeroline=False, range=[-1, 1]),
-    plot_bgcolor='rgba(0,0,0,0)',
-    paper_bgcolor='rgba(0,0,0,0)',
-    margin=dict(l=20, r=20, t=60, b=20)
-)
+
+fig_flow = pipeline_flow_figure()
 
 st.plotly_chart(fig_flow, use_container_width=True)
 
@@ -197,14 +227,51 @@ st.info("""
 # ===============================================================
 # 2) PERFORMANCE METRICS DASHBOARD (SIDEBAR)
 # ===============================================================
+MODEL_LABELS = {"logistic": "Logistic Regression", "gbm": "Gradient Boosting", "tabpfn": "TabPFN"}
+
+
+@st.cache_resource
+def holdout_predictions(kind):
+    """Outcomes and predicted probabilities for the synthetic hold-out cohort; scored once per server process."""
+    return evaluation_predictions(default_model(kind))
+
+
+@st.cache_resource
+def model_evaluation(kind):
+    """ROC/PR curves and bootstrap CIs on the hold-out cohort."""
+    return evaluate(*holdout_predictions(kind))
+
+
+@st.cache_resource
+def model_calibration(kind):
+    """Risk-decile calibration histogram on the hold-out cohort."""
+    y, probs = holdout_predictions(kind)
+    return CalibrationHistogram().update(probs, y)
+
+
+def available_models():
+    kinds = []
+    for kind in MODELS:
+        try:
+            default_model(kind)
+        except ImportError:
+            # TabPFN is optional
+            continue
+        kinds.append(kind)
+    return kinds
+
+
 with st.sidebar:
     st.markdown("### 📈 Model Performance")
     
     # Gauge charts for key metrics
     st.metric("Extraction Accuracy", "97.0%", "After HITL")
-    st.metric("TabPFN AUROC", "0.816", "95% CI: 0.784-0.847")
+    live = model_evaluation(DEFAULT_MODEL_KIND)["auroc"]
+    st.metric(f"{MODEL_LABELS[DEFAULT_MODEL_KIND]} AUROC (synthetic hold-out)", f"{live['estimate']:.3f}",
+              f"{CI_LEVEL:.0%} CI: {live['ci'][0]:.3f}-{live['ci'][1]:.3f}", delta_color="off",
+              help="Computed live on a synthetic hold-out cohort, not the study data "
+                   "(paper: TabPFN 0.816, 95% CI 0.784-0.847)")
     st.metric("Grounding Accuracy", "93.2%", "RAG Stage")
-    st.metric("Inference Time", "8.3s", "per patient")
     st.metric("Training Cohort", "1,166", "patients")
     
     st.markdown("---")
@@ -260,306 +327,16 @@ card_style = """
     color:#000000;">
 """
 
+@st.cache_resource
+def image_service():
+    """Thumbnail and full-image bytes behind one LRU shared by every session."""
+    return ImageService()
+
 step_badge = lambda x: f"<div style='background:#0047AB;color:white;padding:6px 12px;border-radius:6px;display:inline-block;margin-bottom:10px;font-weight:600;'>{x}</div>"
 
 # Badge for simplified demo
 simplified_badge = "⚠️ [SIMPLIFIED DEMO]"
 
-# =====================================================================
-# 0) Neurology Notes - CORRECTED TO MATCH EXTRACTION
-# =====================================================================
-
-neurology_notes = {
-    "Example Case 1":
-    """
-A 68-year-old male with a history of poorly controlled hypertension and diabetes mellitus, but without atrial fibrillation, prior stroke, dyslipidemia, cardiovascular disease, malignancy, or ESRD, presented with sudden right-sided arm and leg weakness accompanied by slurred speech. The symptoms began at approximately 21:40 on August 25, 2018 (LKW 21:30) while he was at home, and the deficits persisted, requiring assistance for ambulation. He has a social history notable for smoking half a pack per day for 10 years and consuming approximately two alcoholic drinks daily for 15 years.
-On arrival, his vital signs were BP 178/92, HR 84, RR 18, and temperature 36.8°C. Neurologic exam showed mild dysarthria, right facial droop, 3/5 strength in the right upper and lower extremities, intact strength on the left, decreased light touch sensation on the right side, and no cerebellar ataxia. His initial NIHSS score was 9. There were no signs of seizure, head trauma, or altered mental status.
-Given the clear onset time and absence of contraindications, IV tPA was administered at 22:35 at a dose of 0.9 mg/kg. No mechanical thrombectomy or other intra-arterial procedures were performed.
-""",
-
-    "Example Case 2":
-    """
-A 72-year-old female with a medical history of hypertension and diabetes mellitus, and without atrial fibrillation, dyslipidemia, cardiovascular disease, prior stroke, ESRD, or malignancy, presented with expressive aphasia and a sensation of heaviness in the left upper extremity. The symptoms began on September 3, 2018 at approximately 19:10. She denied smoking but reported occasional alcohol use.
-Her symptoms initially fluctuated but eventually persisted. On examination in the emergency department, her vital signs were BP 162/88, HR 76, RR 18, and temperature 37.0°C. Neurologic exam revealed mild aphasia, 4+/5 strength in the left upper extremity, 4/5 in the left lower extremity, intact sensation, and no cranial nerve or cerebellar abnormalities. Her initial NIHSS was calculated as 5.
-No IV tPA or intra-arterial intervention was performed due to clinical judgment and imaging findings. There was no loss of consciousness, seizure activity, or head trauma reported.
-"""
-,
-
-    "Example Case 3":
-    """
-A 63-year-old male with hypertension, diabetes mellitus, a remote history of treated pulmonary tuberculosis, and chronic hepatitis B, but without atrial fibrillation, dyslipidemia, ESRD, malignancy, cardiovascular disease, or previous stroke, presented after experiencing dizziness, chills, and transient bilateral leg weakness while playing billiards. The onset occurred at around 23:30 on August 24, 2018. His social history includes smoking half a pack per day for approximately 10 years and drinking one to two alcoholic beverages daily for about 20 years.
-Upon evaluation, his vital signs were notable for significantly elevated blood pressure at 211/90, with HR 73, RR 20, and temperature 36.7°C. Neurologic assessment demonstrated full strength (5/5) in both upper extremities and slightly reduced strength (4+/5) in both lower extremities, without cranial nerve deficits, cerebellar signs, or sensory impairment. His initial NIHSS score was 0.
-He did not receive IV tPA or undergo any intra-arterial intervention, given the absence of focal deficits consistent with acute large-vessel ischemia and imaging findings.
-"""
-
-}
-
-# =====================================================================
-# Radiology Reports
-# =====================================================================
-
-radiology_reports = {
-    "Example Case 1":
-    """
-MRI BRAIN WITH AND WITHOUT CONTRAST
-Technique:
-Multiplanar, multisequence MRI of the brain including T1, T2, FLAIR, DWI/ADC, GRE/SWI, and post-contrast imaging. TOF MRA of the intracranial circulation was obtained.
-Findings:
-DWI shows restricted diffusion involving the left insula, left frontal operculum, and anterior parietal cortex, consistent with an acute infarction in the left MCA territory.
-ADC maps confirm low signal corresponding to areas of restricted diffusion.
-FLAIR demonstrates mild cortical swelling and subtle hyperintensity in the same regions, compatible with early ischemic change.
-No intracranial hemorrhage is noted on GRE/SWI.
-Major intracranial arteries: TOF MRA reveals decreased flow-related signal in the proximal left M2/M3 branches, without complete occlusion.
-No mass effect significant enough to shift midline; ventricles remain symmetric.
-Basal ganglia, thalami, brainstem, and cerebellum are preserved.
-No abnormal meningeal or parenchymal enhancement following contrast.
-Conclusion:
-Findings consistent with acute ischemic infarction in the left MCA territory, with corresponding cortical restricted diffusion and early FLAIR changes. No hemorrhagic transformation.
-""",
-
-    "Example Case 2":
-    """
-MRI BRAIN WITHOUT CONTRAST
-Technique:
-Multiplanar, multisequence MRI including T1, T2, FLAIR, DWI/ADC, and SWI. TOF intracranial MRA performed.
-Findings:
-DWI shows punctate to patchy areas of mildly increased signal in the left basal ganglia and parietal opercular regions, suspicious for early acute ischemia.
-ADC demonstrates subtle low-signal correlation but less pronounced than in established infarction.
-FLAIR shows faint cortical/subcortical hyperintensity without significant swelling.
-No hemorrhage on SWI.
-Intracranial vasculature: TOF MRA shows mild irregularity of the left M2 segment, without definite large-vessel occlusion.
-Ventricles, midline structures, posterior fossa appear normal.
-No mass lesion or abnormal enhancement.
-Conclusion:
-MRI findings suggest early left MCA territory ischemia, with mild cortical diffusion restriction but no hemorrhage or large-vessel occlusion.
-""",
-
-    "Example Case 3":
-    """
-MRI BRAIN WITH AND WITHOUT CONTRAST
-Technique:
-Multiplanar T1, T2, FLAIR, DWI/ADC, GRE/SWI, and post-contrast sequences. 3D TOF MRA obtained.
-Findings:
-Parenchyma: No diffusion restriction. No areas of abnormal T2/FLAIR hyperintensity. Gray–white differentiation preserved.
-No hemorrhage on GRE/SWI.
-No mass lesion, midline shift, or extra-axial collection.
-Ventricular system normal in size and configuration.
-Posterior fossa (brainstem and cerebellum) unremarkable.
-Intracranial circulation: TOF MRA demonstrates normal flow-related signal in bilateral ICA, MCA, ACA, PCA territories. No stenosis or occlusion.
-Enhancement: No abnormal parenchymal or leptomeningeal enhancement.
-Paranasal sinuses/orbits normal.
-Conclusion:
-Normal MRI brain. No acute infarction or structural abnormality detected.
-"""
-}
-
-aspect_images = {
-    "Example Case 1": "images/aspects1.png",
-    "Example Case 2": "images/aspects2.png",
-    "Example Case 3": "images/aspects3.png"
-}
-
-# ===============================================================
-# Extraction Results - CORRECTED TO MATCH NOTES
-# ===============================================================
-
-extraction_results = {
-    "Example Case 1": {
-        "Age": 68,
-        "Sex": "male",
-
-        "Hypertension": "yes",
-        "Diabetes": "yes",
-        "Dyslipidemia": "no",
-        "Cardiovascular_Disease": "no",
-        "Atrial_Fibrillation": "no",
-        "Old_CVA": "no",
-        "Malignancy": "no",
-        "ESRD": "no",
-
-        "MRI_Acute_Infarct": "yes",
-        "MRI_No_Lesion": "no",
-        "MRI_Other_Lesion": "no",
-
-        "NIHSS": 9,
-        "ASPECTS": 7,
-
-        "tPA_Administered": "no",  # Intentional error for demo
-        "IA_Thrombectomy": "no",
-
-        "Weakness_Side": "bilateral",  # Intentional error for demo
-        "SBP": 178
-    },
-
-    "Example Case 2": {
-        "Age": 72,
-        "Sex": "female",
-
-        "Hypertension": "no",  # Intentional error for demo
-        "Diabetes": "yes",
-        "Dyslipidemia": "no",
-        "Cardiovascular_Disease": "no",
-        "Atrial_Fibrillation": "no",
-        "Old_CVA": "no",
-        "Malignancy": "no",
-        "ESRD": "no",
-
-        "MRI_Acute_Infarct": "yes",
-        "MRI_No_Lesion": "no",
-        "MRI_Other_Lesion": "no",
-
-        "NIHSS": 5,
-        "ASPECTS": 9,  # Intentional error for demo
-
-        "tPA_Administered": "no",
-        "IA_Thrombectomy": "no",
-
-        "Weakness_Side": "left",
-        "SBP": 162
-    },
-
-    "Example Case 3": {
-        "Age": 63,
-        "Sex": "male",
-
-        "Hypertension": "yes",
-        "Diabetes": "yes",
-        "Dyslipidemia": "no",
-        "Cardiovascular_Disease": "no",
-        "Atrial_Fibrillation": "no",
-        "Old_CVA": "no",
-        "Malignancy": "no",
-        "ESRD": "no",
-
-        "MRI_Acute_Infarct": "no",
-        "MRI_No_Lesion": "yes",
-        "MRI_Other_Lesion": "no",
-
-        "NIHSS": 0,
-        "ASPECTS": 10,
-
-        "tPA_Administered": "no",
-        "IA_Thrombectomy": "no",
-
-        "Weakness_Side": "bilateral",
-        "SBP": 211
-    }
-}
-
-
-# =====================================================================
-# VALIDATION LOGIC
-# =====================================================================
-
-def validate_data(selected, extracted, note_text, radiology_text):
-
-    full_text = (note_text + " " + radiology_text).lower()
-    val = {}
-    rule_msgs = []
-
-    # ---- Binary field checking ----
-    binary_fields = [
-        "Hypertension", "Diabetes", "Dyslipidemia", "Cardiovascular_Disease",
-        "Atrial_Fibrillation", "Old_CVA", "Malignancy", "ESRD",
-        "MRI_Acute_Infarct", "MRI_No_Lesion", "MRI_Other_Lesion",
-        "tPA_Administered", "IA_Thrombectomy"
-    ]
-
-    for f in binary_fields:
-        if extracted[f] not in ["yes", "no", "unknown"]:
-            rule_msgs.append(f"❗ {f}: invalid binary (yes/no/unknown expected).")
-
-    # NIHSS
-    if not (0 <= extracted["NIHSS"] <= 42):
-        rule_msgs.append("❗ NIHSS outside valid range.")
-
-    # ASPECTS
-    if not (0 <= extracted["ASPECTS"] <= 10):
-        rule_msgs.append("❗ ASPECTS outside valid range.")
-
-    # SBP
-    if extracted["SBP"] < 40 or extracted["SBP"] > 300:
-        rule_msgs.append("❗ SBP physiologically implausible.")
-
-    if not rule_msgs:
-        rule_msgs.append("✔ Passed all rule-based format checks.")
-
-    val["Rule"] = rule_msgs
-
-    # ---- RAG checks ----
-    rag = []
-
-    if selected == "Example Case 1":
-        if "tpa" in full_text and extracted["tPA_Administered"] != "yes":
-            rag.append("❗ tPA mismatch: note indicates tPA was given.")
-        if "right" in full_text and extracted["Weakness_Side"] != "right":
-            rag.append("❗ Weakness side mismatch: note indicates right-sided weakness.")
-        if extracted["MRI_Acute_Infarct"] == "yes" and extracted["ASPECTS"] > 7:
-            rag.append("❗ ASPECT too high for acute MCA infarction.")
-
-    if selected == "Example Case 2":
-        if "hypertension" in full_text and extracted["Hypertension"] == "no":
-            rag.append("❗ Hypertension mismatch: note indicates hypertension history.")
-        if extracted["MRI_Acute_Infarct"] == "yes" and extracted["ASPECTS"] >= 8:
-            rag.append("❗ ASPECT inconsistent with early ischemia severity.")
-
-    if not rag:
-        rag.append("✔ No semantic mismatch.")
-
-    val["RAG"] = rag
-
-    # ---- Cosine similarity mock ----
-    cos = []
-    sim = 0.71 if selected=="Example Case 1" else (0.78 if selected=="Example Case 2" else 0.92)
-
-    if sim < 0.82:
-        cos.append(f"❗ Cosine similarity {sim:.2f} → atypical pattern")
-    else:
-        cos.append(f"✔ Cosine similarity {sim:.2f} → typical pattern")
-
-    val["Cosine"] = cos
-    val["CosineSimilarity"] = sim
-
-    flagged = any("❗" in msg for key in ["Rule", "RAG", "Cosine"] for msg in val[key])
-    val["HITL"] = "🔎 Needs manual review." if flagged else "✔ Auto-acceptable."
-
-    return val
-
-# =====================================================================
-# HITL ASSISTED CORRECTION MODULE
-# =====================================================================
-
-def hitl_correction(selected, extracted, validation):
-
-    corrected = extracted.copy()
-
-    if "❗" not in str(validation):
-        return corrected, False, {}
-
-    changes = {}
-
-    if selected == "Example Case 1":
-        if extracted["tPA_Administered"] != "yes":
-            corrected["tPA_Administered"] = "yes"
-            changes["tPA_Administered"] = {"from": "no", "to": "yes"}
-        if extracted["Weakness_Side"] != "right":
-            corrected["Weakness_Side"] = "right"
-            changes["Weakness_Side"] = {"from": "bilateral", "to": "right"}
-        if extracted["ASPECTS"] != 5:
-            corrected["ASPECTS"] = 5
-            changes["ASPECTS"] = {"from": 7, "to": 5}
-
-    if selected == "Example Case 2":
-        if extracted["Hypertension"] != "yes":
-            corrected["Hypertension"] = "yes"
-            changes["Hypertension"] = {"from": "no", "to": "yes"}
-        if extracted["ASPECTS"] != 6:
-            corrected["ASPECTS"] = 6
-            changes["ASPECTS"] = {"from": 9, "to": 6}
-
-    return corrected, len(changes) > 0, changes
-
-
 # =====================================================================
 # UI START
 # =====================================================================
@@ -569,46 +346,70 @@ selected = st.selectbox("Select Example Case", list(neurology_notes.keys()))
 # ===============================================================
 # 11) TABLE 1 STATISTICS (Study Cohort Overview)
 # ===============================================================
-with st.expander("📊 Study Cohort Statistics (Table 1 from Paper)"):
-    st.markdown("### Patient Demographics and Clinical Characteristics (n=1,166)")
+COHORT_STATS = os.environ.get("STROKE_COHORT_STATS", "cohort_stats.json")
+# Table 1 cohort size, for the synthetic stand-in when no processed cohort is available
+TABLE1_SIZE = 1_166
+
+
+@st.cache_resource
+def synthetic_cohort_stats():
+    """Aggregates for a synthetic cohort drawn from the paper's Table 1 distributions."""
+    records, outcomes = synthetic_cohort(TABLE1_SIZE)
+    return CohortStats().update_many(records, outcomes)
+
+
+@st.cache_data
+def cohort_tables(path, mtime_ns):
+    """Table 1 rows and NIHSS distribution from the saved aggregates; re-read only when the file changes."""
+    stats = CohortStats.load(path) if mtime_ns else synthetic_cohort_stats()
+    return len(stats), stats.table1(), stats.nihss_distribution()
+
+
+@st.cache_resource
+def nihss_figure(distribution):
+    import plotly.graph_objects as go
+
+    ranges = [row["NIHSS Range"] for row in distribution]
+    percentages = [row["Percentage"] for row in distribution]
+    fig_nihss = go.Figure(go.Bar(x=ranges, y=percentages, text=[f"{p:.1f}%" for p in percentages],
+                                 marker=dict(color=percentages, colorscale="Blues")))
+    fig_nihss.update_layout(height=250, showlegend=False, xaxis_title="NIHSS Range", yaxis_title="Percentage",
+                            margin=dict(l=10, r=10, t=10, b=10))
+    return fig_nihss
+
+
+# Expanders below track their open state (toggling one reruns the script), and a section's
+# body, with its data, figures and imports, is only built while it is open
+cohort_section = st.expander("📊 Cohort Statistics (Table 1)", key="cohort_section", on_change="rerun")
+if cohort_section.open:
+    with cohort_section:
+        mtime_ns = os.stat(COHORT_STATS).st_mtime_ns if os.path.exists(COHORT_STATS) else 0
+        n_patients, table1, nihss_dist = cohort_tables(COHORT_STATS, mtime_ns)
+        st.markdown(f"### Patient Demographics and Clinical Characteristics (n={n_patients:,})")
+        if mtime_ns:
+            st.caption(f"Live from the processed cohort in `{COHORT_STATS}` (batch/streaming `--cohort-stats`); "
+                       "each run adds its patients to the saved aggregates.")
+        else:
+            st.caption(f"No processed cohort at `{COHORT_STATS}`: showing a synthetic cohort drawn from the paper's "
+                       "Table 1 distributions. Run batch mode with `--cohort-stats` to use your own patients.")
     
-    col1, col2, col3 = st.columns(3)
+        col1, col2, col3 = st.columns(3)
     
-    with col1:
-        st.markdown("#### Demographics")
-        demo_data = pd.DataFrame({
-            'Variable': ['Age (mean ± SD)', 'Male sex', 'Hypertension', 'Diabetes mellitus', 'Atrial fibrillation'],
-            'Value': ['65.68 ± 15.90', '56.2%', '57.4%', '24.4%', '14.9%']
-        })
-        st.dataframe(demo_data, hide_index=True, use_container_width=True)
+        with col1:
+            st.markdown("#### Demographics")
+            st.dataframe(table1["Demographics"], hide_index=True, use_container_width=True)
     
-    with col2:
-        st.markdown("#### Clinical Scores")
-        scores_data = pd.DataFrame({
-            'Variable': ['NIHSS (median, IQR)', 'ASPECT (median, IQR)', 'MRI infarction', 'IV t-PA', 'IA intervention'],
-            'Value': ['3 (1-7)', '9 (8-10)', '59.4%', '9.0%', '7.5%']
-        })
-        st.dataframe(scores_data, hide_index=True, use_container_width=True)
+        with col2:
+            st.markdown("#### Clinical Scores")
+            st.dataframe(table1["Clinical Scores"], hide_index=True, use_container_width=True)
     
-    with col3:
-        st.markdown("#### Outcomes")
-        outcome_data = pd.DataFrame({
-            'Variable': ['Poor outcome (mRS 3-6)', 'Good outcome (mRS 0-2)', 'Follow-up rate', '3-month assessment'],
-            'Value': ['28.4%', '71.6%', '65.8%', '767 patients']
-        })
-        st.dataframe(outcome_data, hide_index=True, use_container_width=True)
+        with col3:
+            st.markdown("#### Outcomes")
+            st.dataframe(table1["Outcomes"], hide_index=True, use_container_width=True)
     
-    # Distribution charts
-    st.markdown("#### NIHSS Score Distribution")
-    nihss_dist = pd.DataFrame({
-        'NIHSS Range': ['0', '1-4', '5-15', '16-20', '21-42'],
-        'Percentage': [25.4, 40.3, 26.3, 5.7, 2.3]
-    })
-    fig_nihss = px.bar(nihss_dist, x='NIHSS Range', y='Percentage', 
-                       color='Percentage', color_continuous_scale='Blues',
-                       title='')
-    fig_nihss.update_layout(height=250, showlegend=False)
-    st.plotly_chart(fig_nihss, use_container_width=True)
+        # Distribution charts
+        st.markdown("#### NIHSS Score Distribution")
+        st.plotly_chart(nihss_figure(nihss_dist), use_container_width=True)
 
 col1, col2, col3 = st.columns([1.3, 1.3, 1])
 
@@ -643,92 +444,77 @@ with col3:
         "<h3>🖼️ ASPECT CT Image</h3>",
         unsafe_allow_html=True
     )
-    st.image(aspect_images[selected], use_container_width=True)
+    st.image(image_service().thumbnail(aspect_images[selected]), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # The original is only read and sent when asked for
+    full_image_section = st.expander("🔍 Full Resolution", key="full_image_section", on_change="rerun")
+    if full_image_section.open:
+        with full_image_section:
+            st.image(image_service().full(aspect_images[selected]), use_container_width=True)
+
 
 # =====================================================================
 # STEP 1: Extraction Output
 # =====================================================================
 
-with st.expander(f"STEP 1 — LLM Extraction Output {simplified_badge}", expanded=False):
+@st.cache_resource
+def get_extractor():
+    """One extractor (and its in-memory result cache) shared by every session."""
+    if os.environ.get("STROKE_LLM_URL"):
+        backend = OpenAICompatibleBackend(os.environ["STROKE_LLM_URL"], model=os.environ.get("STROKE_LLM_MODEL", DEFAULT_MODEL))
+    else:
+        backend = StubBackend(extraction_results)
+    return Extractor(backend)
+
+
+extracted = get_extractor().extract([(selected, neurology_notes[selected], radiology_reports[selected])])[selected]
+step1_section = st.expander(f"STEP 1 — LLM Extraction Output {simplified_badge}", key="step1_section", on_change="rerun")
+if step1_section.open:
+    with step1_section:
     
-    with st.container():
-        st.info("""
-        ℹ️ **What is this step?**
+        with st.container():
+            st.info("""
+            ℹ️ **What is this step?**
         
-        This stage uses a Large Language Model (Llama 3 8B) with few-shot prompting to extract structured variables from unstructured clinical text.
+            This stage uses a Large Language Model (Llama 3 8B) with few-shot prompting to extract structured variables from unstructured clinical text.
         
-        **Real Implementation (Paper Section 2.3.1):**
-        - Model: Llama 3 8B with LoRA fine-tuning
-        - Prompting: 3-shot examples
-        - Parameters: Temperature 0.1, max tokens 512
+            **Real Implementation (Paper Section 2.3.1):**
+            - Model: Llama 3 8B with LoRA fine-tuning
+            - Prompting: 3-shot examples
+            - Parameters: Temperature 0.1, max tokens 512
         
-        **This Demo:**
-        - Uses pre-generated mock extractions with intentional errors for demonstration
-        """)
+            **This Demo:**
+            - Uses pre-generated mock extractions with intentional errors for demonstration
+            - Set `STROKE_LLM_URL` to extract with a local OpenAI-compatible server instead
+            """)
     
-    extracted = extraction_results[selected]
-    st.json(extracted)
+        st.json(extracted)
     
-    st.caption("⚠️ Note: Intentional errors included to demonstrate validation pipeline")
+        st.caption("⚠️ Note: Intentional errors included to demonstrate validation pipeline")
 
 
 # =====================================================================
 # STEP 2: Multi-Tier Validation
 # =====================================================================
 
-with st.expander(f"STEP 2 — Multi-Tiered Validation {simplified_badge}", expanded=True):
-    
-    with st.container():
-        st.info("""
-        ℹ️ **What is this step?**
-        
-        Multi-layered validation using defense-in-depth approach to catch errors and hallucinations.
-        
-        **Real Implementation (Paper Section 2.3.2):**
-        - Layer 1: Rule-based checks (Python scripts)
-        - Layer 2: RAG with FAISS vector database
-        - Layer 3: Cosine similarity vs 200 validated records
-        - Layer 4: Human-in-the-loop review (κ=0.89 agreement)
-        
-        **This Demo:**
-        - Simplified rule checking
-        - Mock RAG logic (no actual FAISS)
-        - Simulated cosine scores
-        """)
-    
-    validation = validate_data(
-        selected,
-        extracted,
-        neurology_notes[selected],
-        radiology_reports[selected]
-    )
+@st.cache_resource
+def progress_figure(stages, stage_status):
+    """Stage pass/flag bar; only 2**4 variants exist, so each is built once."""
+    import plotly.graph_objects as go
 
-    # Validation Progress Bar
-    stages = ["Rule-Based", "RAG", "Cosine", "HITL"]
-    stage_status = []
-    
-    for stage in stages:
-        if stage == "HITL":
-            passed = "✔" in validation.get("HITL", "")
-        else:
-            passed = all("❗" not in msg for msg in validation.get(stage, []))
-        stage_status.append(1 if passed else 0)
-    
-    # Progress visualization
     fig_progress = go.Figure()
     colors = ['#28a745' if s == 1 else '#dc3545' for s in stage_status]
-    
+
     fig_progress.add_trace(go.Bar(
-        x=stages,
+        x=list(stages),
         y=[1, 1, 1, 1],
         marker=dict(color=colors),
         text=['✓ Pass' if s == 1 else '✗ Flag' for s in stage_status],
         textposition='inside',
         textfont=dict(color='white', size=14)
     ))
-    
+
     fig_progress.update_layout(
         title="Validation Stage Results",
         height=200,
@@ -736,92 +522,224 @@ with st.expander(f"STEP 2 — Multi-Tiered Validation {simplified_badge}", expan
         yaxis=dict(showticklabels=False, range=[0, 1.2]),
         plot_bgcolor='rgba(0,0,0,0)'
     )
-    
-    st.plotly_chart(fig_progress, use_container_width=True)
+    return fig_progress
 
-    # ---- Rule-based ----
-    st.subheader("1) 🔎 Rule-Based Verification")
-    for msg in validation["Rule"]:
-        if "❗" in msg:
-            st.markdown(highlight_red(msg), unsafe_allow_html=True)
-        else:
-            st.markdown(highlight_green(msg), unsafe_allow_html=True)
 
-    # ---- RAG ----
-    st.markdown("---")
-    st.subheader("2) 📚 RAG Verification (Semantic vs Original Note)")
-    for msg in validation["RAG"]:
-        if "❗" in msg:
-            st.markdown(highlight_red(msg), unsafe_allow_html=True)
-        else:
-            st.markdown(highlight_green(msg), unsafe_allow_html=True)
+@st.cache_resource
+def cosine_gauge(sim_score):
+    """Similarity gauge, cached per (rounded) score."""
+    import plotly.graph_objects as go
 
-    # ---- Cosine Similarity ----
-    st.markdown("---")
-    st.subheader("3) 📈 Cosine Similarity Flagging")
-    
-    # Visualization of cosine similarity
-    sim_score = validation["CosineSimilarity"]
     fig_cosine = go.Figure(go.Indicator(
         mode="gauge+number+delta",
         value=sim_score,
         domain={'x': [0, 1], 'y': [0, 1]},
         title={'text': "Similarity Score"},
-        delta={'reference': 0.82, 'increasing': {'color': "green"}},
+        delta={'reference': SIMILARITY_THRESHOLD, 'increasing': {'color': "green"}},
         gauge={
             'axis': {'range': [0, 1]},
             'bar': {'color': "darkblue"},
             'steps': [
-                {'range': [0, 0.82], 'color': "lightgray"},
-                {'range': [0.82, 1], 'color': "lightgreen"}
+                {'range': [0, SIMILARITY_THRESHOLD], 'color': "lightgray"},
+                {'range': [SIMILARITY_THRESHOLD, 1], 'color': "lightgreen"}
             ],
             'threshold': {
                 'line': {'color': "red", 'width': 4},
                 'thickness': 0.75,
-                'value': 0.82
+                'value': SIMILARITY_THRESHOLD
             }
         }
     ))
     fig_cosine.update_layout(height=250)
-    st.plotly_chart(fig_cosine, use_container_width=True)
+    return fig_cosine
+
+
+@st.cache_resource
+def evidence_index(patient_id, note, report):
+    """Per-patient vector index; keyed on the document text so edited notes are re-embedded."""
+    index = VectorIndex()
+    index.add_patient(patient_id, {"neurology_note": note, "radiology_report": report})
+    return index
+
+
+# ---- Session-scoped pipeline state ----
+# Reruns that only touch widgets (opening a section, the sidebar) reuse the patient's results.
+# Validation of the extraction is redone when the patient, extraction or rule set changes, and
+# re-validation of the edited record, correction and prediction when the reviewer edits change.
+# STEP 2 always shows the extraction's validation; the re-validation is shown in STEP 3.
+SESSION_PATIENTS = 32
+
+# Free-text reviewer edits are checked against the schema values for these fields
+FIELD_VALUES = {"Sex": SEX_VALUES, "Weakness_Side": WEAKNESS_SIDES}
+
+
+def extraction_hash(extracted):
+    return hashlib.sha256(json.dumps(extracted, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def patient_state(patient_id, extracted):
+    memo = st.session_state.setdefault("pipeline_state", {})
+    key = (patient_id, extraction_hash(extracted), default_rules().version)
+    # Re-inserted on every use, so the oldest entry is the least recently used
+    state = memo.pop(key, None)
+    if state is None:
+        validator = IncrementalValidator(extracted, neurology_notes[patient_id], radiology_reports[patient_id],
+                                         predict=None, patient_id=patient_id)
+        state = {"validator": validator, "edits": None}
+    memo[key] = state
+    while len(memo) > SESSION_PATIENTS:
+        memo.pop(next(iter(memo)))
+    return state
+
+
+def patient_corrections(state, patient_id, extracted, edits):
+    """Re-validate the edited record and fill in the corrected record, change log and risk;
+    recomputed only when ``edits`` change."""
+    edits_key = tuple(sorted(edits.items()))
+    if state["edits"] != edits_key:
+        # Only the checks, rules and similarity columns that read an edited field are redone
+        validator = state["validator"]
+        validator.update_many({**extracted, **edits})
+        validation = validator.validation
+        corrected, changed, changes = hitl_correction(patient_id, extracted, validation, edits)
+        state.update(edits=edits_key, validation=validation, corrected=corrected, changed=changed, changes=changes,
+                     probability=predict_poor_outcome(corrected), comparison=None, attributions=None)
+    return state
+
+
+def apply_reviewer_edit(patient_id):
+    field, value = st.session_state["edit_field"], st.session_state["edit_value"].strip()
+    if not value:
+        return
+    if field in INTEGER_FIELDS:
+        try:
+            value = int(value)
+        except ValueError:
+            st.session_state["edit_error"] = f"{field} needs a whole number, got {value!r}."
+            return
+    else:
+        allowed = BINARY_VALUES if field in BINARY_FIELDS else FIELD_VALUES.get(field)
+        if allowed is not None:
+            value = value.lower()
+            if value not in allowed:
+                st.session_state["edit_error"] = f"{field} must be one of {', '.join(allowed)}, got {value!r}."
+                return
+    st.session_state.pop("edit_error", None)
+    st.session_state.setdefault("reviewer_edits", {}).setdefault(patient_id, {})[field] = value
+
+
+def reset_reviewer_edits(patient_id):
+    st.session_state.get("reviewer_edits", {}).pop(patient_id, None)
+    st.session_state.pop("edit_error", None)
+
+
+session_edits = st.session_state.setdefault("reviewer_edits", {})
+state = patient_state(selected, extracted)
+patient_corrections(state, selected, extracted, {**reviewer_edits.get(selected, {}), **session_edits.get(selected, {})})
+validation = state["validator"].baseline
+step2_section = st.expander(f"STEP 2 — Multi-Tiered Validation {simplified_badge}", expanded=True, key="step2_section", on_change="rerun")
+if step2_section.open:
+    with step2_section:
+    
+        with st.container():
+            st.info("""
+            ℹ️ **What is this step?**
+        
+            Multi-layered validation using defense-in-depth approach to catch errors and hallucinations.
+        
+            **Real Implementation (Paper Section 2.3.2):**
+            - Layer 1: Rule-based checks (Python scripts)
+            - Layer 2: RAG with FAISS vector database
+            - Layer 3: Cosine similarity vs 200 validated records
+            - Layer 4: Human-in-the-loop review (κ=0.89 agreement)
+        
+            **This Demo:**
+            - Simplified rule checking
+            - Rule-registry RAG checks plus a local hashed n-gram vector index (no FAISS)
+            - Cosine scores against 200 synthetic reference records (Table 1 distribution)
+            """)
+    
+        # Validation Progress Bar
+        stages = ["Rule-Based", "RAG", "Cosine", "HITL"]
+        stage_status = []
+    
+        for stage in stages:
+            if stage == "HITL":
+                passed = "✔" in validation.get("HITL", "")
+            else:
+                passed = all("❗" not in msg for msg in validation.get(stage, []))
+            stage_status.append(1 if passed else 0)
+    
+        st.plotly_chart(progress_figure(tuple(stages), tuple(stage_status)), use_container_width=True)
+
+        # ---- Rule-based ----
+        st.subheader("1) 🔎 Rule-Based Verification")
+        for msg in validation["Rule"]:
+            if "❗" in msg:
+                st.markdown(highlight_red(msg), unsafe_allow_html=True)
+            else:
+                st.markdown(highlight_green(msg), unsafe_allow_html=True)
+
+        # ---- RAG ----
+        st.markdown("---")
+        st.subheader("2) 📚 RAG Verification (Semantic vs Original Note)")
+        for msg in validation["RAG"]:
+            if "❗" in msg:
+                st.markdown(highlight_red(msg), unsafe_allow_html=True)
+            else:
+                st.markdown(highlight_green(msg), unsafe_allow_html=True)
+
+        # Supporting evidence retrieved from the patient's own documents for each flagged field
+        evidence = retrieve_evidence(evidence_index(selected, neurology_notes[selected], radiology_reports[selected]), selected, [f["field"] for f in validation["Flags"]], k=1)
+        for field, hits in evidence.items():
+            for hit in hits:
+                st.caption(f"📎 **{field}** — {hit['document'].replace('_', ' ')} (score {hit['score']:.2f}): “{hit['text']}”")
+
+        # ---- Cosine Similarity ----
+        st.markdown("---")
+        st.subheader("3) 📈 Cosine Similarity Flagging")
     
-    for msg in validation["Cosine"]:
-        if "❗" in msg:
-            st.markdown(highlight_red(msg), unsafe_allow_html=True)
+        # Visualization of cosine similarity
+        sim_score = validation["CosineSimilarity"]
+        st.plotly_chart(cosine_gauge(sim_score), use_container_width=True)
+    
+        for msg in validation["Cosine"]:
+            if "❗" in msg:
+                st.markdown(highlight_red(msg), unsafe_allow_html=True)
+            else:
+                st.markdown(highlight_green(msg), unsafe_allow_html=True)
+
+        # Feedback Loop Indicator
+        flagged = any("❗" in msg for key in ["Rule", "RAG", "Cosine"] for msg in validation[key])
+
+        if flagged:
+            st.markdown("""
+            <div style='margin:15px 0;padding:12px 16px;
+                border-left:6px solid #d9534f;background:#fdecec;border-radius:8px;'>
+                <b style='color:#8B0000;font-size:15px;'>❗ Validation flagged inconsistencies</b><br>
+                <span style='color:#b30000;font-size:15px;'>
+                ↺ LLM Feedback Loop Triggered → Proceeding to Correction Step
+                </span>
+            </div>
+            """, unsafe_allow_html=True)
         else:
-            st.markdown(highlight_green(msg), unsafe_allow_html=True)
-
-    # Feedback Loop Indicator
-    flagged = any("❗" in msg for key in ["Rule", "RAG", "Cosine"] for msg in validation[key])
-
-    if flagged:
-        st.markdown("""
-        <div style='margin:15px 0;padding:12px 16px;
-            border-left:6px solid #d9534f;background:#fdecec;border-radius:8px;'>
-            <b style='color:#8B0000;font-size:15px;'>❗ Validation flagged inconsistencies</b><br>
-            <span style='color:#b30000;font-size:15px;'>
-            ↺ LLM Feedback Loop Triggered → Proceeding to Correction Step
-            </span>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <div style='margin:15px 0;padding:12px 16px;
-            border-left:6px solid #28a745;background:#e8f8f0;border-radius:8px;'>
-            <b style='color:#006400;font-size:15px;'>✔ All checks stable</b><br>
-            <span style='color:#1d7d46;font-size:15px;'>
-            No feedback loop triggered — auto-accept path active
-            </span>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # ---- HITL Recommendation ----
-    st.markdown("---")
-    st.subheader("4) 🧑‍⚕️ HITL Review Recommendation")
-    if "❗" in validation["HITL"]:
-        st.markdown(highlight_red(validation["HITL"]), unsafe_allow_html=True)
-    else:
-        st.markdown(highlight_green(validation["HITL"]), unsafe_allow_html=True)
+            st.markdown("""
+            <div style='margin:15px 0;padding:12px 16px;
+                border-left:6px solid #28a745;background:#e8f8f0;border-radius:8px;'>
+                <b style='color:#006400;font-size:15px;'>✔ All checks stable</b><br>
+                <span style='color:#1d7d46;font-size:15px;'>
+                No feedback loop triggered — auto-accept path active
+                </span>
+            </div>
+            """, unsafe_allow_html=True)
+
+        # ---- HITL Recommendation ----
+        st.markdown("---")
+        st.subheader("4) 🧑‍⚕️ HITL Review Recommendation")
+        if "❗" in validation["HITL"]:
+            st.markdown(highlight_red(validation["HITL"]), unsafe_allow_html=True)
+        else:
+            st.markdown(highlight_green(validation["HITL"]), unsafe_allow_html=True)
 
 
 # =====================================================================
@@ -829,187 +747,342 @@ with st.expander(f"STEP 2 — Multi-Tiered Validation {simplified_badge}", expan
 # =====================================================================
 
 st.markdown("---")
-with st.expander(f"STEP 3 — Corrected Output (HITL-Assisted) {simplified_badge}", expanded=True):
-
-    with st.container():
-        st.info("""
-        ℹ️ **What is this step?**
+corrected, changed, changes = state["corrected"], state["changed"], state["changes"]
+step3_section = st.expander(f"STEP 3 — Corrected Output (HITL-Assisted) {simplified_badge}", expanded=True, key="step3_section", on_change="rerun")
+if step3_section.open:
+    with step3_section:
+
+        with st.container():
+            st.info("""
+            ℹ️ **What is this step?**
         
-        Human-in-the-loop correction of flagged inconsistencies.
+            Human-in-the-loop correction of flagged inconsistencies.
         
-        **Real Implementation (Paper Section 2.3.2):**
-        - Two independent clinicians review flagged cases
-        - Inter-rater agreement: κ = 0.89
-        - All flagged + 10% random sample reviewed
-        - Corrections fed back to LoRA adapters
+            **Real Implementation (Paper Section 2.3.2):**
+            - Two independent clinicians review flagged cases
+            - Inter-rater agreement: κ = 0.89
+            - All flagged + 10% random sample reviewed
+            - Corrections fed back to LoRA adapters
         
-        **This Demo:**
-        - Mock automatic corrections based on validation flags
-        """)
-
-    corrected, changed, changes = hitl_correction(selected, extracted, validation)
-
-    if changed:
-        st.markdown(
-            "<p style='color:#cc0000;font-weight:700;font-size:18px;'>"
-            "⚠️ Issues detected — corrections applied</p>",
-            unsafe_allow_html=True
-        )
+            **This Demo:**
+            - Mock automatic corrections based on validation flags
+            """)
+
+        if changed:
+            st.markdown(
+                "<p style='color:#cc0000;font-weight:700;font-size:18px;'>"
+                "⚠️ Issues detected — corrections applied</p>",
+                unsafe_allow_html=True
+            )
         
-        # Show what changed
-        if changes:
-            st.markdown("### 🔄 Changes Made:")
-            for field, change in changes.items():
-                st.markdown(f"**{field}:** `{change['from']}` → `{change['to']}`")
+            # Show what changed
+            if changes:
+                st.markdown("### 🔄 Changes Made:")
+                for field, change in changes.items():
+                    st.markdown(f"**{field}:** `{change['from']}` → `{change['to']}`")
     
-    else:
-        st.markdown(
-            "<p style='color:#008800;font-weight:700;font-size:18px;'>"
-            "✔ No corrections needed</p>",
-            unsafe_allow_html=True
+        else:
+            st.markdown(
+                "<p style='color:#008800;font-weight:700;font-size:18px;'>"
+                "✔ No corrections needed</p>",
+                unsafe_allow_html=True
+            )
+
+        # ---- Reviewer edits: a new value invalidates the memoized correction and prediction ----
+        # The form is only built while its popover is open
+        edit_popover = st.popover("✍️ Reviewer Edit", key="edit_popover", on_change="rerun")
+        if edit_popover.open:
+            with edit_popover:
+                with st.form("reviewer_edit_form", clear_on_submit=True):
+                    st.selectbox("Field", list(extracted), key="edit_field")
+                    st.text_input("Corrected value", key="edit_value")
+                    st.form_submit_button("Apply Edit", on_click=apply_reviewer_edit, args=(selected,))
+        if "edit_error" in st.session_state:
+            st.error(st.session_state["edit_error"])
+        if session_edits.get(selected):
+            st.caption("Reviewer edits this session: " + ", ".join(f"{f} = {v}" for f, v in session_edits[selected].items()))
+            st.button("Reset Reviewer Edits", on_click=reset_reviewer_edits, args=(selected,))
+
+        # ---- Re-validation of the edited record ----
+        if state["edits"]:
+            revalidation = state["validation"]
+            st.markdown("### 🔁 Re-validation After Edits")
+            remaining = [msg for key in ["Rule", "RAG", "Cosine"] for msg in revalidation[key] if "❗" in msg]
+            for msg in remaining:
+                st.markdown(highlight_red(msg), unsafe_allow_html=True)
+            if "❗" in revalidation["HITL"]:
+                st.markdown(highlight_red(revalidation["HITL"]), unsafe_allow_html=True)
+            else:
+                st.markdown(highlight_green(revalidation["HITL"]), unsafe_allow_html=True)
+            st.caption(f"Cosine similarity of the edited record: {revalidation['CosineSimilarity']:.2f}")
+
+        # Before/After Comparison Table
+        st.markdown("### 📊 Before/After Comparison")
+
+        if state["comparison"] is None:
+            comparison_data = []
+            for key in extracted.keys():
+                orig = extracted[key]
+                corr = corrected[key]
+                changed_flag = "✓ Changed" if orig != corr else ""
+                comparison_data.append({
+                    "Field": key,
+                    "Original": orig,
+                    "Corrected": corr,
+                    "Status": changed_flag
+                })
+
+            # pandas is only needed for the row styling, so it is imported once this section is open
+            import pandas as pd
+            df_comparison = pd.DataFrame(comparison_data)
+
+            # Color code changed rows
+            def highlight_changes(row):
+                if row['Status'] == "✓ Changed":
+                    return ['background-color: #ffffcc; color: #000000'] * len(row)
+                return ['background-color: #ffffff; color: #000000'] * len(row)
+
+            state["comparison"] = df_comparison.style.apply(highlight_changes, axis=1)
+
+        st.dataframe(
+            state["comparison"],
+            hide_index=True,
+            use_container_width=True
         )
 
-    # Before/After Comparison Table
-    st.markdown("### 📊 Before/After Comparison")
-    
-    comparison_data = []
-    for key in extracted.keys():
-        orig = extracted[key]
-        corr = corrected[key]
-        changed_flag = "✓ Changed" if orig != corr else ""
-        comparison_data.append({
-            "Field": key,
-            "Original": orig,
-            "Corrected": corr,
-            "Status": changed_flag
-        })
-    
-    df_comparison = pd.DataFrame(comparison_data)
-    
-    # Color code changed rows
-    def highlight_changes(row):
-        if row['Status'] == "✓ Changed":
-            return ['background-color: #ffffcc; color: #000000'] * len(row)
-        return ['background-color: #ffffff; color: #000000'] * len(row)
-    
-    st.dataframe(
-        df_comparison.style.apply(highlight_changes, axis=1),
-        hide_index=True,
-        use_container_width=True
-    )
-
 
 # =====================================================================
 # STEP 4: Prediction
 # =====================================================================
 
-with st.expander(f"STEP 4 — Outcome Prediction {simplified_badge}", expanded=True):
+FEATURE_LABELS = {"Atrial_Fibrillation": "Atrial Fibrillation", "tPA_Administered": "tPA Given"}
 
-    with st.container():
-        st.info("""
-        ℹ️ **What is this step?**
+
+@st.cache_resource
+def shap_figure(attributions):
+    """Horizontal bar chart of ``((feature, log-odds contribution), ...)``, largest effect on top."""
+    import plotly.graph_objects as go
+
+    ranked = sorted(attributions, key=lambda item: abs(item[1]))
+    fig_shap = go.Figure(go.Bar(
+        x=[value for _, value in ranked],
+        y=[FEATURE_LABELS.get(feature, feature) for feature, _ in ranked],
+        orientation="h",
+        marker_color=["#dc3545" if value > 0 else "#28a745" for _, value in ranked],
+        hovertemplate="%{y}: %{x:+.3f} log-odds<extra></extra>",
+    ))
+    fig_shap.update_layout(height=300, title="Feature Impact on Poor Outcome Prediction",
+                           xaxis_title="SHAP value (log-odds)")
+    return fig_shap
+
+
+prob = state["probability"]
+if state.get("attributions") is None:
+    state["attributions"] = tuple(default_attributor().explain_one(corrected).items())
+step4_section = st.expander(f"STEP 4 — Outcome Prediction {simplified_badge}", expanded=True, key="step4_section", on_change="rerun")
+if step4_section.open:
+    with step4_section:
+
+        with st.container():
+            st.info("""
+            ℹ️ **What is this step?**
         
-        Predicts 3-month stroke outcome (mRS 3-6: poor outcome) using machine learning.
+            Predicts 3-month stroke outcome (mRS 3-6: poor outcome) using machine learning.
         
-        **Real Implementation (Paper Section 2.4):**
-        - Model: TabPFN (best: AUROC 0.816)
-        - Features: 12 variables from extracted data
-        - Training: 767 patients with outcome data
-        - Validation: Good calibration (Hosmer-Lemeshow p>0.05)
+            **Real Implementation (Paper Section 2.4):**
+            - Model: TabPFN (best: AUROC 0.816)
+            - Features: 12 variables from extracted data
+            - Training: 767 patients with outcome data
+            - Validation: Good calibration (Hosmer-Lemeshow p>0.05)
         
-        **This Demo:**
-        - Simplified rule-based probability
-        - Based only on ASPECT score
-        """)
+            **This Demo:**
+            - Logistic regression fitted once per server process (NumPy, no TabPFN)
+            - Trained on 767 synthetic patients drawn from the Table 1 distributions
+            """)
+
+        st.write("**Input Features:**")
+        feature_df = {
+            'Feature': ['Age', 'NIHSS', 'ASPECTS', 'Hypertension', 'Atrial Fibrillation', 'tPA Given'],
+            'Value': [corrected['Age'], corrected['NIHSS'], corrected['ASPECTS'], 
+                      corrected['Hypertension'], corrected['Atrial_Fibrillation'], corrected['tPA_Administered']]
+        }
+        st.dataframe(feature_df, hide_index=True, use_container_width=True)
 
-    # Simple rule-based probability
-    if corrected["ASPECTS"] <= 5:
-        prob = 0.55
-    elif corrected["ASPECTS"] <= 7:
-        prob = 0.32
-    else:
-        prob = 0.10
-
-    st.write("**Input Features:**")
-    feature_df = pd.DataFrame({
-        'Feature': ['Age', 'NIHSS', 'ASPECTS', 'Hypertension', 'Atrial Fibrillation', 'tPA Given'],
-        'Value': [corrected['Age'], corrected['NIHSS'], corrected['ASPECTS'], 
-                  corrected['Hypertension'], corrected['Atrial_Fibrillation'], corrected['tPA_Administered']]
-    })
-    st.dataframe(feature_df, hide_index=True, use_container_width=True)
-
-    # SHAP-style Feature Importance
-    st.markdown("### 📊 Feature Importance (Mock SHAP Values)")
+        # Per-patient SHAP values for the model in use
+        st.markdown("### 📊 Feature Importance (SHAP Values)")
     
-    shap_data = pd.DataFrame({
-        'Feature': ['NIHSS', 'Age', 'ASPECTS', 'Atrial Fibrillation', 'tPA Given', 'Hypertension'],
-        'Impact': [0.35, 0.25, -0.28, 0.15, -0.12, 0.08]
-    })
+        st.plotly_chart(shap_figure(state["attributions"]), use_container_width=True)
     
-    fig_shap = px.bar(
-        shap_data, 
-        x='Impact', 
-        y='Feature', 
-        orientation='h',
-        color='Impact',
-        color_continuous_scale=['#dc3545', '#ffc107', '#28a745'],
-        title='Feature Impact on Poor Outcome Prediction'
-    )
-    fig_shap.update_layout(height=300)
-    st.plotly_chart(fig_shap, use_container_width=True)
-    
-    st.caption("🔴 Red: Increases risk | 🟢 Green: Decreases risk")
-
-    # Gradient Risk Bar
-    st.markdown(f"""
-    <div style='height:22px;border-radius:12px;margin-top:12px;
-        background:linear-gradient(90deg, #ff6666 {prob*100}%, #e0e0e0 {prob*100}%);'>
-    </div>
-    <p style='font-size:16px;font-weight:600;margin-top:6px;'>{prob*100:.1f}% predicted poor outcome (mRS 3-6)</p>
-    """, unsafe_allow_html=True)
+        base_risk = 1 / (1 + math.exp(-default_attributor().base_value))
+        st.caption(f"🔴 Red: Increases risk | 🟢 Green: Decreases risk — contributions in log-odds relative to an "
+                   f"average training patient ({base_risk:.1%} risk); they sum to this patient's log-odds")
+
+        # Gradient Risk Bar
+        st.markdown(f"""
+        <div style='height:22px;border-radius:12px;margin-top:12px;
+            background:linear-gradient(90deg, #ff6666 {prob*100}%, #e0e0e0 {prob*100}%);'>
+        </div>
+        <p style='font-size:16px;font-weight:600;margin-top:6px;'>{prob*100:.1f}% predicted poor outcome (mRS 3-6)</p>
+        """, unsafe_allow_html=True)
 
 
 # ===============================================================
-# 5) ROC CURVE & 6) CALIBRATION PLOT - USING ACTUAL IMAGES
+# 5) ROC CURVE & 6) PRECISION-RECALL - LIVE FROM MODEL PREDICTIONS
 # ===============================================================
-with st.expander("📈 Model Performance Visualization (From Paper)"):
-    col1, col2 = st.columns(2)
+def ci_label(kind, metric):
+    m = model_evaluation(kind)[metric]
+    return f"{MODEL_LABELS[kind]} ({metric.upper()} {m['estimate']:.3f}, {m['ci'][0]:.3f}-{m['ci'][1]:.3f})"
+
+
+@st.cache_resource
+def roc_figure(kinds):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", name="Chance",
+                             line=dict(color="#999999", dash="dash")))
+    for kind in kinds:
+        roc = model_evaluation(kind)["roc"]
+        fig.add_trace(go.Scatter(x=roc["fpr"], y=roc["tpr"], mode="lines", name=ci_label(kind, "auroc")))
+    fig.update_layout(height=420, xaxis_title="False Positive Rate", yaxis_title="True Positive Rate",
+                      legend=dict(x=0.35, y=0.05), margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+
+@st.cache_resource
+def pr_figure(kinds):
+    import plotly.graph_objects as go
+
+    evaluation = model_evaluation(kinds[0])
+    prevalence = evaluation["positives"] / evaluation["n"]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[0, 1], y=[prevalence, prevalence], mode="lines", name=f"Prevalence ({prevalence:.1%})",
+                             line=dict(color="#999999", dash="dash")))
+    for kind in kinds:
+        pr = model_evaluation(kind)["pr"]
+        fig.add_trace(go.Scatter(x=pr["recall"], y=pr["precision"], mode="lines", line_shape="hv",
+                                 name=ci_label(kind, "auprc")))
+    fig.update_layout(height=420, xaxis_title="Recall", yaxis_title="Precision", yaxis_range=[0, 1.02],
+                      legend=dict(x=0.35, y=0.95), margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+
+@st.cache_resource
+def calibration_figure(kinds):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode="lines", name="Perfect calibration",
+                             line=dict(color="#999999", dash="dash")))
+    for kind in kinds:
+        curve = model_calibration(kind).curve()
+        fig.add_trace(go.Scatter(
+            x=[row["mean_predicted"] for row in curve],
+            y=[row["observed_rate"] for row in curve],
+            customdata=[[row["bin"], row["count"]] for row in curve],
+            hovertemplate="Risk %{customdata[0]}: predicted %{x:.3f}, observed %{y:.3f} (n=%{customdata[1]})",
+            mode="lines+markers",
+            name=MODEL_LABELS[kind],
+        ))
+    fig.update_layout(height=420, xaxis_title="Mean Predicted Risk", yaxis_title="Observed Poor Outcome Rate",
+                      legend=dict(x=0.02, y=0.98), margin=dict(l=10, r=10, t=10, b=10))
+    return fig
+
+
+performance_section = st.expander("📈 Model Performance Visualization", key="performance_section", on_change="rerun")
+if performance_section.open:
+    with performance_section:
+        kinds = tuple(available_models())
+        evaluation = model_evaluation(kinds[0])
+        st.caption(f"Computed live: each model scores a synthetic hold-out cohort of {evaluation['n']:,} patients "
+                   f"({evaluation['positives'] / evaluation['n']:.1%} poor outcomes) in one batch call; "
+                   f"{CI_LEVEL:.0%} CIs from {evaluation['resamples']:,} bootstrap resamples.")
+        col1, col2 = st.columns(2)
     
-    with col1:
-        st.markdown("### ROC Curves Comparison")
-        st.image("images/roc.png", use_container_width=True)
-        st.caption("**Figure**: ROC curves comparing Logistic Regression (AUROC=0.700), CatBoost (AUROC=0.789), and TabPFN-Specialized (AUROC=0.816)")
+        with col1:
+            st.markdown("### ROC Curves Comparison")
+            st.plotly_chart(roc_figure(kinds), use_container_width=True)
     
-    with col2:
-        st.markdown("### Precision-Recall Comparison")
-        st.image("images/prc.png", use_container_width=True)
-        st.caption("**Figure**: Precision-Recall curves showing similar AUPRC (~0.315) across all models due to class imbalance")
+        with col2:
+            st.markdown("### Precision-Recall Comparison")
+            st.plotly_chart(pr_figure(kinds), use_container_width=True)
     
-    # Add summary insights
-    st.success("✓ All models demonstrated good calibration (Hosmer-Lemeshow test p > 0.05)")
-    st.info("""
-    **Key Insights from Paper:**
-    - TabPFN achieved best discrimination (AUROC = 0.816, 95% CI: 0.784-0.847)
-    - All models show similar AUPRC (~0.315) due to class imbalance (28.4% poor outcomes)
-    - Despite different AUROC values, all models maintained good calibration
-    - AUPRC more informative than AUROC for imbalanced datasets
-    - Results validate that automatically extracted data enables reliable outcome prediction
-    """)
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("### Calibration by Risk Decile")
+            st.plotly_chart(calibration_figure(kinds), use_container_width=True)
+
+        with col2:
+            st.markdown("### Calibration Statistics")
+            calibration_rows = []
+            for kind in kinds:
+                hist = model_calibration(kind)
+                hl = hist.hosmer_lemeshow()
+                calibration_rows.append({"Model": MODEL_LABELS[kind], "Brier": round(hist.brier(), 4),
+                                         "H-L χ²": round(hl["statistic"], 2), "df": hl["df"],
+                                         "p": None if hl["p_value"] is None else round(hl["p_value"], 3)})
+            st.dataframe(calibration_rows, hide_index=True, use_container_width=True)
+            poorly_calibrated = [row["Model"] for row in calibration_rows if row["p"] is not None and row["p"] <= 0.05]
+            if poorly_calibrated:
+                st.warning(f"Hosmer-Lemeshow p ≤ 0.05 for {', '.join(poorly_calibrated)} on the hold-out cohort")
+            else:
+                st.success("✓ All models are well calibrated on the hold-out cohort (Hosmer-Lemeshow p > 0.05)")
+
+        st.info("""
+        **Key Insights from Paper:**
+        - TabPFN achieved best discrimination (AUROC = 0.816, 95% CI: 0.784-0.847); Logistic Regression 0.700, CatBoost 0.789
+        - All models show similar AUPRC (~0.315) due to class imbalance (28.4% poor outcomes)
+        - Despite different AUROC values, all models maintained good calibration
+        - AUPRC more informative than AUROC for imbalanced datasets
+        - Results validate that automatically extracted data enables reliable outcome prediction
+        """)
 
 
 # =====================================================================
 # CSV Export
 # =====================================================================
 
-final_df = pd.DataFrame([{**corrected, "Predicted_Poor_Outcome_Probability": prob}])
+def final_csv(corrected, prob):
+    row = {**corrected, PROBABILITY_COLUMN: prob}
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(row))
+    writer.writeheader()
+    writer.writerow(row)
+    return buf.getvalue()
+
 
 st.download_button(
     label="⬇️ Download Final Structured Output (CSV)",
-    data=final_df.to_csv(index=False),
+    data=final_csv(corrected, prob),
     mime="text/csv",
     file_name=f"{selected}_corrected_output.csv"
 )
 
+# ===============================================================
+# STAGE LATENCY (SIDEBAR)
+# ===============================================================
+PROFILER.stop("render", rerun_token, selected)
+
+with st.sidebar:
+    st.markdown("### ⏱️ Stage Latency")
+    latency = PROFILER.summary()
+    render = latency.get("render")
+    if render:
+        st.metric("Rerun Time (p50)", f"{render['p50_ms']:.0f} ms", f"p95 {render['p95_ms']:.0f} ms", delta_color="off")
+    st.dataframe(
+        [{"stage": stage, **{k: s[k] for k in ("count", "p50_ms", "p95_ms", "p99_ms")}} for stage, s in latency.items()],
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption(f"Measured in this server process over the last {len(PROFILER.samples):,} stage samples")
+    st.download_button(
+        label="⬇️ Chrome Trace (JSON)",
+        data=lambda: json.dumps(PROFILER.chrome_trace()),
+        mime="application/json",
+        file_name="stroke_pipeline_trace.json"
+    )
+
 # ===============================================================
 # Footer
 # ===============================================================
@@ -0,0 +1,167 @@
+import os
+from pathlib import Path
+
+import streamlit as st
+
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+from stroke_pipeline.store import ResultStore, SORT_COLUMNS
+
+st.set_page_config(page_title="Review Dashboard", layout="wide")
+
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_STORE = os.environ.get("STROKE_RESULTS_DB", "results.db")
+
+st.title("🗂️ Cohort Review Dashboard")
+st.write("Batch results for the whole cohort. Filtering, sorting and paging run in the results store; "
+         "only the visible page is loaded. Select a row to open the patient.")
+
+
+def build_synthetic_store(path, n):
+    from stroke_pipeline.batch import run_batch, save_to_store
+    from stroke_pipeline.synthetic import synthetic_cases
+
+    cases = synthetic_cases(n)
+    with ResultStore(path) as store:
+        for _ in save_to_store(run_batch(cases, workers=1), cases, store):
+            pass
+
+
+# ===============================================================
+# RESULTS STORE
+# ===============================================================
+with st.sidebar:
+    st.markdown("### 🗄️ Results Store")
+    store_path = st.text_input("SQLite file", DEFAULT_STORE)
+
+if not Path(store_path).exists():
+    st.info(f"""
+    No results store at `{store_path}`. Write one from a batch run:
+
+    `python -m stroke_pipeline.batch cohort.jsonl -o results.jsonl --store {store_path}`
+
+    or generate one from synthetic patients (Table 1 distributions) below.
+    """)
+    n_synthetic = st.number_input("Synthetic patients", min_value=100, max_value=100_000, value=5_000, step=1_000)
+    if st.button("Generate synthetic results store"):
+        with st.spinner(f"Running the pipeline over {n_synthetic:,} synthetic patients..."):
+            build_synthetic_store(store_path, int(n_synthetic))
+        st.rerun()
+    st.stop()
+
+# ===============================================================
+# FILTERS, SORT AND PAGING (SIDEBAR)
+# ===============================================================
+with st.sidebar:
+    st.markdown("### 🔍 Filters")
+    status = st.radio("Status", ["All", "Needs review", "Auto-acceptable"], index=1)
+    min_probability = st.slider("Minimum predicted risk", 0.0, 1.0, 0.0, 0.05)
+    max_cosine = st.slider("Maximum cosine similarity", 0.0, 1.0, 1.0, 0.01)
+    patient_query = st.text_input("Patient ID contains")
+
+    st.markdown("### ↕️ Sort")
+    sort = st.selectbox("Sort by", SORT_COLUMNS, index=SORT_COLUMNS.index("probability"))
+    descending = st.toggle("Descending", value=True)
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+
+filters = {
+    "needs_review": {"All": None, "Needs review": True, "Auto-acceptable": False}[status],
+    "min_probability": min_probability or None,
+    "max_cosine": max_cosine if max_cosine < 1.0 else None,
+    "patient_id": patient_query.strip() or None,
+}
+
+with ResultStore(store_path) as store:
+    total = store.count(**filters)
+    n_pages = max(1, -(-total // page_size))
+
+    # Back to the first page whenever the query changes
+    query = (tuple(filters.items()), sort, descending, page_size)
+    if st.session_state.get("dashboard_query") != query:
+        st.session_state["dashboard_query"] = query
+        st.session_state["dashboard_page"] = 1
+    st.session_state["dashboard_page"] = min(st.session_state["dashboard_page"], n_pages)
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    col1.metric("Matching patients", f"{total:,}")
+    col2.metric("In store", f"{len(store):,}")
+    with col3:
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, key="dashboard_page")
+
+    rows = store.page(offset=(page - 1) * page_size, limit=page_size, sort=sort, descending=descending, **filters)
+
+    # ===============================================================
+    # PATIENT TABLE
+    # ===============================================================
+    for row in rows:
+        row["needs_review"] = bool(row["needs_review"])
+
+    # A fresh key per page/query, so a selection never points at a row from another page
+    event = st.dataframe(
+        rows,
+        hide_index=True,
+        key=f"patients_{hash(query)}_{page}",
+        on_select="rerun",
+        selection_mode="single-row",
+        column_config={
+            "patient_id": st.column_config.TextColumn("Patient ID"),
+            "needs_review": st.column_config.CheckboxColumn("Needs Review"),
+            "flags": st.column_config.NumberColumn("Flags"),
+            "changes": st.column_config.NumberColumn("Corrections"),
+            "cosine": st.column_config.NumberColumn("Cosine", format="%.3f"),
+            "probability": st.column_config.ProgressColumn("Predicted Risk", min_value=0.0, max_value=1.0, format="%.2f"),
+            "age": st.column_config.NumberColumn("Age"),
+            "nihss": st.column_config.NumberColumn("NIHSS"),
+            "aspects": st.column_config.NumberColumn("ASPECTS"),
+        },
+    )
+
+    selected_rows = event.selection.rows
+    if not selected_rows:
+        st.stop()
+
+    # ===============================================================
+    # PATIENT DETAIL (loaded on demand)
+    # ===============================================================
+    patient_id = rows[selected_rows[0]]["patient_id"]
+    detail = store.get(patient_id)
+
+result = detail["result"]
+validation = result["validation"]
+
+st.markdown("---")
+st.subheader(f"🧾 {patient_id}")
+
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown("#### 📝 Neurology Note")
+    st.text(detail["neurology_note"] or "(not stored)")
+with col2:
+    st.markdown("#### 🩻 Radiology Report")
+    st.text(detail["radiology_report"] or "(not stored)")
+
+st.markdown("#### 🔎 Validation")
+for tier in ["Rule", "RAG", "Cosine"]:
+    for msg in validation[tier]:
+        if "❗" in msg:
+            st.error(f"**{tier}** — {msg}")
+        else:
+            st.success(f"**{tier}** — {msg}")
+if "❗" in str(validation) or "🔎" in validation["HITL"]:
+    st.warning(validation["HITL"])
+else:
+    st.success(validation["HITL"])
+
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown("#### 🔄 Corrections")
+    if result["changes"]:
+        for field, change in result["changes"].items():
+            st.markdown(f"**{field}:** `{change['from']}` → `{change['to']}`")
+    else:
+        st.write("No corrections applied.")
+with col2:
+    st.markdown("#### 🎯 Predicted Poor Outcome")
+    st.metric("mRS 3-6 probability", f"{result[PROBABILITY_COLUMN]:.1%}")
+
+with st.expander("Corrected record"):
+    st.json(result["corrected"])
@@ -0,0 +1 @@
+"""Extraction → validation → correction → prediction pipeline behind the Streamlit demo."""
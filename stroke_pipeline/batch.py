@@ -0,0 +1,492 @@
+"""Headless batch mode: run validation, HITL correction and prediction over a whole cohort.
+
+Input is one of:
+  - a JSONL file, one patient per line:
+        {"patient_id": ..., "neurology_note": ..., "radiology_report": ..., "extraction": {...}}
+    with an optional "reviewer_edits": {field: value} applied during HITL correction
+  - a CSV file with patient_id, neurology_note, radiology_report and one column per extracted field
+  - a directory with one sub-directory per patient holding note.txt, radiology.txt and extraction.json
+
+Patients without an extraction are sent to a local LLM server first (``--llm-url``).
+
+Outcome probabilities are scored in blocks of ``PREDICT_BLOCK`` patients with one vectorized model
+call each (``--model`` picks the predictor).
+
+Output is a single JSONL (full per-patient result) or CSV (corrected record + flags) file, or
+columnar Parquet / Arrow IPC written in row groups (``.parquet`` / ``.arrow`` file, or a
+suffix-less directory dataset that each run appends to, optionally partitioned with ``--partition-by``).
+With ``--index DIR`` each JSONL result also carries the top supporting evidence spans per field.
+With ``--attributions`` each JSONL result also carries per-feature SHAP values (log-odds) for the model.
+With ``--review-queue DB`` flagged patients (plus the audit sample) are queued for reviewers.
+With ``--store DB`` every result and its documents go to the review dashboard's results store.
+With ``--calibration FILE`` patients whose 3-month outcome is known update a saved calibration histogram.
+With ``--cohort-stats FILE`` every corrected record is added to the saved Table 1 aggregates.
+Both files keep a ledger of the patients they count beside them (``<FILE>.ledger``), so a rerun adds nobody twice.
+
+    python -m stroke_pipeline.batch cohort.jsonl -o results.jsonl --workers 8
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from .attribution import Attributor
+from .cache import ResultCache, case_key, pipeline_version
+from .calibration import CALIBRATION_KIND, CalibrationHistogram, poor_outcome, print_summary as print_calibration
+from .cohort import CohortStats, count_patient
+from .columnar import FORMATS as COLUMNAR_FORMATS, ROW_GROUP_SIZE, write_columnar
+from .extraction import DEFAULT_MODEL, Extractor, OpenAICompatibleBackend
+from .ledger import CountLedger
+from .prediction import DEFAULT_MODEL_KIND, MODELS, PROBABILITY_COLUMN, default_model
+from .profiling import PROFILER, span, trace_memory
+from .records import fill_missing, to_array
+from .retrieval import VectorIndex, retrieve_evidence
+from .review import ReviewQueue
+from .schema import INTEGER_FIELDS
+from .store import COMMIT_EVERY as STORE_BLOCK, ResultStore
+from .similarity import default_reference, encode_records
+from .validation import validate_data, hitl_correction
+
+NOTE_FILE = "note.txt"
+RADIOLOGY_FILE = "radiology.txt"
+EXTRACTION_FILE = "extraction.json"
+
+# Row-per-patient output formats; anything else is columnar (see ``columnar``)
+ROW_FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# Corrected records scored per vectorized model call
+PREDICT_BLOCK = 1024
+
+# Corrected records per vectorized attribution job; a 10k-patient cohort is a single job
+ATTRIBUTION_BLOCK = 16_384
+
+
+# =====================================================================
+# COHORT LOADING
+# =====================================================================
+
+def _coerce_integer(value):
+    """CSV cell to int; empty, NaN and non-numeric cells ("unknown", "n/a", ...) are -1 (not documented)."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return -1
+    return int(number) if math.isfinite(number) else -1
+
+
+def _coerce_extraction(row):
+    extraction = {}
+    for key, value in row.items():
+        if key in INTEGER_FIELDS:
+            extraction[key] = _coerce_integer(value)
+        else:
+            extraction[key] = value
+    return extraction
+
+
+def _load_jsonl(path):
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _load_csv(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            case = {
+                "patient_id": row.pop("patient_id"),
+                "neurology_note": row.pop("neurology_note"),
+                "radiology_report": row.pop("radiology_report"),
+            }
+            if row:
+                case["extraction"] = _coerce_extraction(row)
+            yield case
+
+
+def read_patient_dir(patient_dir):
+    case = {
+        "patient_id": patient_dir.name,
+        "neurology_note": (patient_dir / NOTE_FILE).read_text(encoding="utf-8"),
+        "radiology_report": (patient_dir / RADIOLOGY_FILE).read_text(encoding="utf-8"),
+    }
+    if (patient_dir / EXTRACTION_FILE).exists():
+        case["extraction"] = json.loads((patient_dir / EXTRACTION_FILE).read_text(encoding="utf-8"))
+    return case
+
+
+def _load_directory(path):
+    for patient_dir in sorted(p for p in Path(path).iterdir() if p.is_dir()):
+        yield read_patient_dir(patient_dir)
+
+
+def load_cohort(path):
+    path = Path(path)
+    if path.is_dir():
+        return list(_load_directory(path))
+    if path.suffix == ".csv":
+        return list(_load_csv(path))
+    if path.suffix in (".jsonl", ".ndjson"):
+        return list(_load_jsonl(path))
+    raise ValueError(f"Unsupported cohort input: {path} (expected a directory, .csv or .jsonl)")
+
+
+# =====================================================================
+# PER-PATIENT PIPELINE
+# =====================================================================
+
+def process_patient(case):
+    patient_id = case["patient_id"]
+    extracted = case["extraction"]
+
+    validation = validate_data(
+        patient_id, extracted, case["neurology_note"], case["radiology_report"],
+        similarity=case.get("similarity"),
+    )
+    corrected, changed, changes = hitl_correction(patient_id, extracted, validation, case.get("reviewer_edits"))
+
+    return {
+        "patient_id": patient_id,
+        "extraction": extracted,
+        "validation": validation,
+        "corrected": corrected,
+        "changed": changed,
+        "changes": changes,
+    }
+
+
+def score_results(results, model, block=PREDICT_BLOCK):
+    """Attach the outcome probability, one ``predict_records`` call per ``block`` results."""
+    results = iter(results)
+    while chunk := list(islice(results, block)):
+        with span("predict_batch"):
+            probs = model.predict_records([r["corrected"] for r in chunk])
+        for result, prob in zip(chunk, probs):
+            result[PROBABILITY_COLUMN] = float(prob)
+        yield from chunk
+
+
+def run_batch(cases, workers=None, chunksize=None, model=None):
+    """Yield one result per case, in input order, fanning out over a process pool."""
+    if not cases:
+        return
+    workers = workers or os.cpu_count() or 1
+    model = model or default_model()
+
+    # Fields an extraction leaves out are treated as not documented, and flagged as such
+    cases = [{**case, "extraction": fill_missing(case["extraction"])} for case in cases]
+
+    # Score the whole cohort against the reference set in one matrix multiply
+    sims = default_reference().max_similarity(encode_records(to_array(c["extraction"] for c in cases)))
+    cases = [{**case, "similarity": float(sim)} for case, sim in zip(cases, sims)]
+
+    if workers == 1:
+        yield from score_results(map(process_patient, cases), model)
+        return
+
+    if chunksize is None:
+        chunksize = max(1, len(cases) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from score_results(pool.map(process_patient, cases, chunksize=chunksize), model)
+
+
+# =====================================================================
+# RESULT CACHE
+# =====================================================================
+
+def lookup_cached(cases, cache, version=None):
+    """Split ``cases`` into cache hits and the misses that still need the pipeline.
+
+    Keys are computed before any extraction is filled in, so notes-only inputs hit on re-runs.
+    """
+    keys = [case_key(c, version) for c in cases]
+    hits = [cache.get(k) for k in keys]
+    misses = [c for c, hit in zip(cases, hits) if hit is None]
+    return keys, hits, misses
+
+
+def merge_cached(cases, keys, hits, fresh_results, cache):
+    """Interleave cached and freshly computed results in input order, storing the fresh ones."""
+    fresh_results = iter(fresh_results)
+    for case, key, hit in zip(cases, keys, hits):
+        if hit is None:
+            hit = next(fresh_results)
+            cache.put(key, hit)
+        # Identical content can belong to a different patient
+        yield {**hit, "patient_id": case["patient_id"]}
+
+
+# =====================================================================
+# OUTPUT
+# =====================================================================
+
+def _csv_row(result):
+    validation = result["validation"]
+    return {
+        "patient_id": result["patient_id"],
+        **result["corrected"],
+        PROBABILITY_COLUMN: result[PROBABILITY_COLUMN],
+        "Needs_Review": "❗" in str(validation),
+        "Cosine_Similarity": validation["CosineSimilarity"],
+        "Changed_Fields": ";".join(result["changes"]),
+    }
+
+
+def output_format(path, partition_by=None):
+    """``"jsonl"``, ``"csv"`` or ``"columnar"`` for an output path; ValueError if it cannot be written."""
+    suffix = Path(path).suffix
+    if suffix in ROW_FORMATS:
+        if partition_by:
+            raise ValueError(f"--partition-by needs columnar output (.parquet, .arrow or a directory), not {suffix}")
+        return ROW_FORMATS[suffix]
+    if suffix in COLUMNAR_FORMATS or not suffix:
+        return "columnar"
+    raise ValueError(f"Unsupported output {path}: expected .jsonl, .csv, .parquet, .arrow or a directory")
+
+
+def write_results(results, path, partition_by=None, row_group_size=ROW_GROUP_SIZE):
+    """Stream results to ``path``; returns the number of patients written."""
+    path = Path(path)
+    count = 0
+    format = output_format(path, partition_by)
+
+    if format == "columnar":
+        return write_columnar(results, path, partition_by=partition_by, row_group_size=row_group_size)
+
+    if format == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = None
+            for result in results:
+                row = _csv_row(result)
+                if writer is None:
+                    writer = csv.DictWriter(fh, fieldnames=list(row), extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerow(row)
+                count += 1
+        return count
+
+    with open(path, "w", encoding="utf-8") as fh:
+        for result in results:
+            fh.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def attach_evidence(results, index, k=3):
+    """Add top-``k`` supporting evidence spans for every extracted field to each result."""
+    for result in results:
+        result["evidence"] = retrieve_evidence(index, result["patient_id"], list(result["extraction"]), k=k)
+        yield result
+
+
+def attach_attributions(results, attributor, block=ATTRIBUTION_BLOCK):
+    """Add ``{feature: SHAP value}`` to each result, one ``Attributor.explain`` call per ``block`` results."""
+    results = iter(results)
+    while chunk := list(islice(results, block)):
+        with span("attribution"):
+            phi = attributor.explain_records([r["corrected"] for r in chunk])
+        for result, row in zip(chunk, phi.tolist()):
+            result["attributions"] = dict(zip(attributor.features, row))
+        yield from chunk
+
+
+def enqueue_for_review(results, queue, block=PREDICT_BLOCK):
+    """Pass results through, queueing them for review in one transaction per ``block``."""
+    results = iter(results)
+    while chunk := list(islice(results, block)):
+        queue.enqueue_many(chunk)
+        yield from chunk
+
+
+def save_to_store(results, cases, store, block=STORE_BLOCK):
+    """Pass results through, writing each block (with the source documents) to ``store``."""
+    results, cases = iter(results), iter(cases)
+    while chunk := list(islice(results, block)):
+        store.add_many(chunk, list(islice(cases, len(chunk))))
+        yield from chunk
+
+
+def track_calibration(results, cases, histogram, ledger=None, block=PREDICT_BLOCK):
+    """Pass results through, adding each block's patients with a known outcome to ``histogram``.
+
+    With a ``ledger``, patients it already holds for the histogram are passed through uncounted.
+    """
+    results, cases = iter(results), iter(cases)
+    while chunk := list(islice(results, block)):
+        labelled = [(r[PROBABILITY_COLUMN], y) for r, c in zip(chunk, islice(cases, len(chunk)))
+                    if (y := poor_outcome(c)) is not None
+                    and (ledger is None or ledger.claim(CALIBRATION_KIND, r["patient_id"]))]
+        if labelled:
+            histogram.update(*zip(*labelled))
+        yield from chunk
+
+
+def track_cohort(results, cases, stats, ledger=None):
+    """Pass results through, folding each corrected record and any known outcome into ``stats``
+    (see ``cohort.count_patient`` for what a ``ledger`` lets through)."""
+    for result, case in zip(results, cases):
+        count_patient(stats, result["corrected"], poor_outcome(case), result["patient_id"], ledger)
+        yield result
+
+
+def extract_missing(cases, extractor):
+    """Fill in ``extraction`` for cases that arrive with notes only."""
+    missing = [c for c in cases if "extraction" not in c]
+    if missing:
+        extracted = extractor.extract((c["patient_id"], c["neurology_note"], c["radiology_report"]) for c in missing)
+        for case in missing:
+            case["extraction"] = extracted[case["patient_id"]]
+    return len(missing)
+
+
+def print_stage_summary(summary):
+    # Peak memory is only recorded while tracemalloc is tracing (--trace-memory)
+    memory = any(s["peak_kb_p95"] is not None for s in summary.values())
+    print(f"{'stage':<14}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}" + (f"{'peak KB p95':>13}" if memory else ""))
+    for stage, s in summary.items():
+        line = f"{stage:<14}{s['count']:>8}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['p99_ms']:>10.3f}"
+        if memory:
+            line += f"{s['peak_kb_p95']:>13.1f}" if s["peak_kb_p95"] is not None else f"{'-':>13}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the stroke pipeline over a cohort of patients.")
+    parser.add_argument("input", help="Cohort directory, .csv or .jsonl file")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output .jsonl, .csv, .parquet or .arrow file, or a directory (no suffix) for a Parquet dataset")
+    parser.add_argument("--partition-by", default=None,
+                        help="Partition columnar output by this column (not with .jsonl / .csv output)")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE, help="Rows per Parquet row group")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Patients per task sent to each worker")
+    parser.add_argument("--index", default=None, help="Evidence index directory; new and amended patients are (re-)embedded incrementally")
+    parser.add_argument("--llm-url", default=None, help="OpenAI-compatible server for patients without an extraction")
+    parser.add_argument("--llm-model", default=DEFAULT_MODEL)
+    parser.add_argument("--llm-batch-size", type=int, default=4, help="Patients per LLM request")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Concurrent LLM requests")
+    parser.add_argument("--model", choices=sorted(MODELS), default=DEFAULT_MODEL_KIND, help="Outcome predictor")
+    parser.add_argument("--attributions", action="store_true", help="Add per-feature SHAP values to each result")
+    parser.add_argument("--review-queue", default=None, help="SQLite review queue for flagged and audit-sampled patients")
+    parser.add_argument("--store", default=None, help="SQLite results store for the review dashboard")
+    parser.add_argument("--calibration", default=None,
+                        help="Calibration histogram JSON, updated with patients that carry a 3-month outcome")
+    parser.add_argument("--cohort-stats", default=None, help="Table 1 aggregates JSON, updated with every corrected record")
+    parser.add_argument("--trace", default=None, help="Write per-stage timings as a Chrome trace JSON (per-patient stages need --workers 1)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record peak memory per stage with tracemalloc (slows the run; also STROKE_TRACE_MEMORY=1)")
+    parser.add_argument("--cache", default=None, help="SQLite result cache; unchanged notes are not re-processed")
+    parser.add_argument("--cache-max-entries", type=int, default=None)
+    parser.add_argument("--cache-max-mb", type=float, default=None)
+    args = parser.parse_args(argv)
+    if args.trace_memory:
+        trace_memory()
+    try:
+        output_format(args.output, args.partition_by)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    cases = load_cohort(args.input)
+    todo = cases
+    model = default_model(args.model)
+
+    cache = None
+    if args.cache:
+        max_bytes = int(args.cache_max_mb * 1024 * 1024) if args.cache_max_mb else None
+        cache = ResultCache(args.cache, max_entries=args.cache_max_entries, max_bytes=max_bytes)
+        keys, hits, todo = lookup_cached(cases, cache, pipeline_version(model=model))
+
+    if any("extraction" not in c for c in todo):
+        if not args.llm_url:
+            parser.error("some patients have no extraction; pass --llm-url to extract them")
+        backend = OpenAICompatibleBackend(args.llm_url, model=args.llm_model)
+        extract_missing(todo, Extractor(backend, batch_size=args.llm_batch_size, concurrency=args.llm_concurrency))
+
+    results = run_batch(todo, workers=args.workers, chunksize=args.chunksize, model=model)
+    if cache is not None:
+        results = merge_cached(cases, keys, hits, results, cache)
+
+    if args.index:
+        index = VectorIndex(args.index)
+        for case in cases:
+            index.add_patient(case["patient_id"], {
+                "neurology_note": case["neurology_note"],
+                "radiology_report": case["radiology_report"],
+            })
+        results = attach_evidence(results, index)
+
+    if args.attributions:
+        results = attach_attributions(results, Attributor(model))
+
+    review_queue = None
+    if args.review_queue:
+        review_queue = ReviewQueue(args.review_queue)
+        results = enqueue_for_review(results, review_queue)
+
+    store = None
+    if args.store:
+        store = ResultStore(args.store)
+        # Results come back in input order, so they line up with ``cases``
+        results = save_to_store(results, cases, store)
+
+    calibration = None
+    if args.calibration:
+        calibration = CalibrationHistogram.load(args.calibration)
+        calibration_ledger = CountLedger.beside(args.calibration)
+        results = track_calibration(results, cases, calibration, calibration_ledger)
+
+    cohort_stats = None
+    if args.cohort_stats:
+        cohort_stats = CohortStats.load(args.cohort_stats)
+        cohort_ledger = CountLedger.beside(args.cohort_stats)
+        results = track_cohort(results, cases, cohort_stats, cohort_ledger)
+
+    n = write_results(results, args.output, partition_by=args.partition_by, row_group_size=args.row_group_size)
+    print(f"Processed {n} patients → {args.output}")
+
+    if args.trace:
+        PROFILER.dump_chrome_trace(args.trace)
+        print_stage_summary(PROFILER.summary())
+
+    if calibration is not None:
+        calibration.save(args.calibration)
+        calibration_ledger.commit()
+        calibration_ledger.close()
+        print_calibration(calibration)
+
+    if cohort_stats is not None:
+        cohort_stats.save(args.cohort_stats)
+        cohort_ledger.commit()
+        cohort_ledger.close()
+        print(f"Cohort statistics: {len(cohort_stats):,} patients → {args.cohort_stats}")
+
+    if store is not None:
+        print(f"Results store: {len(store)} patients → {args.store}")
+        store.close()
+
+    if review_queue is not None:
+        stats = review_queue.stats()
+        review_queue.close()
+        print(f"Review queue: {stats['pending']} pending ({stats['audit']} audit), {stats['claimed']} claimed, {stats['done']} done")
+
+    if cache is not None:
+        stats = cache.stats()
+        cache.close()
+        print(
+            f"Cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%}), "
+            f"{stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} MB, {stats['evictions']} evicted"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Throughput and latency benchmarks on seeded synthetic cohorts.
+
+For each cohort size the same synthetic cases (``synthetic.synthetic_cases``) are pushed through:
+  - ``validate_data``: format, registry and cosine checks, one call per patient
+  - ``hitl_correction``: one call per patient, on the validation results above
+  - ``predict``: ``predict_poor_outcome``, one call per patient
+  - ``predict_batch``: ``predict_records`` over blocks of ``PREDICT_BLOCK`` patients, as batch mode does
+
+Every call is timed individually. Results are written as JSON with throughput, mean and
+p50/p95/p99 latency per stage, plus the commit, interpreter and NumPy version, so runs from
+different commits can be compared with ``--compare``:
+
+    python -m stroke_pipeline.benchmark -o bench.json
+    python -m stroke_pipeline.benchmark -o new.json --compare bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from .batch import PREDICT_BLOCK
+from .prediction import default_model, predict_poor_outcome
+from .profiling import PROFILER
+from .registry import default_rules
+from .similarity import default_reference
+from .synthetic import synthetic_cases
+from .validation import hitl_correction, validate_data
+
+SIZES = [1_000, 10_000, 100_000]
+BENCH_SEED = 0
+
+# Throughput drop (fraction) that --compare reports as a regression
+TOLERANCE = 0.10
+
+
+def _stats(n, timings_ns):
+    ms = np.asarray(timings_ns, dtype=float) / 1e6
+    total = ms.sum() / 1e3
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "n": n,
+        "total_s": round(total, 4),
+        "throughput_per_s": round(n / total, 1) if total else None,
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+    }
+
+
+def bench_size(n, seed=BENCH_SEED):
+    """Benchmark every stage on ``n`` synthetic patients; returns ``{stage: stats}``."""
+    cases = synthetic_cases(n, seed)
+    model = default_model()
+    clock = time.perf_counter_ns
+
+    timings = np.empty(n, dtype=np.int64)
+    validations = []
+    for i, case in enumerate(cases):
+        start = clock()
+        validation = validate_data(case["patient_id"], case["extraction"],
+                                   case["neurology_note"], case["radiology_report"])
+        timings[i] = clock() - start
+        validations.append(validation)
+    stages = {"validate_data": _stats(n, timings)}
+
+    corrected = []
+    for i, (case, validation) in enumerate(zip(cases, validations)):
+        start = clock()
+        record, _, _ = hitl_correction(case["patient_id"], case["extraction"], validation)
+        timings[i] = clock() - start
+        corrected.append(record)
+    stages["hitl_correction"] = _stats(n, timings)
+
+    probs = np.empty(n)
+    for i, record in enumerate(corrected):
+        start = clock()
+        probs[i] = predict_poor_outcome(record, model)
+        timings[i] = clock() - start
+    stages["predict"] = _stats(n, timings)
+
+    blocks = []
+    for lo in range(0, n, PREDICT_BLOCK):
+        start = clock()
+        model.predict_records(corrected[lo:lo + PREDICT_BLOCK])
+        blocks.append(clock() - start)
+    stages["predict_batch"] = {**_stats(n, blocks), "block": PREDICT_BLOCK}
+
+    # Output summaries, so a change in behaviour shows up next to a change in speed
+    stages["checks"] = {
+        "needs_review_rate": round(sum("🔎" in v["HITL"] for v in validations) / n, 4),
+        "mean_probability": round(float(probs.mean()), 4),
+        "observed_poor_outcome_rate": round(sum(c["outcome"] for c in cases) / n, 4),
+    }
+    return stages
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmarks(sizes=SIZES, seed=BENCH_SEED):
+    # Per-call timings here; the stage profiler would only add overhead to every call
+    enabled, PROFILER.enabled = PROFILER.enabled, False
+    try:
+        start = time.perf_counter()
+        default_rules()
+        default_reference()
+        default_model()
+        setup_s = time.perf_counter() - start
+
+        results = {}
+        for n in sizes:
+            results[str(n)] = bench_size(n, seed)
+            print(f"{n:>8} patients: " + ", ".join(
+                f"{stage} {s['throughput_per_s']:,.0f}/s"
+                for stage, s in results[str(n)].items() if "throughput_per_s" in s
+            ), file=sys.stderr)
+    finally:
+        PROFILER.enabled = enabled
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "setup_s": round(setup_s, 4),
+        },
+        "sizes": results,
+    }
+
+
+def compare(baseline, current, tolerance=TOLERANCE):
+    """Print throughput/latency changes vs ``baseline`` to stderr (stdout may carry the JSON report);
+    returns the regressed ``(size, stage)`` pairs."""
+    regressions = []
+    print(f"{'size':>8}  {'stage':<16}{'base /s':>12}{'now /s':>12}{'change':>9}{'p95 ms':>10}", file=sys.stderr)
+    for size, stages in current["sizes"].items():
+        for stage, now in stages.items():
+            base = baseline.get("sizes", {}).get(size, {}).get(stage)
+            if not base or "throughput_per_s" not in now:
+                continue
+            change = now["throughput_per_s"] / base["throughput_per_s"] - 1
+            mark = ""
+            if change < -tolerance:
+                regressions.append((size, stage))
+                mark = "  ← regression"
+            print(f"{size:>8}  {stage:<16}{base['throughput_per_s']:>12,.0f}{now['throughput_per_s']:>12,.0f}"
+                  f"{change:>+9.1%}{now['p95_ms']:>10.3f}{mark}", file=sys.stderr)
+    return regressions
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic cohorts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Cohort sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=BENCH_SEED)
+    parser.add_argument("-o", "--output", default=None, help="Write results as JSON (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Throughput drop reported as a regression (fraction)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Persistent, content-addressed cache of per-patient pipeline results.
+
+Entries are keyed by a SHA-256 of the whitespace-normalised neurology note and radiology report
+plus the pipeline version. The version covers the extraction prompt, the rule set, the cosine
+reference set (a content hash) and threshold, and the fitted outcome model, so a byte-identical
+note ingested again tomorrow skips extraction and every validation tier. Any pre-supplied
+extraction or reviewer edits are hashed in as well.
+
+Storage is a single SQLite file. Eviction is least-recently-used, bounded by entry count
+and/or total payload bytes.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+import unicodedata
+
+from .extraction import PROMPT_VERSION
+from .prediction import default_model
+from .registry import default_rules
+from .similarity import SIMILARITY_THRESHOLD, default_reference
+
+RESULT_FORMAT = "1"
+
+# Writes are committed in groups rather than one fsync per patient
+COMMIT_EVERY = 256
+
+
+def pipeline_version(rules=None, model=None, reference=None, threshold=SIMILARITY_THRESHOLD):
+    rules = rules or default_rules()
+    model = model or default_model()
+    reference = reference or default_reference()
+    return (f"{RESULT_FORMAT}:{PROMPT_VERSION}:rules-{rules.version}:{model.version}"
+            f":reference-{reference.version}:cosine-{threshold!r}")
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_key(note, report, version=None, extra=None):
+    h = hashlib.sha256()
+    for part in (normalize_text(note), normalize_text(report), version or pipeline_version()):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    if extra:
+        h.update(json.dumps(extra, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def case_key(case, version=None):
+    """Cache key for a batch case dict (see ``batch.load_cohort``)."""
+    extra = {k: case[k] for k in ("extraction", "reviewer_edits") if case.get(k)}
+    return content_key(case["neurology_note"], case["radiology_report"], version, extra)
+
+
+class ResultCache:
+
+    def __init__(self, path, max_entries=None, max_bytes=None):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._uncommitted = 0
+
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_access)")
+        self._db.commit()
+
+        # Running totals so eviction checks don't rescan the table on every put
+        self._entries, self._bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()
+
+    def __len__(self):
+        return self._entries
+
+    def __contains__(self, key):
+        return self._db.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def flush(self):
+        self._db.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def _touch(self):
+        self._uncommitted += 1
+        if self._uncommitted >= COMMIT_EVERY:
+            self.flush()
+
+    def get(self, key):
+        row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._touch()
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+
+        old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        if old is not None:
+            self._entries -= 1
+            self._bytes -= old[0]
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, payload, size, time.time()),
+        )
+        self._entries += 1
+        self._bytes += size
+        self._evict()
+        self._touch()
+
+    def _evict(self):
+        while ((self.max_entries is not None and self._entries > self.max_entries)
+               or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            key, size = self._db.execute(
+                "SELECT key, size FROM results ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._entries -= 1
+            self._bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "evictions": self.evictions,
+        }
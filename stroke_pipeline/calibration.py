@@ -0,0 +1,232 @@
+"""Calibration of outcome predictions, maintained incrementally as 3-month outcomes arrive.
+
+``CalibrationHistogram`` keeps four sums per fixed risk decile (0-10%, 10-20%, ...):
+  - patients
+  - summed predicted probability (expected poor outcomes)
+  - observed poor outcomes
+  - summed squared error, for the Brier score
+
+``update`` adds a batch of (probability, outcome) pairs with one ``bincount`` per sum. The
+calibration curve, Brier score and Hosmer-Lemeshow statistic are then read off the bins in
+O(bins), with no pass over the cohort. Histograms add element-wise, so partial histograms from batch
+blocks, streaming workers or separate runs ``merge`` into the cohort-wide one; ``to_dict`` /
+``from_dict`` carry them between processes and runs.
+
+Hosmer-Lemeshow groups by fixed risk cut points rather than by deciles of the cohort's own risk
+distribution (the H-hat rather than C-hat form), because fixed groups are what keeps the
+histograms mergeable.
+
+A histogram holds sums only. Which patients a saved histogram already counts is kept beside it in
+a ``ledger.CountLedger``, so re-running a batch or re-reading a results file adds nothing twice.
+
+    python -m stroke_pipeline.calibration results.jsonl --labels outcomes.jsonl --state calibration.json
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from .ledger import CountLedger, ledger_path, load_json, save_json
+from .metrics import labelled_predictions
+
+BINS = 10
+
+# Ledger kind for the patients a histogram counts
+CALIBRATION_KIND = "calibration"
+
+# Outcome keys accepted on a case or result: poor outcome as 0/1, or the raw 3-month mRS (0-6)
+OUTCOME_KEY = "outcome"
+MRS_KEY = "mRS_3_Month"
+POOR_MRS = 3
+
+
+def poor_outcome(row):
+    """1 for mRS 3-6, 0 for mRS 0-2, None when the 3-month outcome is not known yet."""
+    if row.get(OUTCOME_KEY) not in (None, ""):
+        return int(float(row[OUTCOME_KEY]))
+    if row.get(MRS_KEY) not in (None, ""):
+        return int(float(row[MRS_KEY]) >= POOR_MRS)
+    return None
+
+
+def chi2_sf(x, df):
+    """Upper tail of the chi-squared distribution for integer ``df`` (closed form, no SciPy)."""
+    if x <= 0:
+        return 1.0
+    half = x / 2
+    if df % 2 == 0:
+        term, total = 1.0, 1.0
+        for i in range(1, df // 2):
+            term *= half / i
+            total += term
+        return min(1.0, math.exp(-half) * total)
+    total = math.erfc(math.sqrt(half))
+    term = math.sqrt(half) * math.exp(-half) / math.gamma(1.5)
+    for i in range(1, (df + 1) // 2):
+        total += term
+        term *= half / (i + 0.5)
+    return min(1.0, total)
+
+
+class CalibrationHistogram:
+
+    def __init__(self, bins=BINS):
+        self.bins = bins
+        self.count = np.zeros(bins)
+        self.expected = np.zeros(bins)
+        self.observed = np.zeros(bins)
+        self.squared_error = np.zeros(bins)
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    def update(self, probabilities, outcomes):
+        """Add paired predicted probabilities and 0/1 outcomes; returns self."""
+        p = np.asarray(probabilities, dtype=float).ravel()
+        y = np.asarray(outcomes, dtype=float).ravel()
+        if p.shape != y.shape:
+            raise ValueError(f"{len(p)} probabilities but {len(y)} outcomes")
+        if p.size and (p.min() < 0 or p.max() > 1):
+            raise ValueError("Probabilities must lie in [0, 1]")
+        b = np.minimum((p * self.bins).astype(int), self.bins - 1)
+        self.count += np.bincount(b, minlength=self.bins)
+        self.expected += np.bincount(b, p, self.bins)
+        self.observed += np.bincount(b, y, self.bins)
+        self.squared_error += np.bincount(b, (p - y) ** 2, self.bins)
+        return self
+
+    def add(self, probability, outcome):
+        return self.update([probability], [outcome])
+
+    def merge(self, other):
+        """Add another histogram's counts (same bins) into this one; returns self."""
+        if other.bins != self.bins:
+            raise ValueError(f"Cannot merge a {other.bins}-bin histogram into a {self.bins}-bin one")
+        self.count += other.count
+        self.expected += other.expected
+        self.observed += other.observed
+        self.squared_error += other.squared_error
+        return self
+
+    def __add__(self, other):
+        return CalibrationHistogram(self.bins).merge(self).merge(other)
+
+    def brier(self):
+        n = self.count.sum()
+        return float(self.squared_error.sum() / n) if n else None
+
+    def curve(self):
+        """Non-empty bins as ``{"bin", "count", "mean_predicted", "observed_rate"}`` rows, lowest risk first."""
+        rows = []
+        for i in np.flatnonzero(self.count):
+            n = self.count[i]
+            rows.append({
+                "bin": f"{i / self.bins:.0%}-{(i + 1) / self.bins:.0%}",
+                "count": int(n),
+                "mean_predicted": float(self.expected[i] / n),
+                "observed_rate": float(self.observed[i] / n),
+            })
+        return rows
+
+    def hosmer_lemeshow(self):
+        """``{"statistic", "df", "p_value", "groups"}`` over the non-empty risk groups (df = groups - 2)."""
+        n, e, o = self.count, self.expected, self.observed
+        mean = np.divide(e, n, out=np.zeros_like(e), where=n > 0)
+        variance = e * (1 - mean)
+        used = variance > 0
+        statistic = float(np.sum((o[used] - e[used]) ** 2 / variance[used]))
+        groups = int(used.sum())
+        df = groups - 2
+        return {
+            "statistic": statistic,
+            "df": df,
+            "p_value": chi2_sf(statistic, df) if df > 0 else None,
+            "groups": groups,
+        }
+
+    def summary(self):
+        return {"n": len(self), "brier": self.brier(), "hosmer_lemeshow": self.hosmer_lemeshow(), "curve": self.curve()}
+
+    def to_dict(self):
+        return {
+            "bins": self.bins,
+            "count": self.count.tolist(),
+            "expected": self.expected.tolist(),
+            "observed": self.observed.tolist(),
+            "squared_error": self.squared_error.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["bins"])
+        for name in ("count", "expected", "observed", "squared_error"):
+            setattr(hist, name, np.asarray(data[name], dtype=float))
+        return hist
+
+    def save(self, path):
+        save_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path, bins=BINS):
+        """The histogram saved at ``path``, or an empty one if there is none yet."""
+        data = load_json(path)
+        return cls(bins) if data is None else cls.from_dict(data)
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def print_summary(hist):
+    summary = hist.summary()
+    if not summary["n"]:
+        print("No labelled predictions yet")
+        return
+    print(f"{'risk':<10}{'n':>8}{'predicted':>11}{'observed':>10}")
+    for row in summary["curve"]:
+        print(f"{row['bin']:<10}{row['count']:>8}{row['mean_predicted']:>11.3f}{row['observed_rate']:>10.3f}")
+    hl = summary["hosmer_lemeshow"]
+    p_value = f"{hl['p_value']:.3f}" if hl["p_value"] is not None else "n/a"
+    print(f"{summary['n']:,} patients; Brier {summary['brier']:.4f}; "
+          f"Hosmer-Lemeshow chi2 {hl['statistic']:.2f} (df {hl['df']}), p = {p_value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibration, Brier score and Hosmer-Lemeshow for predictions.")
+    parser.add_argument("results", nargs="?", help="Batch/streaming output (.jsonl or .csv) with predicted probabilities")
+    parser.add_argument("--labels", default=None, help="Outcome file (.jsonl or .csv) with patient_id and outcome; "
+                                                        "only the patients in it are added")
+    parser.add_argument("--outcome-column", default=OUTCOME_KEY)
+    parser.add_argument("--state", default=None, help="Histogram JSON to update in place (created if missing); "
+                                                       "patients it already counts are skipped")
+    parser.add_argument("--merge", nargs="+", default=[], help="Histogram JSON files (e.g. from workers) to merge in")
+    parser.add_argument("--bins", type=int, default=BINS)
+    args = parser.parse_args(argv)
+
+    hist = CalibrationHistogram.load(args.state, args.bins) if args.state else CalibrationHistogram(args.bins)
+    ledger = CountLedger.beside(args.state) if args.state else None
+    for path in args.merge:
+        try:
+            if ledger is not None and ledger_path(path).exists():
+                with CountLedger.beside(path) as other:
+                    ledger.merge(other)
+            hist.merge(CalibrationHistogram.load(path))
+        except ValueError as exc:
+            parser.error(f"{path}: {exc}")
+    if args.results:
+        y, probs, ids = labelled_predictions(args.results, args.labels, args.outcome_column, with_ids=True)
+        if ledger is not None:
+            new = np.array(ledger.claim_many(CALIBRATION_KIND, ids), dtype=bool)
+            y, probs = y[new], probs[new]
+        hist.update(probs, y)
+        print(f"Added {len(y):,} labelled predictions ({len(ids) - len(y):,} patients already counted)")
+    if args.state:
+        hist.save(args.state)
+        ledger.commit()
+        ledger.close()
+    print_summary(hist)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Example cases shipped with the demo: source documents, ASPECTS images and mock extractions."""
+
+# =====================================================================
+# 0) Neurology Notes - CORRECTED TO MATCH EXTRACTION
+# =====================================================================
+
+neurology_notes = {
+    "Example Case 1":
+    """
+A 68-year-old male with a history of poorly controlled hypertension and diabetes mellitus, but without atrial fibrillation, prior stroke, dyslipidemia, cardiovascular disease, malignancy, or ESRD, presented with sudden right-sided arm and leg weakness accompanied by slurred speech. The symptoms began at approximately 21:40 on August 25, 2018 (LKW 21:30) while he was at home, and the deficits persisted, requiring assistance for ambulation. He has a social history notable for smoking half a pack per day for 10 years and consuming approximately two alcoholic drinks daily for 15 years.
+On arrival, his vital signs were BP 178/92, HR 84, RR 18, and temperature 36.8°C. Neurologic exam showed mild dysarthria, right facial droop, 3/5 strength in the right upper and lower extremities, intact strength on the left, decreased light touch sensation on the right side, and no cerebellar ataxia. His initial NIHSS score was 9. There were no signs of seizure, head trauma, or altered mental status.
+Given the clear onset time and absence of contraindications, IV tPA was administered at 22:35 at a dose of 0.9 mg/kg. No mechanical thrombectomy or other intra-arterial procedures were performed.
+""",
+
+    "Example Case 2":
+    """
+A 72-year-old female with a medical history of hypertension and diabetes mellitus, and without atrial fibrillation, dyslipidemia, cardiovascular disease, prior stroke, ESRD, or malignancy, presented with expressive aphasia and a sensation of heaviness in the left upper extremity. The symptoms began on September 3, 2018 at approximately 19:10. She denied smoking but reported occasional alcohol use.
+Her symptoms initially fluctuated but eventually persisted. On examination in the emergency department, her vital signs were BP 162/88, HR 76, RR 18, and temperature 37.0°C. Neurologic exam revealed mild aphasia, 4+/5 strength in the left upper extremity, 4/5 in the left lower extremity, intact sensation, and no cranial nerve or cerebellar abnormalities. Her initial NIHSS was calculated as 5.
+No IV tPA or intra-arterial intervention was performed due to clinical judgment and imaging findings. There was no loss of consciousness, seizure activity, or head trauma reported.
+"""
+,
+
+    "Example Case 3":
+    """
+A 63-year-old male with hypertension, diabetes mellitus, a remote history of treated pulmonary tuberculosis, and chronic hepatitis B, but without atrial fibrillation, dyslipidemia, ESRD, malignancy, cardiovascular disease, or previous stroke, presented after experiencing dizziness, chills, and transient bilateral leg weakness while playing billiards. The onset occurred at around 23:30 on August 24, 2018. His social history includes smoking half a pack per day for approximately 10 years and drinking one to two alcoholic beverages daily for about 20 years.
+Upon evaluation, his vital signs were notable for significantly elevated blood pressure at 211/90, with HR 73, RR 20, and temperature 36.7°C. Neurologic assessment demonstrated full strength (5/5) in both upper extremities and slightly reduced strength (4+/5) in both lower extremities, without cranial nerve deficits, cerebellar signs, or sensory impairment. His initial NIHSS score was 0.
+He did not receive IV tPA or undergo any intra-arterial intervention, given the absence of focal deficits consistent with acute large-vessel ischemia and imaging findings.
+"""
+
+}
+
+# =====================================================================
+# Radiology Reports
+# =====================================================================
+
+radiology_reports = {
+    "Example Case 1":
+    """
+MRI BRAIN WITH AND WITHOUT CONTRAST
+Technique:
+Multiplanar, multisequence MRI of the brain including T1, T2, FLAIR, DWI/ADC, GRE/SWI, and post-contrast imaging. TOF MRA of the intracranial circulation was obtained.
+Findings:
+DWI shows restricted diffusion involving the left insula, left frontal operculum, and anterior parietal cortex, consistent with an acute infarction in the left MCA territory.
+ADC maps confirm low signal corresponding to areas of restricted diffusion.
+FLAIR demonstrates mild cortical swelling and subtle hyperintensity in the same regions, compatible with early ischemic change.
+No intracranial hemorrhage is noted on GRE/SWI.
+Major intracranial arteries: TOF MRA reveals decreased flow-related signal in the proximal left M2/M3 branches, without complete occlusion.
+No mass effect significant enough to shift midline; ventricles remain symmetric.
+Basal ganglia, thalami, brainstem, and cerebellum are preserved.
+No abnormal meningeal or parenchymal enhancement following contrast.
+Conclusion:
+Findings consistent with acute ischemic infarction in the left MCA territory, with corresponding cortical restricted diffusion and early FLAIR changes. No hemorrhagic transformation.
+""",
+
+    "Example Case 2":
+    """
+MRI BRAIN WITHOUT CONTRAST
+Technique:
+Multiplanar, multisequence MRI including T1, T2, FLAIR, DWI/ADC, and SWI. TOF intracranial MRA performed.
+Findings:
+DWI shows punctate to patchy areas of mildly increased signal in the left basal ganglia and parietal opercular regions, suspicious for early acute ischemia.
+ADC demonstrates subtle low-signal correlation but less pronounced than in established infarction.
+FLAIR shows faint cortical/subcortical hyperintensity without significant swelling.
+No hemorrhage on SWI.
+Intracranial vasculature: TOF MRA shows mild irregularity of the left M2 segment, without definite large-vessel occlusion.
+Ventricles, midline structures, posterior fossa appear normal.
+No mass lesion or abnormal enhancement.
+Conclusion:
+MRI findings suggest early left MCA territory ischemia, with mild cortical diffusion restriction but no hemorrhage or large-vessel occlusion.
+""",
+
+    "Example Case 3":
+    """
+MRI BRAIN WITH AND WITHOUT CONTRAST
+Technique:
+Multiplanar T1, T2, FLAIR, DWI/ADC, GRE/SWI, and post-contrast sequences. 3D TOF MRA obtained.
+Findings:
+Parenchyma: No diffusion restriction. No areas of abnormal T2/FLAIR hyperintensity. Gray–white differentiation preserved.
+No hemorrhage on GRE/SWI.
+No mass lesion, midline shift, or extra-axial collection.
+Ventricular system normal in size and configuration.
+Posterior fossa (brainstem and cerebellum) unremarkable.
+Intracranial circulation: TOF MRA demonstrates normal flow-related signal in bilateral ICA, MCA, ACA, PCA territories. No stenosis or occlusion.
+Enhancement: No abnormal parenchymal or leptomeningeal enhancement.
+Paranasal sinuses/orbits normal.
+Conclusion:
+Normal MRI brain. No acute infarction or structural abnormality detected.
+"""
+}
+
+aspect_images = {
+    "Example Case 1": "images/aspects1.png",
+    "Example Case 2": "images/aspects2.png",
+    "Example Case 3": "images/aspects3.png"
+}
+
+# ===============================================================
+# Extraction Results - CORRECTED TO MATCH NOTES
+# ===============================================================
+
+extraction_results = {
+    "Example Case 1": {
+        "Age": 68,
+        "Sex": "male",
+
+        "Hypertension": "yes",
+        "Diabetes": "yes",
+        "Dyslipidemia": "no",
+        "Cardiovascular_Disease": "no",
+        "Atrial_Fibrillation": "no",
+        "Old_CVA": "no",
+        "Malignancy": "no",
+        "ESRD": "no",
+
+        "MRI_Acute_Infarct": "yes",
+        "MRI_No_Lesion": "no",
+        "MRI_Other_Lesion": "no",
+
+        "NIHSS": 9,
+        "ASPECTS": 7,
+
+        "tPA_Administered": "no",  # Intentional error for demo
+        "IA_Thrombectomy": "no",
+
+        "Weakness_Side": "bilateral",  # Intentional error for demo
+        "SBP": 178
+    },
+
+    "Example Case 2": {
+        "Age": 72,
+        "Sex": "female",
+
+        "Hypertension": "no",  # Intentional error for demo
+        "Diabetes": "yes",
+        "Dyslipidemia": "no",
+        "Cardiovascular_Disease": "no",
+        "Atrial_Fibrillation": "no",
+        "Old_CVA": "no",
+        "Malignancy": "no",
+        "ESRD": "no",
+
+        "MRI_Acute_Infarct": "yes",
+        "MRI_No_Lesion": "no",
+        "MRI_Other_Lesion": "no",
+
+        "NIHSS": 5,
+        "ASPECTS": 9,  # Intentional error for demo
+
+        "tPA_Administered": "no",
+        "IA_Thrombectomy": "no",
+
+        "Weakness_Side": "left",
+        "SBP": 162
+    },
+
+    "Example Case 3": {
+        "Age": 63,
+        "Sex": "male",
+
+        "Hypertension": "yes",
+        "Diabetes": "yes",
+        "Dyslipidemia": "no",
+        "Cardiovascular_Disease": "no",
+        "Atrial_Fibrillation": "no",
+        "Old_CVA": "no",
+        "Malignancy": "no",
+        "ESRD": "no",
+
+        "MRI_Acute_Infarct": "no",
+        "MRI_No_Lesion": "yes",
+        "MRI_Other_Lesion": "no",
+
+        "NIHSS": 0,
+        "ASPECTS": 10,
+
+        "tPA_Administered": "no",
+        "IA_Thrombectomy": "no",
+
+        "Weakness_Side": "bilateral",
+        "SBP": 211
+    }
+}
+
+# ===============================================================
+# Reviewer Edits - ASPECTS re-read from the CT image during HITL review
+# ===============================================================
+
+reviewer_edits = {
+    "Example Case 1": {"ASPECTS": 5},
+    "Example Case 2": {"ASPECTS": 6},
+}
@@ -0,0 +1,340 @@
+"""Table 1 cohort statistics kept as one-pass, mergeable aggregates.
+
+``CohortStats.update(record, outcome)`` folds in one processed patient in O(1):
+  - ``RunningMoments``: Welford mean/SD (age, SBP)
+  - ``IntegerHistogram``: exact counts per score value, for NIHSS and ASPECTS medians, IQRs and
+    the NIHSS distribution
+  - ``Counter`` per categorical field (sex, history, imaging, treatment)
+  - outcome counts for the patients whose 3-month mRS is known
+
+Both scores are small bounded integers, so a count per possible value serves as the quantile
+sketch. It is exact, its size is fixed (43 and 11 counters), and it adds element-wise. Every
+aggregate merges, so a day's patients are summarised on their own and added to the saved totals;
+``table1()`` reads the aggregates and never scans records.
+
+The aggregates are sums only. ``count_patient`` checks a patient against the ``ledger.CountLedger``
+kept beside the saved file, so a patient seen again (a nightly re-ingestion, a cache hit) is
+skipped, except that an outcome arriving after the first visit is still added once.
+
+    python -m stroke_pipeline.batch today.jsonl -o today_results.jsonl --cohort-stats cohort_stats.json
+    python -m stroke_pipeline.cohort cohort_stats.json
+"""
+
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from .ledger import CountLedger, ledger_path, load_json, save_json
+from .schema import BINARY_FIELDS, RANGE_RULES
+
+CATEGORICAL_FIELDS = ["Sex", "Weakness_Side"] + BINARY_FIELDS
+MOMENT_FIELDS = ["Age", "SBP"]
+SCORE_RANGES = {field: (low, high) for field, low, high, _ in RANGE_RULES if field in ("NIHSS", "ASPECTS")}
+
+# Ledger kinds: patients whose record is counted, and those whose outcome is
+COHORT_KIND = "cohort"
+OUTCOME_KIND = "outcome"
+
+NIHSS_BUCKETS = [(0, 0), (1, 4), (5, 15), (16, 20), (21, 42)]
+
+# Table 1 row -> (categorical field, value counted)
+DEMOGRAPHIC_RATES = {
+    "Male sex": ("Sex", "male"),
+    "Hypertension": ("Hypertension", "yes"),
+    "Diabetes mellitus": ("Diabetes", "yes"),
+    "Atrial fibrillation": ("Atrial_Fibrillation", "yes"),
+}
+CLINICAL_RATES = {
+    "MRI infarction": ("MRI_Acute_Infarct", "yes"),
+    "IV t-PA": ("tPA_Administered", "yes"),
+    "IA intervention": ("IA_Thrombectomy", "yes"),
+}
+
+
+def _number(value):
+    """Documented numeric value, or None for missing / "not documented" (-1) / unparseable."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value >= 0 and np.isfinite(value) else None
+
+
+class RunningMoments:
+    """Welford mean and variance; ``merge`` uses Chan et al.'s pairwise update."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other):
+        if other.n:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+        return self
+
+    @property
+    def sd(self):
+        """Sample standard deviation (n - 1), as Table 1 reports it."""
+        return (self.m2 / (self.n - 1)) ** 0.5 if self.n > 1 else None
+
+    def to_dict(self):
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        moments = cls()
+        moments.n, moments.mean, moments.m2 = int(data["n"]), float(data["mean"]), float(data["m2"])
+        return moments
+
+
+class IntegerHistogram:
+    """Exact quantile sketch for an integer score in [low, high]: one counter per value."""
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+        self.counts = np.zeros(high - low + 1, dtype=np.int64)
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def add(self, value):
+        """Count ``value``; returns False (and counts nothing) when it lies outside the range."""
+        if not self.low <= value <= self.high:
+            return False
+        self.counts[int(value) - self.low] += 1
+        return True
+
+    def merge(self, other):
+        self.counts += other.counts
+        return self
+
+    def quantile(self, q):
+        """Same as ``np.quantile`` (linear interpolation) over the counted values."""
+        n = self.n
+        if not n:
+            return None
+        cumulative = np.cumsum(self.counts)
+        position = (n - 1) * q
+        below = int(np.floor(position))
+        lo = np.searchsorted(cumulative, below, side="right")
+        hi = np.searchsorted(cumulative, min(below + 1, n - 1), side="right")
+        return float(self.low + lo + (hi - lo) * (position - below))
+
+    def fraction_between(self, low, high):
+        n = self.n
+        return float(self.counts[low - self.low:high - self.low + 1].sum() / n) if n else None
+
+    def to_dict(self):
+        return {"low": self.low, "high": self.high, "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls(data["low"], data["high"])
+        hist.counts = np.asarray(data["counts"], dtype=np.int64)
+        return hist
+
+
+class CohortStats:
+
+    def __init__(self):
+        self.n = 0
+        self.moments = {field: RunningMoments() for field in MOMENT_FIELDS}
+        self.scores = {field: IntegerHistogram(low, high) for field, (low, high) in SCORE_RANGES.items()}
+        self.categories = {field: Counter() for field in CATEGORICAL_FIELDS}
+        self.outcomes = Counter()
+
+    def __len__(self):
+        return self.n
+
+    def update(self, record, outcome=None):
+        """Fold in one processed (corrected) record and, when known, its poor-outcome label (1 = mRS 3-6)."""
+        self.add_record(record)
+        if outcome is not None:
+            self.add_outcome(outcome)
+        return self
+
+    def add_outcome(self, outcome):
+        self.outcomes["poor" if outcome else "good"] += 1
+        return self
+
+    def add_record(self, record):
+        self.n += 1
+        for field, moments in self.moments.items():
+            value = _number(record.get(field))
+            if value is not None:
+                moments.add(value)
+        for field, hist in self.scores.items():
+            value = _number(record.get(field))
+            if value is not None:
+                hist.add(value)
+        for field, counter in self.categories.items():
+            counter[str(record.get(field, "unknown"))] += 1
+        return self
+
+    def update_many(self, records, outcomes=None):
+        outcomes = outcomes if outcomes is not None else [None] * len(records)
+        for record, outcome in zip(records, outcomes):
+            self.update(record, outcome)
+        return self
+
+    def merge(self, other):
+        """Add another set of aggregates (e.g. one day's patients or one worker's share) into this one."""
+        self.n += other.n
+        for field, moments in self.moments.items():
+            moments.merge(other.moments[field])
+        for field, hist in self.scores.items():
+            hist.merge(other.scores[field])
+        for field, counter in self.categories.items():
+            counter.update(other.categories[field])
+        self.outcomes.update(other.outcomes)
+        return self
+
+    def __add__(self, other):
+        return CohortStats().merge(self).merge(other)
+
+    # ---- Table 1 ----
+
+    def rate(self, field, value):
+        return self.categories[field][value] / self.n if self.n else None
+
+    def _median_iqr(self, field):
+        hist = self.scores[field]
+        if not hist.n:
+            return "n/a"
+        median, q1, q3 = (hist.quantile(q) for q in (0.5, 0.25, 0.75))
+        return f"{median:g} ({q1:g}-{q3:g})"
+
+    def table1(self):
+        """``{"Demographics": [...], "Clinical Scores": [...], "Outcomes": [...]}`` of ``{"Variable", "Value"}`` rows."""
+        def pct(value):
+            return "n/a" if value is None else f"{value:.1%}"
+
+        age = self.moments["Age"]
+        demographics = [{"Variable": "Age (mean ± SD)",
+                         "Value": f"{age.mean:.2f} ± {age.sd:.2f}" if age.sd is not None else "n/a"}]
+        demographics += [{"Variable": name, "Value": pct(self.rate(*key))} for name, key in DEMOGRAPHIC_RATES.items()]
+
+        scores = [
+            {"Variable": "NIHSS (median, IQR)", "Value": self._median_iqr("NIHSS")},
+            {"Variable": "ASPECT (median, IQR)", "Value": self._median_iqr("ASPECTS")},
+        ]
+        scores += [{"Variable": name, "Value": pct(self.rate(*key))} for name, key in CLINICAL_RATES.items()]
+
+        followed = self.outcomes["poor"] + self.outcomes["good"]
+        outcomes = [
+            {"Variable": "Poor outcome (mRS 3-6)", "Value": pct(self.outcomes["poor"] / followed if followed else None)},
+            {"Variable": "Good outcome (mRS 0-2)", "Value": pct(self.outcomes["good"] / followed if followed else None)},
+            {"Variable": "Follow-up rate", "Value": pct(followed / self.n if self.n else None)},
+            {"Variable": "3-month assessment", "Value": f"{followed:,} patients"},
+        ]
+        return {"Demographics": demographics, "Clinical Scores": scores, "Outcomes": outcomes}
+
+    def nihss_distribution(self):
+        """``[{"NIHSS Range", "Percentage"}]`` over ``NIHSS_BUCKETS``."""
+        hist = self.scores["NIHSS"]
+        rows = []
+        for low, high in NIHSS_BUCKETS:
+            fraction = hist.fraction_between(low, high)
+            rows.append({
+                "NIHSS Range": str(low) if low == high else f"{low}-{high}",
+                "Percentage": round(100 * fraction, 1) if fraction is not None else 0.0,
+            })
+        return rows
+
+    # ---- persistence ----
+
+    def to_dict(self):
+        return {
+            "n": self.n,
+            "moments": {field: m.to_dict() for field, m in self.moments.items()},
+            "scores": {field: h.to_dict() for field, h in self.scores.items()},
+            "categories": {field: dict(c) for field, c in self.categories.items()},
+            "outcomes": dict(self.outcomes),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.n = int(data["n"])
+        for field, m in data["moments"].items():
+            stats.moments[field] = RunningMoments.from_dict(m)
+        for field, h in data["scores"].items():
+            stats.scores[field] = IntegerHistogram.from_dict(h)
+        for field, c in data["categories"].items():
+            stats.categories[field] = Counter(c)
+        stats.outcomes = Counter(data["outcomes"])
+        return stats
+
+    def save(self, path):
+        save_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        """The aggregates saved at ``path``, or empty ones if there are none yet."""
+        data = load_json(path)
+        return cls() if data is None else cls.from_dict(data)
+
+
+def count_patient(stats, record, outcome=None, patient_id=None, ledger=None):
+    """Add a patient to ``stats``: its record on the first visit the ``ledger`` sees, its outcome on
+    the first visit that has one. Without a ledger both are added every time."""
+    if ledger is None or ledger.claim(COHORT_KIND, patient_id):
+        stats.add_record(record)
+    if outcome is not None and (ledger is None or ledger.claim(OUTCOME_KIND, patient_id)):
+        stats.add_outcome(outcome)
+    return stats
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def print_table1(stats):
+    print(f"Table 1 (n={len(stats):,})")
+    for section, rows in stats.table1().items():
+        print(f"\n{section}")
+        for row in rows:
+            print(f"  {row['Variable']:<26}{row['Value']}")
+    print("\nNIHSS distribution")
+    for row in stats.nihss_distribution():
+        print(f"  {row['NIHSS Range']:<26}{row['Percentage']:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print (and merge) incremental Table 1 cohort statistics.")
+    parser.add_argument("state", help="Cohort statistics JSON written by batch/streaming --cohort-stats")
+    parser.add_argument("--merge", nargs="+", default=[], help="Further statistics files to add into STATE")
+    args = parser.parse_args(argv)
+
+    stats = CohortStats.load(args.state)
+    if args.merge:
+        with CountLedger.beside(args.state) as ledger:
+            for path in args.merge:
+                try:
+                    if ledger_path(path).exists():
+                        with CountLedger.beside(path) as other:
+                            ledger.merge(other)
+                except ValueError as exc:
+                    parser.error(f"{path}: {exc}")
+                stats.merge(CohortStats.load(path))
+            stats.save(args.state)
+            ledger.commit()
+    print_table1(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Columnar bulk output of batch results as Parquet or Arrow IPC (requires pyarrow).
+
+``ColumnarWriter`` holds at most ``row_group_size`` rows per partition before it flushes them as
+one row group. Memory stays flat however many patients stream through. Each row carries:
+  - the corrected record, one typed column per field
+  - the predicted probability, needs-review flag and cosine similarity
+  - the fired rules and the HITL change log, as nested list columns
+
+A path ending in ``.parquet`` / ``.arrow`` is written as a single file. Any other path is
+treated as a dataset directory, and every writer adds its own ``part-<run id>`` files, so
+successive runs append to the registry. With ``partition_by`` the files go into Hive-style
+sub-directories (``Needs_Review=true/``) that readers can prune. At most ``max_open_writers``
+partition files are open at once. Writing to another partition closes the least recently used
+one, and rows that reach a closed partition later go to a new ``part-<run id>-<n>`` file. A
+high-cardinality column therefore costs more files, not more file handles. ``read_column`` loads
+a single column without decoding the rest of the file.
+"""
+
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from .prediction import PROBABILITY_COLUMN
+from .schema import EXTRACTION_FIELDS, INTEGER_FIELDS
+
+ROW_GROUP_SIZE = 8192
+MAX_OPEN_WRITERS = 64
+
+FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("pyarrow is required for Parquet / Arrow output (pip install pyarrow)") from None
+    return pyarrow
+
+
+def result_schema():
+    pa = _pyarrow()
+    fields = [pa.field("patient_id", pa.string())]
+    fields += [pa.field(f, pa.int32() if f in INTEGER_FIELDS else pa.string()) for f in EXTRACTION_FIELDS]
+    fields += [
+        pa.field(PROBABILITY_COLUMN, pa.float64()),
+        pa.field("Needs_Review", pa.bool_()),
+        pa.field("Cosine_Similarity", pa.float64()),
+        pa.field("Flags", pa.list_(pa.struct([
+            ("rule", pa.string()), ("tier", pa.string()), ("field", pa.string()), ("severity", pa.string()),
+        ]))),
+        pa.field("Changes", pa.list_(pa.struct([
+            ("field", pa.string()), ("from", pa.string()), ("to", pa.string()),
+        ]))),
+    ]
+    return pa.schema(fields)
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def columnar_row(result):
+    validation = result["validation"]
+    corrected = result["corrected"]
+    row = {"patient_id": str(result["patient_id"])}
+    for f in EXTRACTION_FIELDS:
+        value = corrected.get(f)
+        row[f] = _int_or_none(value) if f in INTEGER_FIELDS else (None if value is None else str(value))
+    row.update({
+        PROBABILITY_COLUMN: result[PROBABILITY_COLUMN],
+        "Needs_Review": "❗" in str(validation),
+        "Cosine_Similarity": validation["CosineSimilarity"],
+        "Flags": [{k: flag[k] for k in ("rule", "tier", "field", "severity")} for flag in validation.get("Flags", [])],
+        "Changes": [
+            {"field": field, "from": str(change["from"]), "to": str(change["to"])}
+            for field, change in result["changes"].items()
+        ],
+    })
+    return row
+
+
+def _partition_dir(column, value):
+    value = str(value).lower() if isinstance(value, bool) else str(value)
+    return f"{column}={value.replace('/', '_')}"
+
+
+class ColumnarWriter:
+
+    def __init__(self, path, format=None, partition_by=None, row_group_size=ROW_GROUP_SIZE,
+                 max_open_writers=MAX_OPEN_WRITERS):
+        self.pa = _pyarrow()
+        self.path = Path(path)
+        self.format = format or FORMATS.get(self.path.suffix, "parquet")
+        if self.format not in ("parquet", "arrow"):
+            raise ValueError(f"Unknown columnar format {self.format!r}; expected 'parquet' or 'arrow'")
+        self.partition_by = partition_by
+        self.row_group_size = row_group_size
+        self.max_open_writers = max_open_writers
+        self.schema = result_schema()
+        if partition_by is not None and partition_by not in self.schema.names:
+            raise ValueError(f"Cannot partition by {partition_by!r}; not an output column")
+
+        self.run_id = uuid.uuid4().hex[:12]
+        self.rows_written = 0
+        self._buffers = {}
+        self._writers = OrderedDict()  # least recently written first
+        self._parts = {}  # partition key -> files opened so far
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _file_for(self, key):
+        if self.partition_by is None and self.path.suffix in FORMATS:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            return self.path
+        directory = self.path
+        if self.partition_by is not None:
+            directory = directory / _partition_dir(self.partition_by, key)
+        directory.mkdir(parents=True, exist_ok=True)
+        part = self._parts.get(key, 0)
+        stem = f"part-{self.run_id}-{part}" if part else f"part-{self.run_id}"
+        return directory / f"{stem}.{'parquet' if self.format == 'parquet' else 'arrow'}"
+
+    def _open(self, key):
+        while len(self._writers) >= self.max_open_writers:
+            _, writer = self._writers.popitem(last=False)
+            writer.close()
+        path = self._file_for(key)
+        self._parts[key] = self._parts.get(key, 0) + 1
+        if self.format == "parquet":
+            return self.pa.parquet.ParquetWriter(str(path), self.schema, compression="zstd")
+        return self.pa.ipc.new_file(str(path), self.schema)
+
+    def _flush(self, key):
+        rows = self._buffers.pop(key, None)
+        if not rows:
+            return
+        if key in self._writers:
+            self._writers.move_to_end(key)
+        else:
+            self._writers[key] = self._open(key)
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        if self.format == "parquet":
+            self._writers[key].write_table(table, row_group_size=self.row_group_size)
+        else:
+            self._writers[key].write_table(table)
+        self.rows_written += len(rows)
+
+    def write(self, result):
+        row = columnar_row(result)
+        key = row[self.partition_by] if self.partition_by else None
+        buffer = self._buffers.setdefault(key, [])
+        buffer.append(row)
+        if len(buffer) >= self.row_group_size:
+            self._flush(key)
+
+    def close(self):
+        for key in list(self._buffers):
+            self._flush(key)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+def write_columnar(results, path, partition_by=None, row_group_size=ROW_GROUP_SIZE, format=None,
+                   max_open_writers=MAX_OPEN_WRITERS):
+    """Stream ``results`` into Parquet / Arrow IPC; returns the number of patients written."""
+    with ColumnarWriter(path, format=format, partition_by=partition_by, row_group_size=row_group_size,
+                        max_open_writers=max_open_writers) as writer:
+        for result in results:
+            writer.write(result)
+    return writer.rows_written
+
+
+def read_column(path, column, format=None):
+    """Load one column (for every partition) without decoding the others."""
+    _pyarrow()
+    import pyarrow.dataset as ds
+
+    path = Path(path)
+    format = format or FORMATS.get(path.suffix) or _directory_format(path)
+    # Partition columns are also stored in every file, so directory names need no type inference
+    dataset = ds.dataset(str(path), format="parquet" if format == "parquet" else "ipc")
+    return dataset.to_table(columns=[column]).column(column)
+
+
+def _directory_format(path):
+    for f in path.rglob("*"):
+        if f.suffix in FORMATS:
+            return FORMATS[f.suffix]
+    raise ValueError(f"No Parquet or Arrow files under {path}")
@@ -0,0 +1,148 @@
+"""Single-pass evidence scanner for grounding extracted fields in the source text.
+
+All clinical keywords, negation cues and scope terminators are compiled into one regular
+expression whose alternation is factored into a character trie. Each alternative therefore
+shares its prefix with the others, and the pattern acts as one multi-pattern automaton. Each
+document is scanned once, left to right, with no lower-casing or concatenation copies.
+
+Negation follows a simplified NegEx: a cue ("without", "no", "did not", ...) negates the
+concepts that follow it until a terminator (full stop, semicolon, "but", "presented", ...) or
+until ``NEGATION_WINDOW`` characters pass with no further negated concept. Chaining keeps lists
+such as "without atrial fibrillation, prior stroke, ..., or ESRD" negated throughout.
+Pseudo-negations ("absence of contraindications") match and are then ignored.
+"""
+
+import re
+from dataclasses import dataclass
+
+NEGATION_WINDOW = 60
+
+# concept -> phrases; concepts are extraction fields or, for weakness, field values
+KEYWORDS = {
+    "Hypertension": ["hypertension", "htn", "high blood pressure"],
+    "Diabetes": ["diabetes", "diabetes mellitus", "dm"],
+    "Dyslipidemia": ["dyslipidemia", "hyperlipidemia", "hypercholesterolemia"],
+    "Cardiovascular_Disease": ["cardiovascular disease", "coronary artery disease", "myocardial infarction"],
+    "Atrial_Fibrillation": ["atrial fibrillation", "afib", "a-fib"],
+    "Old_CVA": ["prior stroke", "previous stroke", "old cva", "history of stroke"],
+    "Malignancy": ["malignancy", "cancer"],
+    "ESRD": ["esrd", "end-stage renal disease", "hemodialysis", "dialysis"],
+    "MRI_Acute_Infarct": ["acute infarct", "acute infarction", "acute ischemic infarction",
+                          "acute ischemia", "restricted diffusion", "diffusion restriction"],
+    "Large_Territory_Infarct": ["large territory", "large-territory", "large mca", "malignant mca",
+                                "entire mca territory", "extensive infarct", "extensive infarction",
+                                "hemispheric infarct", "hemispheric infarction"],
+    "tPA_Administered": ["tpa", "t-pa", "iv tpa", "alteplase", "thrombolysis"],
+    "IA_Thrombectomy": ["thrombectomy", "mechanical thrombectomy", "intra-arterial", "endovascular"],
+    "Weakness_Right": ["right-sided", "right upper", "right lower", "right arm", "right leg", "right hemiparesis"],
+    "Weakness_Left": ["left-sided", "left upper", "left lower", "left arm", "left leg", "left hemiparesis"],
+    "Weakness_Bilateral": ["bilateral leg weakness", "bilateral weakness", "both lower extremities"],
+}
+
+NEGATION_CUES = ["no", "not", "without", "denied", "denies", "did not", "negative for",
+                 "absence of", "free of", "ruled out"]
+
+PSEUDO_NEGATIONS = ["absence of contraindications", "no contraindications", "not only", "no change"]
+
+TERMINATORS = ["but", "however", "although", "presented", "which", "except"]
+
+
+@dataclass(frozen=True)
+class Hit:
+    concept: str
+    phrase: str
+    start: int
+    end: int
+    negated: bool
+    document: str = ""
+
+
+# =====================================================================
+# PATTERN COMPILER
+# =====================================================================
+
+def _trie_pattern(phrases):
+    """Prefix-factored alternation matching any of ``phrases``, longest first."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        alt = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{alt})?" if "" in node else alt
+
+    return build(trie)
+
+
+def _compile():
+    lookup = {}
+    for concept, phrases in KEYWORDS.items():
+        for p in phrases:
+            lookup[p] = ("keyword", concept)
+    for p in NEGATION_CUES:
+        lookup[p] = ("cue", None)
+    for p in PSEUDO_NEGATIONS:
+        lookup[p] = ("pseudo", None)
+    for p in TERMINATORS:
+        lookup[p] = ("terminator", None)
+
+    pattern = r"(?P<stop>[.;](?!\d)|\n)|\b(?P<phrase>" + _trie_pattern(lookup) + r")\b"
+    return re.compile(pattern, re.IGNORECASE), lookup
+
+
+_PATTERN, _LOOKUP = _compile()
+
+
+# =====================================================================
+# SCANNING
+# =====================================================================
+
+def scan(text, document=""):
+    """Return every keyword hit in ``text`` with character offsets and negation status."""
+    hits = []
+    scope_end = None  # end offset of the last cue / negated concept, None when no negation is open
+
+    for m in _PATTERN.finditer(text):
+        if m.group("stop") is not None:
+            scope_end = None
+            continue
+
+        phrase = " ".join(m.group("phrase").lower().split())
+        kind, concept = _LOOKUP[phrase]
+
+        if kind == "terminator":
+            scope_end = None
+        elif kind == "cue":
+            scope_end = m.end()
+        elif kind == "keyword":
+            negated = scope_end is not None and m.start() - scope_end <= NEGATION_WINDOW
+            scope_end = m.end() if negated else None
+            hits.append(Hit(concept, phrase, m.start(), m.end(), negated, document))
+
+    return hits
+
+
+def scan_documents(documents):
+    """Scan each ``{name: text}`` document once; returns ``{concept: [Hit, ...]}``."""
+    by_concept = {}
+    for name, text in documents.items():
+        for hit in scan(text, name):
+            by_concept.setdefault(hit.concept, []).append(hit)
+    return by_concept
+
+
+def mention_status(hits_by_concept):
+    """Collapse hits to ``{concept: "positive" | "negated"}`` (any affirmed mention wins)."""
+    return {
+        concept: "positive" if any(not h.negated for h in hits) else "negated"
+        for concept, hits in hits_by_concept.items()
+    }
@@ -0,0 +1,275 @@
+"""LLM extraction step: turn neurology notes + radiology reports into structured records.
+
+``Extractor`` packs several patients into one prompt. It sends batches concurrently with asyncio,
+bounded by a semaphore, and caches each patient's output under a hash of (note text, prompt
+version, model, temperature), so re-runs over unchanged notes never reach the model. The prompt
+version covers the system prompt, the template and the token budget.
+
+Backends implement ``async complete(prompt, n_patients) -> str``:
+  - ``OpenAICompatibleBackend``: a local server exposing ``/v1/chat/completions`` (llama.cpp,
+    vLLM, Ollama, ...), called with the stdlib in a worker thread
+  - ``StubBackend``: answers from a dict of pre-baked extractions; for the demo and offline runs
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import re
+import urllib.request
+
+from .profiling import PROFILER
+from .schema import BINARY_FIELDS, BINARY_VALUES, EXTRACTION_FIELDS, INTEGER_FIELDS, SEX_VALUES, WEAKNESS_SIDES
+
+DEFAULT_MODEL = "llama-3-8b-instruct"
+DEFAULT_TEMPERATURE = 0.1
+DEFAULT_MAX_TOKENS = 512
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a clinical information extraction assistant for acute ischemic stroke records."
+
+PROMPT_TEMPLATE = """Extract the following variables for each patient below.
+
+- Age, NIHSS, ASPECTS, SBP: integers (SBP is the systolic blood pressure on arrival)
+- Sex: {sex}
+- Weakness_Side: {sides}
+- {binary}: "yes", "no" or "unknown"
+
+Answer with a JSON array only, one object per patient, each with "patient_id" and every variable above.
+
+{patients}"""
+
+_PATIENT_BLOCK = """### Patient {patient_id}
+Neurology note:
+{note}
+Radiology report:
+{report}
+"""
+
+_PATIENT_HEADER_RE = re.compile(r"^### Patient (.+)$", re.MULTILINE)
+_JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+# Spellings models use for the schema's categorical values
+_SYNONYMS = {
+    "binary": {"true": "yes", "y": "yes", "1": "yes", "present": "yes", "positive": "yes",
+               "false": "no", "n": "no", "0": "no", "absent": "no", "negative": "no", "none": "no",
+               "n/a": "unknown", "na": "unknown", "not documented": "unknown", "not mentioned": "unknown"},
+    "Sex": {"m": "male", "man": "male", "f": "female", "woman": "female"},
+    "Weakness_Side": {"l": "left", "r": "right", "both": "bilateral", "bilat": "bilateral"},
+}
+_ALLOWED = {"binary": BINARY_VALUES, "Sex": SEX_VALUES, "Weakness_Side": WEAKNESS_SIDES}
+
+
+def build_prompt(batch):
+    """Prompt for a batch of ``(patient_id, note, report)`` tuples."""
+    return PROMPT_TEMPLATE.format(
+        sex=" or ".join(f'"{v}"' for v in SEX_VALUES),
+        sides=", ".join(f'"{v}"' for v in WEAKNESS_SIDES),
+        binary=", ".join(BINARY_FIELDS),
+        patients="\n".join(
+            _PATIENT_BLOCK.format(patient_id=pid, note=note.strip(), report=report.strip())
+            for pid, note, report in batch
+        ),
+    )
+
+
+def prompt_version(max_tokens=DEFAULT_MAX_TOKENS):
+    """Hash of everything besides the notes, model and temperature that shapes a response: system
+    prompt, prompt template (with the schema values filled in) and token budget per patient."""
+    h = hashlib.sha256()
+    for part in (SYSTEM_PROMPT, build_prompt([]), _PATIENT_BLOCK, f"max_tokens={max_tokens}"):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:12]
+
+
+PROMPT_VERSION = prompt_version()
+
+
+def cache_key(note, report, model, temperature, prompt_version=PROMPT_VERSION):
+    h = hashlib.sha256()
+    for part in (note, report, prompt_version, model, repr(float(temperature))):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _coerce_integer(pid, field, value):
+    """Integer field value; -1 ("not documented") for missing or unparseable values."""
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("", "unknown", "not documented", "n/a", "na", "none"):
+            return -1
+        # "9", "9.0", "approx 9", "9 points"; nothing when there is no number or more than one
+        numbers = _NUMBER_RE.findall(text)
+        value = float(numbers[0]) if len(numbers) == 1 else None
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = float(value)
+    elif value is not None:
+        value = None
+    else:
+        return -1
+    if value is None or not math.isfinite(value):
+        logger.warning("Patient %s: unparseable %s value from the LLM, stored as -1", pid, field)
+        return -1
+    return int(round(value))
+
+
+def _coerce_category(pid, field, value):
+    """Lower-cased categorical value with common spellings mapped onto the schema's values.
+
+    Anything else is kept as given (and logged), so the validation tier's format checks flag it.
+    """
+    kind = "binary" if field in BINARY_FIELDS else field
+    if value is None:
+        return "unknown"
+    if isinstance(value, bool):
+        value = "yes" if value else "no"
+    text = str(value).strip().lower()
+    text = _SYNONYMS[kind].get(text, text)
+    if text not in _ALLOWED[kind] and text != "unknown":
+        logger.warning("Patient %s: %s value %r from the LLM is not one of %s", pid, field, text, _ALLOWED[kind])
+    return text
+
+
+def parse_response(text, patient_ids):
+    """Parse the model's JSON array into ``{patient_id: extraction}`` for the requested patients.
+
+    Each field is coerced on its own, so one malformed value never fails the batch.
+    """
+    match = _JSON_ARRAY_RE.search(text)
+    if match is None:
+        raise ValueError("LLM response does not contain a JSON array")
+    items = json.loads(match.group())
+    if not isinstance(items, list):
+        raise ValueError("LLM response does not contain a JSON array")
+
+    by_id = {}
+    for item in items:
+        if not isinstance(item, dict):
+            logger.warning("Skipping non-object entry in LLM response: %r", item)
+            continue
+        pid = str(item.pop("patient_id", ""))
+        extraction = {}
+        for f in EXTRACTION_FIELDS:
+            value = item.get(f, "unknown")
+            if f in INTEGER_FIELDS:
+                extraction[f] = _coerce_integer(pid, f, value)
+            else:
+                extraction[f] = _coerce_category(pid, f, value)
+        by_id[pid] = extraction
+
+    missing = [pid for pid in patient_ids if pid not in by_id]
+    if missing:
+        raise ValueError(f"LLM response is missing patients: {missing}")
+    return {pid: by_id[pid] for pid in patient_ids}
+
+
+# =====================================================================
+# BACKENDS
+# =====================================================================
+
+class OpenAICompatibleBackend:
+
+    def __init__(self, base_url, model=DEFAULT_MODEL, temperature=DEFAULT_TEMPERATURE,
+                 max_tokens=DEFAULT_MAX_TOKENS, timeout=120, api_key=None):
+        self.url = base_url.rstrip("/") + "/v1/chat/completions"
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.api_key = api_key
+
+    def _post(self, prompt, max_tokens):
+        body = json.dumps({
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        request = urllib.request.Request(self.url, data=body, headers=headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode("utf-8"))
+        return payload["choices"][0]["message"]["content"]
+
+    async def complete(self, prompt, n_patients=1):
+        return await asyncio.to_thread(self._post, prompt, self.max_tokens * n_patients)
+
+
+class StubBackend:
+    """Answers from ``{patient_id: extraction}``; used by the demo and for offline tests."""
+
+    model = "stub"
+    temperature = 0.0
+    max_tokens = DEFAULT_MAX_TOKENS
+
+    def __init__(self, extractions):
+        self.extractions = extractions
+        self.calls = 0
+
+    async def complete(self, prompt, n_patients=1):
+        self.calls += 1
+        ids = _PATIENT_HEADER_RE.findall(prompt)
+        return json.dumps([{"patient_id": pid, **self.extractions[pid]} for pid in ids])
+
+
+# =====================================================================
+# EXTRACTOR
+# =====================================================================
+
+class Extractor:
+
+    def __init__(self, backend, batch_size=4, concurrency=4, cache=None):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.cache = {} if cache is None else cache
+        self.hits = 0
+        self.misses = 0
+        self.prompt_version = prompt_version(getattr(backend, "max_tokens", DEFAULT_MAX_TOKENS))
+
+    def _key(self, note, report):
+        return cache_key(note, report, self.backend.model, self.backend.temperature, self.prompt_version)
+
+    async def _run_batch(self, batch, semaphore):
+        async with semaphore:
+            text = await self.backend.complete(build_prompt(batch), n_patients=len(batch))
+        results = parse_response(text, [pid for pid, _, _ in batch])
+        for pid, note, report in batch:
+            self.cache[self._key(note, report)] = results[pid]
+        return results
+
+    async def extract_many(self, cases):
+        """Extract ``(patient_id, note, report)`` cases; returns ``{patient_id: extraction}``."""
+        token = PROFILER.start()
+        results, pending = {}, []
+        for pid, note, report in cases:
+            cached = self.cache.get(self._key(note, report))
+            if cached is not None:
+                self.hits += 1
+                results[pid] = dict(cached)
+            else:
+                self.misses += 1
+                pending.append((pid, note, report))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        for batch_result in await asyncio.gather(*(self._run_batch(b, semaphore) for b in batches)):
+            results.update(batch_result)
+
+        PROFILER.stop("extract", token, cases[0][0] if len(cases) == 1 else None)
+        return {pid: results[pid] for pid, _, _ in cases}
+
+    def extract(self, cases):
+        """Blocking wrapper around ``extract_many``."""
+        return asyncio.run(self.extract_many(list(cases)))
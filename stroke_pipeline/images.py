@@ -0,0 +1,149 @@
+"""Image service for ASPECTS and figure images: disk thumbnails plus an in-memory LRU of encoded bytes.
+
+``thumbnail(path)`` returns a copy of the image downscaled to ``THUMBNAIL_EDGE`` pixels on its
+longest side. The copy is encoded as WebP and written once to a ``.thumbnails`` directory next to
+the source, so a restarted server and other workers reuse it without decoding the original again.
+``full(path)`` returns the original file bytes; callers fetch it only when the user asks for it.
+
+Both kinds of bytes are kept in one LRU bounded by ``max_bytes``, keyed on path, variant and the
+file's modification time, so a replaced image is picked up on the next request. Thumbnails need
+Pillow; without it ``thumbnail`` falls back to the full image.
+
+    python -m stroke_pipeline.images images/        # pre-generate thumbnails for a directory
+"""
+
+import argparse
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+THUMBNAIL_EDGE = 400
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = ".thumbnails"
+CACHE_BYTES = 64 * 1024 * 1024
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def _pil_image():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def thumbnail_path(path, edge=THUMBNAIL_EDGE):
+    path = Path(path)
+    return path.parent / THUMBNAIL_DIR / f"{path.stem}-{edge}.webp"
+
+
+def make_thumbnail(path, edge=THUMBNAIL_EDGE, quality=THUMBNAIL_QUALITY):
+    """Encoded thumbnail bytes for ``path``; written to ``thumbnail_path`` unless an up-to-date copy exists."""
+    path = Path(path)
+    target = thumbnail_path(path, edge)
+    if target.exists() and target.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+        return target.read_bytes()
+
+    Image = _pil_image()
+    if Image is None:
+        return path.read_bytes()
+    with Image.open(path) as im:
+        if max(im.size) <= edge:
+            # Already small enough; re-encoding would only cost quality
+            return path.read_bytes()
+        # draft() lets JPEG decode at reduced scale; a no-op for other formats
+        im.draft("RGB", (edge, edge))
+        im.thumbnail((edge, edge), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.save(buf, "WEBP", quality=quality, method=4)
+    data = buf.getvalue()
+
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        target.parent.mkdir(exist_ok=True)
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+    except OSError:
+        # Read-only image store: serve the thumbnail from memory only
+        pass
+    return data
+
+
+class ImageService:
+
+    def __init__(self, max_bytes=CACHE_BYTES, edge=THUMBNAIL_EDGE, quality=THUMBNAIL_QUALITY):
+        self.max_bytes = max_bytes
+        self.edge = edge
+        self.quality = quality
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        # Streamlit serves sessions from several threads
+        self._lock = threading.Lock()
+
+    def _get(self, key, load):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data
+            self.misses += 1
+
+        data = load()
+        with self._lock:
+            if key not in self._entries and len(data) <= self.max_bytes:
+                self._entries[key] = data
+                self._bytes += len(data)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return data
+
+    def _key(self, path, variant):
+        path = Path(path)
+        return str(path.resolve()), variant, path.stat().st_mtime_ns
+
+    def thumbnail(self, path):
+        return self._get(self._key(path, f"thumb-{self.edge}"),
+                         lambda: make_thumbnail(path, self.edge, self.quality))
+
+    def full(self, path):
+        return self._get(self._key(path, "full"), Path(path).read_bytes)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate image thumbnails.")
+    parser.add_argument("paths", nargs="+", help="Image files or directories of images")
+    parser.add_argument("--edge", type=int, default=THUMBNAIL_EDGE, help="Longest side of the thumbnail in pixels")
+    parser.add_argument("--quality", type=int, default=THUMBNAIL_QUALITY)
+    args = parser.parse_args(argv)
+
+    if _pil_image() is None:
+        parser.error("Pillow is required to generate thumbnails (pip install pillow)")
+
+    files = []
+    for p in map(Path, args.paths):
+        files.extend(sorted(f for f in p.iterdir() if f.suffix.lower() in IMAGE_SUFFIXES) if p.is_dir() else [p])
+
+    before = after = 0
+    for f in files:
+        before += f.stat().st_size
+        after += len(make_thumbnail(f, args.edge, args.quality))
+    print(f"{len(files)} images: {before / 1024:.0f} KB → {after / 1024:.0f} KB of thumbnails")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Incremental re-validation after a reviewer edits a single field.
+
+``dependency_graph`` maps each extracted field to what reads it:
+  - the format checks in ``validation.FORMAT_CHECKS``
+  - the registry rules, including RAG rules that compare the field with source-text mentions
+  - the feature-vector columns the cosine tier encodes from it (``similarity.FEATURE_COLUMNS``)
+  - the outcome model (``prediction.PREDICTION_FEATURES``)
+
+``IncrementalValidator`` runs the full pipeline once. After that, ``update(field, value)``
+recomputes only the dependents of that field. Source-text mentions depend on the documents
+alone and are never rescanned. For the cosine tier it keeps the standardised query vector and
+its dot product with every reference row, and an edit patches only the edited field's columns:
+O(reference rows x columns of that field) rather than a re-encode and a full matrix product.
+``validation`` matches what ``validate_data`` would return for the current record, up to float
+rounding in the similarity. ``baseline`` is a read-only snapshot of the validation of the record
+as extracted, taken before any update, so the original flags can still be shown and audited.
+"""
+
+from types import MappingProxyType
+
+import numpy as np
+
+from .prediction import PREDICTION_FEATURES, predict_poor_outcome
+from .profiling import span
+from .registry import default_rules
+from .similarity import FEATURE_COLUMNS, SIMILARITY_THRESHOLD, default_reference, encode_record
+from .validation import FORMAT_CHECKS, assemble_validation, source_mentions
+
+_FORMAT_BY_NAME = {name: check for name, _, check in FORMAT_CHECKS}
+
+
+def dependency_graph(rules=None, prediction_features=PREDICTION_FEATURES):
+    """``{field: {"checks": [...], "rules": [Rule, ...], "cosine": [column, ...], "prediction": bool}}``."""
+    rules = rules or default_rules()
+    fields = set(FEATURE_COLUMNS) | set(prediction_features)
+    fields |= {f for _, f, _ in FORMAT_CHECKS}
+    fields |= {f for r in rules.rules for f in r.reads}
+
+    graph = {}
+    for field in fields:
+        graph[field] = {
+            "checks": [name for name, f, _ in FORMAT_CHECKS if f == field],
+            "rules": [r for r in rules.rules if field in r.reads],
+            "cosine": FEATURE_COLUMNS.get(field, []),
+            "prediction": field in prediction_features,
+        }
+    return graph
+
+
+def _freeze(value):
+    """Read-only deep copy: dicts become mapping proxies and lists tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class IncrementalValidator:
+    """``predict=None`` skips the outcome model (for callers that score the corrected record instead)."""
+
+    def __init__(self, extracted, note_text, radiology_text, rules=None, reference=None,
+                 threshold=SIMILARITY_THRESHOLD, predict=predict_poor_outcome,
+                 prediction_features=PREDICTION_FEATURES, patient_id=None):
+        self.record = dict(extracted)
+        self.rules = rules or default_rules()
+        self.reference = reference or default_reference()
+        self.threshold = threshold
+        self.predict = predict
+        self.patient_id = patient_id
+        self.graph = dependency_graph(self.rules, prediction_features)
+
+        with span("rules", patient_id):
+            self._format = {name: check(self.record) for name, check in _FORMAT_BY_NAME.items()}
+        with span("rag", patient_id):
+            self.mentions = source_mentions(note_text, radiology_text)
+            self._fired = {r.name: r.predicate(self.record, self.mentions) for r in self.rules.rules}
+        with span("cosine", patient_id):
+            self._query = self._standardise(encode_record(self.record)[0])
+            self._dots = np.asarray(self.reference.matrix, dtype=np.float64) @ self._query
+        self.probability = self.predict(self.record) if self.predict else None
+        self.baseline = _freeze(self.validation)
+
+    def _standardise(self, encoded, columns=slice(None)):
+        return ((encoded[columns] - self.reference.mean[columns]) / self.reference.scale[columns]).astype(np.float64)
+
+    @property
+    def similarity(self):
+        """Cosine similarity to the nearest reference record."""
+        return float(self._dots.max() / max(np.linalg.norm(self._query), 1e-12))
+
+    def update(self, field, value):
+        """Set ``field`` to ``value`` and recompute only its dependents; returns their names."""
+        self.record[field] = value
+        deps = self.graph.get(field)
+        if deps is None:
+            return []
+
+        recomputed = []
+        for name in deps["checks"]:
+            self._format[name] = _FORMAT_BY_NAME[name](self.record)
+            recomputed.append(name)
+
+        for rule in deps["rules"]:
+            self._fired[rule.name] = rule.predicate(self.record, self.mentions)
+            recomputed.append(rule.name)
+
+        columns = deps["cosine"]
+        if columns:
+            with span("cosine", self.patient_id):
+                delta = self._standardise(encode_record(self.record)[0], columns) - self._query[columns]
+                self._dots += np.asarray(self.reference.matrix[:, columns], dtype=np.float64) @ delta
+                self._query[columns] += delta
+            recomputed.append("cosine")
+
+        if deps["prediction"] and self.predict:
+            self.probability = self.predict(self.record)
+            recomputed.append("prediction")
+
+        return recomputed
+
+    def update_many(self, values):
+        """``update`` each field whose value differs from the current record; returns the recomputed names."""
+        recomputed = []
+        for field, value in values.items():
+            if self.record.get(field) != value:
+                recomputed.extend(self.update(field, value))
+        return recomputed
+
+    @property
+    def validation(self):
+        fired = [r for r in self.rules.rules if self._fired[r.name]]
+        format_msgs = [self._format[name] for name, _, _ in FORMAT_CHECKS]
+        return assemble_validation(format_msgs, fired, self.similarity, self.threshold)
@@ -0,0 +1,102 @@
+"""Persistence shared by the saved aggregates (calibration histograms, cohort statistics).
+
+``save_json`` / ``load_json`` write an aggregate's state atomically: it is written aside and
+renamed, so a crash mid-save leaves the previous file intact.
+
+The aggregates are plain sums, O(bins) whatever the cohort size, and cannot be taken apart again,
+so a patient counted twice (a nightly re-ingestion, a rerun after a crash, a cache hit) would
+skew them for good. Which patients an aggregate already holds is kept apart from it, in a
+``CountLedger``: an SQLite table of ``(kind, patient_id)`` beside the aggregate file. ``claim``
+records a patient and says whether it is new. Claims only become durable on ``commit``, which
+callers issue right after saving the aggregate, so a crash before the save drops the sums and the
+claims together and the next run counts those patients again.
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+LEDGER_SUFFIX = ".ledger"
+
+
+def ledger_path(state_path):
+    """``<state_path>.ledger``: where the ledger for the aggregate saved at ``state_path`` lives."""
+    state_path = Path(state_path)
+    return state_path.with_name(state_path.name + LEDGER_SUFFIX)
+
+
+def save_json(path, data):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_json(path):
+    """The JSON saved at ``path``, or None if there is none yet."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class CountLedger:
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS counted ("
+            " kind TEXT NOT NULL,"
+            " patient_id TEXT NOT NULL,"
+            " PRIMARY KEY (kind, patient_id)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    @classmethod
+    def beside(cls, state_path):
+        return cls(ledger_path(state_path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close without committing; claims since the last ``commit`` are dropped."""
+        self._db.close()
+
+    def commit(self):
+        self._db.commit()
+
+    def claim(self, kind, patient_id):
+        """Record ``patient_id`` under ``kind``; True if it was not counted before (here or in this run)."""
+        cursor = self._db.execute("INSERT OR IGNORE INTO counted (kind, patient_id) VALUES (?, ?)",
+                                  (kind, str(patient_id)))
+        return cursor.rowcount == 1
+
+    def claim_many(self, kind, patient_ids):
+        return [self.claim(kind, patient_id) for patient_id in patient_ids]
+
+    def count(self, kind):
+        return self._db.execute("SELECT COUNT(*) FROM counted WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def merge(self, other):
+        """Add another ledger's claims (e.g. a worker's), whose aggregate is merged alongside this one's.
+
+        Raises ValueError, adding nothing, if both ledgers count a patient under the same kind.
+        """
+        if not self._db.in_transaction:
+            self._db.execute("BEGIN")
+        # Nested in the open transaction, so undoing the merge keeps this run's earlier claims
+        self._db.execute("SAVEPOINT merge")
+        overlap = [(kind, patient_id) for kind, patient_id in other._db.execute("SELECT kind, patient_id FROM counted")
+                   if not self.claim(kind, patient_id)]
+        if overlap:
+            self._db.execute("ROLLBACK TO merge")
+        self._db.execute("RELEASE merge")
+        if overlap:
+            raise ValueError(f"{len(overlap):,} patients are already counted (e.g. {overlap[0][1]!r})")
+        return self
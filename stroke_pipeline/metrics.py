@@ -0,0 +1,254 @@
+"""Discrimination metrics for outcome predictions: ROC and precision-recall curves with bootstrap CIs.
+
+Curves come from one descending sort of the scores followed by cumulative sums of positives and
+negatives, one point per distinct score. AUROC is the trapezoidal area under the ROC curve;
+AUPRC is average precision (step-wise interpolation, as scikit-learn computes it).
+
+``bootstrap`` draws all resamples at once. After the sort every patient sits in a (score cell, label)
+bin, so one resample is fully described by how many of its draws land in each bin. A block of
+resamples is therefore one (resamples, bins) count matrix from a single multinomial draw. That matrix
+has the same distribution as bincounting an index matrix, without materialising n indices per
+resample. The cumulative sums then run along its last axis. Scores with more than ``MAX_CELLS``
+distinct values are grouped into ``MAX_CELLS`` rank-ordered cells for the resampling only; point
+estimates and curves use every distinct score.
+
+    python -m stroke_pipeline.metrics results.jsonl --labels cohort.jsonl
+"""
+
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .prediction import PROBABILITY_COLUMN
+from .synthetic import synthetic_cohort
+
+RESAMPLES = 2_000
+CI_LEVEL = 0.95
+BOOTSTRAP_SEED = 0
+
+# Score cells kept when resampling; pairs within one cell count as ties in the resamples
+MAX_CELLS = 1_024
+# Count-matrix entries per multinomial draw
+BLOCK_ENTRIES = 1 << 22
+
+# Points per curve handed to plotting
+CURVE_POINTS = 500
+
+# Synthetic hold-out cohort for models trained on ``prediction.TRAINING_SEED``
+EVALUATION_SIZE = 5_000
+EVALUATION_SEED = 2
+
+
+# =====================================================================
+# CURVES
+# =====================================================================
+
+def _score_cells(y, scores):
+    """Sort once; ``(thresholds, positives, negatives)`` per distinct score, highest score first."""
+    y = np.asarray(y).astype(bool).ravel()
+    scores = np.asarray(scores, dtype=float).ravel()
+    if y.shape != scores.shape:
+        raise ValueError(f"{len(y)} labels but {len(scores)} scores")
+    if not np.isfinite(scores).all():
+        raise ValueError("Scores must be finite")
+    if y.all() or not y.any():
+        raise ValueError("Labels need both positive and negative patients")
+
+    order = np.argsort(-scores, kind="stable")
+    ranked = scores[order]
+    first = np.r_[True, ranked[1:] != ranked[:-1]]
+    cell = np.cumsum(first) - 1
+    positives = np.bincount(cell, weights=y[order])
+    return ranked[first], positives, np.bincount(cell) - positives
+
+
+def _cumulative(positives, negatives):
+    """True/false positive counts at each cell threshold along the last axis, from the (0, 0) origin."""
+    origin = np.zeros(positives.shape[:-1] + (1,))
+    tp = np.concatenate([origin, np.cumsum(positives, axis=-1)], axis=-1)
+    fp = np.concatenate([origin, np.cumsum(negatives, axis=-1)], axis=-1)
+    return tp, fp
+
+
+def _auroc(tp, fp):
+    tpr = tp / tp[..., -1:]
+    fpr = fp / fp[..., -1:]
+    return np.sum(np.diff(fpr, axis=-1) * (tpr[..., 1:] + tpr[..., :-1]), axis=-1) / 2
+
+
+def _average_precision(tp, fp):
+    tp, fp = tp[..., 1:], fp[..., 1:]
+    called = tp + fp
+    precision = np.divide(tp, called, out=np.ones_like(tp), where=called > 0)
+    recall = tp / tp[..., -1:]
+    return np.sum(np.diff(recall, axis=-1, prepend=0) * precision, axis=-1)
+
+
+def _thin(n, points):
+    """Indices of at most ``points`` evenly spaced curve points, keeping both ends."""
+    if not points or n <= points:
+        return slice(None)
+    return np.unique(np.linspace(0, n - 1, points).round().astype(int))
+
+
+def _roc(tp, fp, points=None):
+    keep = _thin(tp.shape[-1], points)
+    return (fp / fp[-1])[keep], (tp / tp[-1])[keep], keep
+
+
+def _pr(tp, fp, points=None):
+    precision = np.divide(tp, tp + fp, out=np.ones_like(tp), where=tp + fp > 0)
+    keep = _thin(tp.shape[-1], points)
+    return (tp / tp[-1])[keep], precision[keep], keep
+
+
+def roc_curve(y, scores, points=None):
+    """``(fpr, tpr, thresholds)``, from the (0, 0) corner; ``points`` thins the curve for plotting."""
+    thresholds, positives, negatives = _score_cells(y, scores)
+    fpr, tpr, keep = _roc(*_cumulative(positives, negatives), points)
+    return fpr, tpr, np.r_[np.inf, thresholds][keep]
+
+
+def pr_curve(y, scores, points=None):
+    """``(recall, precision, thresholds)``, from recall 0 at precision 1."""
+    thresholds, positives, negatives = _score_cells(y, scores)
+    recall, precision, keep = _pr(*_cumulative(positives, negatives), points)
+    return recall, precision, np.r_[np.inf, thresholds][keep]
+
+
+def auroc(y, scores):
+    return float(_auroc(*_cumulative(*_score_cells(y, scores)[1:])))
+
+
+def average_precision(y, scores):
+    return float(_average_precision(*_cumulative(*_score_cells(y, scores)[1:])))
+
+
+# =====================================================================
+# BOOTSTRAP
+# =====================================================================
+
+def _bootstrap(positives, negatives, resamples, level, seed, max_cells):
+    tp, fp = _cumulative(positives, negatives)
+    estimates = {"auroc": _auroc(tp, fp), "auprc": _average_precision(tp, fp)}
+
+    k = len(positives)
+    if k > max_cells:
+        group = np.arange(k) * max_cells // k
+        positives, negatives = np.bincount(group, positives), np.bincount(group, negatives)
+        k = max_cells
+    counts = np.concatenate([positives, negatives])
+    n = int(round(counts.sum()))
+
+    rng = np.random.default_rng(seed)
+    block = max(1, BLOCK_ENTRIES // len(counts))
+    samples = {"auroc": [], "auprc": []}
+    # A resample without positives or negatives has no curve; it drops out as NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, resamples, block):
+            draws = rng.multinomial(n, counts / n, size=min(block, resamples - start))
+            tp, fp = _cumulative(draws[:, :k], draws[:, k:])
+            samples["auroc"].append(_auroc(tp, fp))
+            samples["auprc"].append(_average_precision(tp, fp))
+
+    tail = (1 - level) / 2 * 100
+    summary = {"n": n, "positives": int(round(positives.sum())), "resamples": resamples}
+    for name, values in samples.items():
+        lo, hi = np.nanpercentile(np.concatenate(values), [tail, 100 - tail])
+        summary[name] = {"estimate": float(estimates[name]), "ci": (float(lo), float(hi))}
+    return summary
+
+
+def bootstrap(y, scores, resamples=RESAMPLES, level=CI_LEVEL, seed=BOOTSTRAP_SEED, max_cells=MAX_CELLS):
+    """AUROC and AUPRC with percentile bootstrap CIs.
+
+    Returns ``{"auroc": {"estimate", "ci"}, "auprc": {...}, "n", "positives", "resamples"}``.
+    """
+    _, positives, negatives = _score_cells(y, scores)
+    return _bootstrap(positives, negatives, resamples, level, seed, max_cells)
+
+
+def evaluate(y, scores, resamples=RESAMPLES, level=CI_LEVEL, seed=BOOTSTRAP_SEED, points=CURVE_POINTS):
+    """``bootstrap`` summary plus thinned ``"roc"`` and ``"pr"`` curves (one sort for all three)."""
+    _, positives, negatives = _score_cells(y, scores)
+    tp, fp = _cumulative(positives, negatives)
+    fpr, tpr, _ = _roc(tp, fp, points)
+    recall, precision, _ = _pr(tp, fp, points)
+    return {
+        **_bootstrap(positives, negatives, resamples, level, seed, MAX_CELLS),
+        "roc": {"fpr": fpr, "tpr": tpr},
+        "pr": {"recall": recall, "precision": precision},
+    }
+
+
+def evaluation_predictions(model, n=EVALUATION_SIZE, seed=EVALUATION_SEED):
+    """``(outcomes, probabilities)`` for a synthetic hold-out cohort, scored in one batch call."""
+    records, outcomes = synthetic_cohort(n, seed)
+    return outcomes, model.predict_records(records)
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def _read_rows(path):
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(fh)
+        else:
+            yield from (json.loads(line) for line in fh if line.strip())
+
+
+def labelled_predictions(results_path, labels_path=None, outcome_column="outcome", with_ids=False):
+    """Outcomes and predicted probabilities, matched on patient_id (plus the patient IDs with ``with_ids``).
+
+    Labels come from ``labels_path`` (a cohort or outcome file, .jsonl or .csv), or from
+    ``outcome_column`` of the results themselves. Patients without a label are skipped.
+    """
+    if labels_path:
+        labels = {str(row["patient_id"]): row[outcome_column] for row in _read_rows(labels_path)}
+    y, scores, ids = [], [], []
+    for row in _read_rows(results_path):
+        label = labels.get(str(row["patient_id"])) if labels_path else row.get(outcome_column)
+        if label in (None, ""):
+            continue
+        y.append(int(float(label)))
+        scores.append(float(row[PROBABILITY_COLUMN]))
+        ids.append(str(row["patient_id"]))
+    if with_ids:
+        return np.array(y, dtype=np.int8), np.array(scores), ids
+    return np.array(y, dtype=np.int8), np.array(scores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AUROC/AUPRC with bootstrap CIs for batch predictions.")
+    parser.add_argument("results", help="Batch output (.jsonl or .csv) with predicted probabilities")
+    parser.add_argument("--labels", default=None, help="Cohort or outcome file (.jsonl or .csv) with patient_id and outcome")
+    parser.add_argument("--outcome-column", default="outcome")
+    parser.add_argument("--resamples", type=int, default=RESAMPLES)
+    parser.add_argument("--level", type=float, default=CI_LEVEL)
+    parser.add_argument("--seed", type=int, default=BOOTSTRAP_SEED)
+    args = parser.parse_args(argv)
+
+    y, scores = labelled_predictions(args.results, args.labels, args.outcome_column)
+    if not len(y):
+        parser.error(f"no predictions with a {args.outcome_column!r} label")
+
+    start = time.perf_counter()
+    summary = bootstrap(y, scores, args.resamples, args.level, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{summary['n']:,} patients, {summary['positives']:,} poor outcomes "
+          f"({summary['positives'] / summary['n']:.1%}); {args.resamples:,} resamples in {elapsed:.2f} s")
+    for name in ("auroc", "auprc"):
+        lo, hi = summary[name]["ci"]
+        print(f"{name.upper():<6} {summary[name]['estimate']:.3f}  ({args.level:.0%} CI {lo:.3f}-{hi:.3f})")
+
+
+if __name__ == "__main__":
+    main()
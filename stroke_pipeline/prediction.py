@@ -0,0 +1,282 @@
+"""Outcome prediction: probability of a poor 3-month outcome (mRS 3-6) from the corrected record.
+
+Every model implements ``fit(X, y)`` and ``predict_proba(X) -> (n,)`` over the float matrix
+from ``feature_matrix``, so a whole cohort is scored in one vectorized call:
+  - ``LogisticModel``: L2-regularised logistic regression fitted with Newton's method
+  - ``GradientBoostingModel``: boosted decision stumps on the logistic loss, with quantile split points
+  - ``TabPFNModel``: wraps ``tabpfn.TabPFNClassifier`` when the package is installed
+
+``default_model`` fits a model on the synthetic training cohort once per process. Reruns and batch
+chunks reuse that fitted instance.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+from .profiling import span
+from .records import INVALID_INT
+from .schema import INTEGER_FIELDS
+from .synthetic import synthetic_cohort
+
+PREDICTION_FEATURES = ["Age", "NIHSS", "ASPECTS", "Hypertension", "Atrial_Fibrillation", "tPA_Administered"]
+
+DEFAULT_MODEL_KIND = "logistic"
+
+PROBABILITY_COLUMN = "Predicted_Poor_Outcome_Probability"
+
+# Patients with 3-month outcome data in the study cohort
+TRAINING_SIZE = 767
+TRAINING_SEED = 1
+
+_BINARY_CODES = {"yes": 1.0, "no": 0.0}
+
+
+def _value(record, field):
+    value = record[field]
+    if field in INTEGER_FIELDS:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return np.nan
+        # Extraction uses -1 for "not documented"
+        return value if value >= 0 else np.nan
+    return _BINARY_CODES.get(value, 0.5)
+
+
+def feature_vector(record, features=PREDICTION_FEATURES):
+    """One record as a (1, d) float matrix; missing integers become NaN and are imputed by the model."""
+    return np.array([[_value(record, f) for f in features]])
+
+
+def _array_features(arr, features):
+    X = np.empty((len(arr), len(features)))
+    for j, f in enumerate(features):
+        codes = arr[f]
+        if f in INTEGER_FIELDS:
+            X[:, j] = np.where((codes < 0) | (codes == INVALID_INT), np.nan, codes)
+        else:
+            X[:, j] = np.where(codes >= 0, codes, 0.5)
+    return X
+
+
+def feature_matrix(records, features=PREDICTION_FEATURES):
+    """Records (dicts or a ``records.RECORD_DTYPE`` array) as an (n, d) float matrix."""
+    if isinstance(records, dict):
+        return feature_vector(records, features)
+    if isinstance(records, np.ndarray):
+        return _array_features(records, features)
+    return np.array([[_value(r, f) for f in features] for r in records]).reshape(-1, len(features))
+
+
+def _sigmoid(z):
+    return 1 / (1 + np.exp(-z))
+
+
+class _TabularModel:
+    """Shared median imputation and standardisation; subclasses fit on the standardised matrix."""
+
+    kind = None
+
+    def __init__(self, features=PREDICTION_FEATURES):
+        self.features = list(features)
+        self.median = None
+        self.mean = None
+        self.scale = None
+
+    def _prepare(self, X):
+        X = np.asarray(X, dtype=float)
+        X = np.where(np.isnan(X), self.median, X)
+        return (X - self.mean) / self.scale
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        self.median = np.nanmedian(X, axis=0)
+        X = np.where(np.isnan(X), self.median, X)
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        self._fit((X - self.mean) / self.scale, np.asarray(y, dtype=float))
+        return self
+
+    def predict_proba(self, X):
+        return self._predict(self._prepare(X))
+
+    def predict_records(self, records):
+        return self.predict_proba(feature_matrix(records, self.features))
+
+    def predict_one(self, record):
+        return float(self.predict_proba(feature_vector(record, self.features))[0])
+
+    def _parameters(self):
+        return [self.median, self.mean, self.scale]
+
+    @property
+    def version(self):
+        """Hash of the fitted parameters; changes whenever the model is refitted differently."""
+        h = hashlib.sha256(self.kind.encode("utf-8"))
+        for part in self._parameters():
+            h.update(np.ascontiguousarray(part, dtype=np.float64).tobytes())
+        return f"{self.kind}-{h.hexdigest()[:12]}"
+
+
+class LogisticModel(_TabularModel):
+
+    kind = "logistic"
+
+    def __init__(self, features=PREDICTION_FEATURES, l2=1.0, max_iter=25, tol=1e-8):
+        super().__init__(features)
+        self.l2 = l2
+        self.max_iter = max_iter
+        self.tol = tol
+        self.coef = None
+        self.intercept = 0.0
+
+    def _fit(self, X, y):
+        n, d = X.shape
+        A = np.hstack([np.ones((n, 1)), X])
+        w = np.zeros(d + 1)
+        penalty = np.full(d + 1, self.l2)
+        penalty[0] = 0.0
+
+        for _ in range(self.max_iter):
+            p = _sigmoid(A @ w)
+            grad = A.T @ (p - y) + penalty * w
+            hess = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty)
+            step = np.linalg.solve(hess, grad)
+            w -= step
+            if np.max(np.abs(step)) < self.tol:
+                break
+
+        self.intercept, self.coef = float(w[0]), w[1:]
+
+    def _predict(self, Z):
+        return _sigmoid(Z @ self.coef + self.intercept)
+
+    def _parameters(self):
+        return super()._parameters() + [self.coef, [self.intercept]]
+
+
+class GradientBoostingModel(_TabularModel):
+
+    kind = "gbm"
+
+    def __init__(self, features=PREDICTION_FEATURES, n_estimators=150, learning_rate=0.1,
+                 n_bins=32, min_leaf=20):
+        super().__init__(features)
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.n_bins = n_bins
+        self.min_leaf = min_leaf
+        self.base = 0.0
+        self.split_feature = None
+        self.threshold = None
+        self.left = None
+        self.right = None
+
+    def _best_stump(self, X, g, h, candidates):
+        best = (-np.inf, 0, 0.0, 0.0, 0.0)
+        G, H = g.sum(), h.sum()
+        for j, thresholds in enumerate(candidates):
+            # Gradient/hessian sums left of each candidate threshold, via one bincount per feature
+            bins = np.searchsorted(thresholds, X[:, j], side="left")
+            GL = np.cumsum(np.bincount(bins, g, len(thresholds) + 1))[:-1]
+            HL = np.cumsum(np.bincount(bins, h, len(thresholds) + 1))[:-1]
+            NL = np.cumsum(np.bincount(bins, minlength=len(thresholds) + 1))[:-1]
+            GR, HR = G - GL, H - HL
+            valid = (NL >= self.min_leaf) & (len(X) - NL >= self.min_leaf)
+            if not valid.any():
+                continue
+            gain = np.where(valid, GL ** 2 / (HL + 1e-12) + GR ** 2 / (HR + 1e-12), -np.inf)
+            k = int(np.argmax(gain))
+            if gain[k] > best[0]:
+                best = (gain[k], j, thresholds[k], GL[k] / (HL[k] + 1e-12), GR[k] / (HR[k] + 1e-12))
+        return best
+
+    def _fit(self, X, y):
+        prior = np.clip(y.mean(), 1e-6, 1 - 1e-6)
+        self.base = float(np.log(prior / (1 - prior)))
+        quantiles = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+        candidates = [np.unique(np.quantile(X[:, j], quantiles)) for j in range(X.shape[1])]
+
+        z = np.full(len(y), self.base)
+        split_feature, threshold, left, right = [], [], [], []
+        for _ in range(self.n_estimators):
+            p = _sigmoid(z)
+            g, h = y - p, p * (1 - p)
+            gain, j, t, wl, wr = self._best_stump(X, g, h, candidates)
+            if not np.isfinite(gain):
+                break
+            wl, wr = self.learning_rate * wl, self.learning_rate * wr
+            z += np.where(X[:, j] <= t, wl, wr)
+            split_feature.append(j)
+            threshold.append(t)
+            left.append(wl)
+            right.append(wr)
+
+        self.split_feature = np.array(split_feature, dtype=int)
+        self.threshold = np.array(threshold)
+        self.left = np.array(left)
+        self.right = np.array(right)
+
+    def _predict(self, Z):
+        # (n, trees) comparison matrix, then one row sum
+        go_left = Z[:, self.split_feature] <= self.threshold
+        return _sigmoid(self.base + np.where(go_left, self.left, self.right).sum(axis=1))
+
+    def _parameters(self):
+        return super()._parameters() + [self.split_feature, self.threshold, self.left, self.right, [self.base]]
+
+
+class TabPFNModel(_TabularModel):
+
+    kind = "tabpfn"
+
+    def __init__(self, features=PREDICTION_FEATURES, **kwargs):
+        super().__init__(features)
+        try:
+            from tabpfn import TabPFNClassifier
+        except ImportError:
+            raise ImportError("tabpfn is required for the TabPFN predictor (pip install tabpfn)") from None
+        self.classifier = TabPFNClassifier(**kwargs)
+        self._fit_data = None
+
+    def _fit(self, X, y):
+        self.classifier.fit(X, y.astype(int))
+        self._fit_data = [X, y]
+
+    def _predict(self, Z):
+        return self.classifier.predict_proba(Z)[:, 1]
+
+    def _parameters(self):
+        return super()._parameters() + self._fit_data
+
+
+MODELS = {
+    "logistic": LogisticModel,
+    "gbm": GradientBoostingModel,
+    "tabpfn": TabPFNModel,
+}
+
+
+def train_model(kind=DEFAULT_MODEL_KIND, n=TRAINING_SIZE, seed=TRAINING_SEED, **kwargs):
+    """Fit a ``kind`` model on the synthetic training cohort."""
+    try:
+        model_cls = MODELS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown model {kind!r}; expected one of {sorted(MODELS)}") from None
+    records, outcomes = synthetic_cohort(n, seed)
+    model = model_cls(**kwargs)
+    return model.fit(feature_matrix(records, model.features), outcomes)
+
+
+@lru_cache(maxsize=None)
+def default_model(kind=DEFAULT_MODEL_KIND):
+    """The fitted ``kind`` model, trained once per process."""
+    return train_model(kind)
+
+
+def predict_poor_outcome(corrected, model=None):
+    with span("predict"):
+        return (model or default_model()).predict_one(corrected)
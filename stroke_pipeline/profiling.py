@@ -0,0 +1,158 @@
+"""Per-stage latency instrumentation.
+
+``span(stage, patient_id)`` records one sample per run into a fixed-size ring buffer. Each sample
+holds wall time, CPU time and, when ``tracemalloc`` is tracing, the peak bytes allocated during the
+span. Tracing is off by default. ``trace_memory()``, the ``--trace-memory`` flag of the batch and
+streaming CLIs, or ``STROKE_TRACE_MEMORY=1`` in the environment (for the app) turn it on:
+
+    with PROFILER.span("rag", patient_id):
+        ...
+
+Code that cannot wrap a block (a Streamlit rerun, for instance) can pair ``start()`` and
+``stop(stage, token)`` instead.
+
+tracemalloc has one process-wide peak. Every span start and stop folds that peak into all spans
+still open and then resets it, so nested and overlapping spans each get their own peak. The peak
+of a span that overlaps other threads includes what those threads allocated meanwhile.
+
+``summary()`` reports p50/p95/p99 per stage over the samples still in the buffer. ``chrome_trace()``
+returns the same samples in Chrome trace-event format, which loads in chrome://tracing or Perfetto.
+The module-level ``PROFILER`` is shared by the app, batch and streaming code, so one process shows
+which tier dominates latency under its real load.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+RING_SIZE = 10_000
+
+PERCENTILES = (50, 95, 99)
+
+TRACE_MEMORY_ENV = "STROKE_TRACE_MEMORY"
+
+
+def trace_memory(frames=1):
+    """Start ``tracemalloc`` (if it is not running yet) so spans record peak memory."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+class Profiler:
+
+    def __init__(self, capacity=RING_SIZE, enabled=True):
+        self.enabled = enabled
+        # (stage, patient_id, start_us, wall_ms, cpu_ms, peak_kb, thread id)
+        self.samples = deque(maxlen=capacity)
+        # Open memory-measuring spans: id -> [traced bytes at start, highest traced bytes since]
+        self._open = {}
+        self._ids = itertools.count()
+        self._memory_lock = threading.Lock()
+
+    def clear(self):
+        self.samples.clear()
+
+    def _fold_peak(self):
+        # Caller holds _memory_lock
+        peak = tracemalloc.get_traced_memory()[1]
+        for entry in self._open.values():
+            entry[1] = max(entry[1], peak)
+        tracemalloc.reset_peak()
+
+    def start(self):
+        memory = None
+        if tracemalloc.is_tracing():
+            with self._memory_lock:
+                self._fold_peak()
+                memory = next(self._ids)
+                current = tracemalloc.get_traced_memory()[0]
+                self._open[memory] = [current, current]
+        return time.perf_counter(), time.thread_time(), memory
+
+    def stop(self, stage, token, patient_id=None):
+        start, start_cpu, memory = token
+        wall = time.perf_counter() - start
+        cpu = time.thread_time() - start_cpu
+        peak_kb = None
+        if memory is not None:
+            with self._memory_lock:
+                if tracemalloc.is_tracing():
+                    self._fold_peak()
+                    base, peak = self._open.pop(memory)
+                    peak_kb = (peak - base) / 1024
+                else:
+                    self._open.pop(memory, None)
+        if not self.enabled:
+            return
+        self.samples.append((
+            stage, patient_id, start * 1e6, wall * 1e3, cpu * 1e3, peak_kb, threading.get_ident(),
+        ))
+
+    @contextmanager
+    def span(self, stage, patient_id=None):
+        if not self.enabled:
+            yield
+            return
+        token = self.start()
+        try:
+            yield
+        finally:
+            self.stop(stage, token, patient_id)
+
+    def summary(self):
+        """``{stage: {"count", "p50_ms", "p95_ms", "p99_ms", "cpu_p50_ms", "peak_kb_p95"}}``."""
+        by_stage = {}
+        for stage, _, _, wall, cpu, peak, _ in list(self.samples):
+            by_stage.setdefault(stage, ([], [], []))
+            by_stage[stage][0].append(wall)
+            by_stage[stage][1].append(cpu)
+            if peak is not None:
+                by_stage[stage][2].append(peak)
+
+        out = {}
+        for stage, (wall, cpu, peak) in by_stage.items():
+            p = np.percentile(wall, PERCENTILES)
+            out[stage] = {
+                "count": len(wall),
+                **{f"p{q}_ms": round(float(v), 3) for q, v in zip(PERCENTILES, p)},
+                "cpu_p50_ms": round(float(np.percentile(cpu, 50)), 3),
+                "peak_kb_p95": round(float(np.percentile(peak, 95)), 1) if peak else None,
+            }
+        return out
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = []
+        for stage, patient_id, start_us, wall, cpu, peak, tid in list(self.samples):
+            args = {"cpu_ms": round(cpu, 3)}
+            if patient_id is not None:
+                args["patient_id"] = str(patient_id)
+            if peak is not None:
+                args["peak_kb"] = round(peak, 1)
+            events.append({
+                "name": stage, "cat": "pipeline", "ph": "X", "pid": pid, "tid": tid,
+                "ts": round(start_us, 1), "dur": round(wall * 1e3, 1), "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.chrome_trace(), fh)
+
+
+PROFILER = Profiler()
+
+if os.environ.get(TRACE_MEMORY_ENV, "").lower() not in ("", "0", "false", "no"):
+    trace_memory()
+
+
+def span(stage, patient_id=None):
+    """``PROFILER.span``; the form pipeline code uses."""
+    return PROFILER.span(stage, patient_id)
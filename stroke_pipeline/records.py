@@ -0,0 +1,131 @@
+"""Compact typed patient records as a NumPy structured array.
+
+An extraction dict holds about twenty Python strings and ints per patient. ``RECORD_DTYPE`` packs
+the same record into one fixed-width row:
+  - integer fields are int16; -1 keeps its extraction meaning of "not documented"
+  - binary fields are int8 tri-state codes: 1 yes, 0 no, -1 unknown
+  - Sex and Weakness_Side are int8 indexes into ``schema.SEX_VALUES`` / ``WEAKNESS_SIDES``, -1 unknown
+
+Round trips through ``to_array`` / ``from_array`` are lossless for every value in the schema
+vocabularies. Anything else is stored as ``INVALID`` and decodes to ``"invalid"``, which the
+format checks still flag. A field missing from an extraction is packed as not documented
+(``MISSING_VALUES``).
+"""
+
+from operator import itemgetter
+
+import numpy as np
+
+from .schema import BINARY_FIELDS, EXTRACTION_FIELDS, INTEGER_FIELDS, SEX_VALUES, WEAKNESS_SIDES
+
+UNKNOWN = -1
+INVALID = -2
+INVALID_INT = np.iinfo(np.int16).min
+INVALID_VALUE = "invalid"
+
+_CATEGORIES = {
+    **{f: ["no", "yes"] for f in BINARY_FIELDS},
+    "Sex": SEX_VALUES,
+    "Weakness_Side": WEAKNESS_SIDES,
+}
+
+# Value of a field the extraction does not contain: "not documented" / "unknown"
+MISSING_VALUES = {f: -1 if f in INTEGER_FIELDS else "unknown" for f in EXTRACTION_FIELDS}
+
+RECORD_DTYPE = np.dtype([
+    (f, np.int16 if f in INTEGER_FIELDS else np.int8) for f in EXTRACTION_FIELDS
+])
+
+# value -> code and code -> value per categorical field
+_ENCODE = {
+    f: {**{v: i for i, v in enumerate(values)}, "unknown": UNKNOWN}
+    for f, values in _CATEGORIES.items()
+}
+_DECODE = {
+    f: {**{i: v for i, v in enumerate(values)}, UNKNOWN: "unknown", INVALID: INVALID_VALUE}
+    for f, values in _CATEGORIES.items()
+}
+
+
+def _encode_int(value):
+    try:
+        value = int(float(value))
+    except (TypeError, ValueError):
+        return INVALID_INT
+    return value if INVALID_INT < value <= np.iinfo(np.int16).max else INVALID_INT
+
+
+def encode_value(field, value):
+    if field in INTEGER_FIELDS:
+        return _encode_int(value)
+    return _ENCODE[field].get(value, INVALID)
+
+
+def decode_value(field, code):
+    code = int(code)
+    if field in INTEGER_FIELDS:
+        return INVALID_VALUE if code == INVALID_INT else code
+    return _DECODE[field][code]
+
+
+def _encode_int_column(values):
+    # Fast path for clean integer columns; anything else goes value by value
+    try:
+        column = np.array(values, dtype=np.int64)
+        if len(column) and column.min() > INVALID_INT and column.max() <= np.iinfo(np.int16).max:
+            return column
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return [_encode_int(v) for v in values]
+
+
+def fill_missing(record):
+    """``record`` with every absent extraction field set to its ``MISSING_VALUES`` entry."""
+    if all(f in record for f in EXTRACTION_FIELDS):
+        return record
+    return {**MISSING_VALUES, **record}
+
+
+def to_array(records):
+    """Pack extraction dicts (or CSV rows of strings) into a ``RECORD_DTYPE`` array."""
+    if isinstance(records, dict):
+        records = [records]
+    records = list(records)
+    arr = np.empty(len(records), dtype=RECORD_DTYPE)
+    if not records:
+        return arr
+
+    # One pass over the dicts, then one column at a time
+    try:
+        rows = list(map(itemgetter(*EXTRACTION_FIELDS), records))
+    except KeyError:
+        rows = [itemgetter(*EXTRACTION_FIELDS)(fill_missing(r)) for r in records]
+    columns = zip(*rows)
+    for f, values in zip(EXTRACTION_FIELDS, columns):
+        if f in INTEGER_FIELDS:
+            arr[f] = _encode_int_column(values)
+        else:
+            codes = _ENCODE[f]
+            arr[f] = [codes.get(v, INVALID) for v in values]
+    return arr
+
+
+def from_array(arr):
+    """Unpack a ``RECORD_DTYPE`` array into extraction dicts in ``EXTRACTION_FIELDS`` order."""
+    columns = [[decode_value(f, c) for c in arr[f].tolist()] for f in EXTRACTION_FIELDS]
+    return [dict(zip(EXTRACTION_FIELDS, row)) for row in zip(*columns)]
+
+
+def to_frame(arr, index=None):
+    """Decoded DataFrame with one column per field, ready for ``to_csv``."""
+    import pandas as pd
+
+    data = {}
+    for f in EXTRACTION_FIELDS:
+        codes = arr[f]
+        if f in INTEGER_FIELDS:
+            data[f] = pd.Series(codes, index=index).astype(object).where(codes != INVALID_INT, INVALID_VALUE)
+        else:
+            lookup = _DECODE[f]
+            data[f] = pd.Series([lookup[c] for c in codes.tolist()], index=index)
+    return pd.DataFrame(data, index=index)
@@ -0,0 +1,154 @@
+"""Declarative consistency-rule registry.
+
+Rules live in a JSON (or YAML) file rather than in per-case ``if`` blocks. Each rule names the
+field it checks, a condition, the message to show, a severity and an optional suggested
+correction. Conditions are compiled once into plain Python closures, so evaluating a patient is
+a walk over pre-built callables with no per-rule parsing.
+
+Condition syntax:
+
+    {"field": "ASPECTS", "op": ">=", "value": 8}
+    {"mentions": "tPA_Administered"}    # affirmed mention in the note / report (evidence.KEYWORDS)
+    {"negated": "Atrial_Fibrillation"}  # only negated mentions ("without atrial fibrillation")
+    {"all": [cond, ...]}  {"any": [cond, ...]}  {"not": cond}
+"""
+
+import json
+import operator
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("consistency_rules.json")
+
+SEVERITIES = ["low", "medium", "high"]
+
+_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda a, b: a in b,
+    "not_in": lambda a, b: a not in b,
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    tier: str
+    field: str
+    message: str
+    severity: str
+    correction: object
+    predicate: object
+    reads: frozenset = frozenset()
+
+
+# =====================================================================
+# CONDITION COMPILER
+# =====================================================================
+
+def compile_condition(cond):
+    """Turn a condition dict into a ``predicate(record, mentions) -> bool`` closure.
+
+    ``mentions`` is the ``{concept: "positive" | "negated"}`` map from ``evidence.mention_status``.
+    """
+    if "all" in cond:
+        parts = [compile_condition(c) for c in cond["all"]]
+        return lambda record, mentions: all(p(record, mentions) for p in parts)
+
+    if "any" in cond:
+        parts = [compile_condition(c) for c in cond["any"]]
+        return lambda record, mentions: any(p(record, mentions) for p in parts)
+
+    if "not" in cond:
+        inner = compile_condition(cond["not"])
+        return lambda record, mentions: not inner(record, mentions)
+
+    if "mentions" in cond:
+        concept = cond["mentions"]
+        return lambda record, mentions: mentions.get(concept) == "positive"
+
+    if "negated" in cond:
+        concept = cond["negated"]
+        return lambda record, mentions: mentions.get(concept) == "negated"
+
+    if "field" in cond:
+        field, value = cond["field"], cond["value"]
+        try:
+            op = _OPS[cond.get("op", "==")]
+        except KeyError:
+            raise ValueError(f"Unknown operator {cond['op']!r} in rule condition") from None
+        return lambda record, mentions: op(record[field], value)
+
+    raise ValueError(f"Unrecognised rule condition: {cond!r}")
+
+
+def condition_fields(cond):
+    """Extraction fields a condition reads (source-text mentions are not fields)."""
+    if "all" in cond or "any" in cond:
+        return set().union(*(condition_fields(c) for c in cond.get("all", cond.get("any"))))
+    if "not" in cond:
+        return condition_fields(cond["not"])
+    if "field" in cond:
+        return {cond["field"]}
+    return set()
+
+
+def compile_rule(spec):
+    severity = spec.get("severity", "medium")
+    if severity not in SEVERITIES:
+        raise ValueError(f"Rule {spec['name']!r}: severity must be one of {SEVERITIES}")
+    return Rule(
+        name=spec["name"],
+        tier=spec.get("tier", "RAG"),
+        field=spec["field"],
+        message=spec["message"],
+        severity=severity,
+        correction=spec.get("correction"),
+        predicate=compile_condition(spec["when"]),
+        reads=frozenset(condition_fields(spec["when"])),
+    )
+
+
+# =====================================================================
+# RULE SET
+# =====================================================================
+
+class RuleSet:
+
+    def __init__(self, rules, version="0"):
+        self.rules = list(rules)
+        self.version = str(version)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, record, mentions):
+        """Return the rules that fire for ``record`` given its source-text ``mentions``."""
+        return [rule for rule in self.rules if rule.predicate(record, mentions)]
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    path = Path(path)
+    raw = path.read_text(encoding="utf-8")
+
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is required to load YAML rule files (pip install pyyaml)") from None
+        spec = yaml.safe_load(raw)
+    else:
+        spec = json.loads(raw)
+
+    return RuleSet([compile_rule(r) for r in spec["rules"]], version=spec.get("version", "0"))
+
+
+@lru_cache(maxsize=None)
+def default_rules():
+    """The bundled rule set, compiled once per process."""
+    return load_rules(DEFAULT_RULES_PATH)
@@ -0,0 +1,270 @@
+"""Local vector index for the RAG verification tier.
+
+Neurology notes and radiology reports are split into sentences and embedded offline with signed,
+hashed word uni/bi-grams, so no model download is needed. Vectors are L2-normalised, which makes
+inner product equal to cosine similarity, in the same way as a FAISS ``IndexFlatIP``.
+
+An index on disk is a directory holding:
+  meta.json     embedding dimension
+  vectors.f32   row-major float32 vectors, append-only (memory-mapped for search)
+  spans.jsonl   one line per vector: patient_id, document content hash, document, character
+                offsets and text
+
+Adding a patient only embeds and appends that patient's sentences. Each patient's rows are
+contiguous, so per-patient searches work on a slice of the matrix. A patient is keyed on its
+documents' content hash: re-adding unchanged documents is a no-op, while amended documents are
+embedded and appended again and the patient's earlier rows become tombstones, skipped by every
+search.
+
+Vectors are written before their spans, so a crash can only leave vectors without spans (or a torn
+last span line). Opening the index drops a torn line and truncates vectors.f32 to the spans.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+EMBEDDING_DIM = 2048
+
+# Query text used to retrieve supporting evidence for each extracted field
+FIELD_QUERIES = {
+    "Age": "year-old male female",
+    "Sex": "year-old male female",
+    "Hypertension": "history of hypertension blood pressure",
+    "Diabetes": "diabetes mellitus",
+    "Dyslipidemia": "dyslipidemia hyperlipidemia cholesterol",
+    "Cardiovascular_Disease": "cardiovascular disease coronary",
+    "Atrial_Fibrillation": "atrial fibrillation",
+    "Old_CVA": "prior stroke previous stroke",
+    "Malignancy": "malignancy cancer",
+    "ESRD": "esrd end-stage renal disease dialysis",
+    "MRI_Acute_Infarct": "restricted diffusion acute infarction",
+    "MRI_No_Lesion": "no acute infarction normal mri",
+    "MRI_Other_Lesion": "mass lesion abnormal enhancement",
+    "NIHSS": "initial nihss score",
+    "ASPECTS": "acute infarction mca territory diffusion restriction cortex",
+    "tPA_Administered": "iv tpa administered thrombolysis",
+    "IA_Thrombectomy": "mechanical thrombectomy intra-arterial intervention",
+    "Weakness_Side": "weakness strength right left upper lower extremity",
+    "SBP": "vital signs bp blood pressure",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-/+][a-z0-9]+)*")
+# A sentence runs to the next newline or full stop; decimal points ("0.9 mg/kg") don't end it
+_SENTENCE_RE = re.compile(r"(?:[^.\n]|\.(?=\d))+")
+
+
+def content_hash(documents):
+    """Hash of a patient's ``{name: text}`` documents."""
+    return hashlib.sha256(json.dumps(documents, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+# =====================================================================
+# CHUNKING + EMBEDDING
+# =====================================================================
+
+def split_sentences(text):
+    """Yield ``(start, end, sentence)`` for each non-empty sentence or line in ``text``."""
+    for m in _SENTENCE_RE.finditer(text):
+        sentence = m.group().strip()
+        if len(sentence) > 2:
+            start = m.start() + (len(m.group()) - len(m.group().lstrip()))
+            yield start, start + len(sentence), sentence
+
+
+def _features(text):
+    tokens = _TOKEN_RE.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed(texts, dim=EMBEDDING_DIM):
+    """Embed a batch of texts into an (n, dim) float32 matrix of unit vectors."""
+    X = np.zeros((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for feat in _features(text):
+            h = zlib.crc32(feat.encode("utf-8"))
+            X[i, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+# =====================================================================
+# VECTOR INDEX
+# =====================================================================
+
+class VectorIndex:
+    """Flat inner-product index, kept in memory or persisted under ``path``."""
+
+    def __init__(self, path=None, dim=EMBEDDING_DIM):
+        self.path = Path(path) if path is not None else None
+        self.dim = dim
+        self.spans = []
+        self.patients = {}  # patient_id -> (first_row, end_row) of its current documents
+        self.contents = {}  # patient_id -> content hash of its current documents
+        self.dead = []  # (first_row, end_row) of superseded documents
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._live = None
+
+        if self.path is not None:
+            self._open()
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __contains__(self, patient_id):
+        return patient_id in self.patients
+
+    def _open(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_file = self.path / "meta.json"
+        if meta_file.exists():
+            self.dim = json.loads(meta_file.read_text(encoding="utf-8"))["dim"]
+        else:
+            meta_file.write_text(json.dumps({"dim": self.dim}), encoding="utf-8")
+
+        spans_file = self.path / "spans.jsonl"
+        if spans_file.exists():
+            complete = 0
+            with open(spans_file, "rb") as fh:
+                for line in fh:
+                    try:
+                        span = json.loads(line)
+                    except ValueError:
+                        # Torn last line from an interrupted append
+                        break
+                    self._track(span)
+                    complete += len(line)
+            if complete < spans_file.stat().st_size:
+                os.truncate(spans_file, complete)
+
+        # Vectors whose spans never got written (a crash between the two appends)
+        vec_file = self.path / "vectors.f32"
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        rows = vec_file.stat().st_size // row_bytes if vec_file.exists() else 0
+        if rows < len(self.spans):
+            raise ValueError(f"{vec_file}: {rows} vectors for {len(self.spans)} spans")
+        if vec_file.exists() and vec_file.stat().st_size != len(self.spans) * row_bytes:
+            os.truncate(vec_file, len(self.spans) * row_bytes)
+        self._vectors = None
+
+    def _track(self, span):
+        row = len(self.spans)
+        self.spans.append(span)
+        patient_id, content = span["patient_id"], span.get("content")
+        if patient_id in self.patients and self.contents[patient_id] == content:
+            first, _ = self.patients[patient_id]
+        else:
+            if patient_id in self.patients:
+                self.dead.append(self.patients[patient_id])
+            first = row
+        self.patients[patient_id] = (first, row + 1)
+        self.contents[patient_id] = content
+        self._live = None
+
+    def live_rows(self):
+        """Boolean mask over all rows, False for tombstoned (superseded) ones."""
+        if self._live is None:
+            live = np.ones(len(self.spans), dtype=bool)
+            for first, end in self.dead:
+                live[first:end] = False
+            self._live = live
+        return self._live
+
+    @property
+    def vectors(self):
+        if self._vectors is None:
+            vec_file = self.path / "vectors.f32"
+            if not len(self.spans):
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            else:
+                self._vectors = np.memmap(vec_file, dtype=np.float32, mode="r", shape=(len(self.spans), self.dim))
+        return self._vectors
+
+    def add_patient(self, patient_id, documents):
+        """Embed and append one patient's documents (``{name: text}``); returns the rows added.
+
+        A no-op when the patient is indexed with the same documents. Amended documents replace the
+        patient's earlier rows, which are tombstoned.
+        """
+        content = content_hash(documents)
+        if self.contents.get(patient_id) == content:
+            return 0
+
+        spans = [
+            {"patient_id": patient_id, "content": content, "document": name, "start": start, "end": end,
+             "text": sentence}
+            for name, text in documents.items()
+            for start, end, sentence in split_sentences(text)
+        ]
+        if not spans:
+            return 0
+
+        X = embed([s["text"] for s in spans], self.dim)
+
+        if self.path is None:
+            self._vectors = np.vstack([self._vectors, X])
+        else:
+            # Vectors first, spans last: the spans file decides which rows exist
+            with open(self.path / "vectors.f32", "ab") as fh:
+                fh.write(X.tobytes())
+            with open(self.path / "spans.jsonl", "a", encoding="utf-8") as fh:
+                fh.write("".join(json.dumps(s, ensure_ascii=False) + "\n" for s in spans))
+            self._vectors = None
+
+        for s in spans:
+            self._track(s)
+        return len(spans)
+
+    def search(self, queries, k=3, patient_id=None):
+        """Batched top-``k`` search. Returns, per query, a list of ``(score, span)`` best first.
+
+        With ``patient_id`` the search is restricted to that patient's own documents.
+        """
+        return self.search_vectors(embed(list(queries), self.dim), k=k, patient_id=patient_id)
+
+    def search_vectors(self, Q, k=3, patient_id=None):
+        """Same as ``search`` for an already-embedded (n_queries, dim) query matrix."""
+        first, end = self.patients.get(patient_id, (0, 0)) if patient_id is not None else (0, len(self))
+        if end <= first:
+            return [[] for _ in range(len(Q))]
+
+        sims = Q @ np.asarray(self.vectors[first:end]).T
+        if patient_id is None and self.dead:
+            live = self.live_rows()
+            sims[:, ~live] = -np.inf
+            k = min(k, int(live.sum()))
+            if not k:
+                return [[] for _ in range(len(Q))]
+        k = min(k, sims.shape[1])
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, cols in enumerate(idx):
+            cols = cols[np.argsort(-sims[row, cols])]
+            results.append([(float(sims[row, c]), self.spans[first + c]) for c in cols])
+        return results
+
+
+@lru_cache(maxsize=None)
+def _field_query_matrix(fields, dim):
+    return embed([FIELD_QUERIES[f] for f in fields], dim)
+
+
+def retrieve_evidence(index, patient_id, fields=None, k=3):
+    """Top-``k`` evidence spans from the patient's own documents for each field, in one batched query."""
+    fields = tuple(f for f in (fields or FIELD_QUERIES) if f in FIELD_QUERIES)
+    hits = index.search_vectors(_field_query_matrix(fields, index.dim), k=k, patient_id=patient_id)
+    return {
+        field: [
+            {"score": round(score, 4), "document": span["document"],
+             "start": span["start"], "end": span["end"], "text": span["text"]}
+            for score, span in field_hits
+        ]
+        for field, field_hits in zip(fields, hits)
+    }
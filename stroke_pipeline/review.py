@@ -0,0 +1,189 @@
+"""Durable human-in-the-loop review queue.
+
+Flagged patients are enqueued with a priority built from three signals:
+  - how many flags fired, and how severe they are
+  - how far the cosine similarity falls below the threshold
+  - the predicted risk of a poor outcome
+As in the study protocol, a further ``AUDIT_RATE`` of auto-acceptable patients is sampled for
+audit. The sample is deterministic per patient id, so re-runs pick the same patients.
+
+The queue is a single SQLite file in WAL mode, so several reviewer processes can share it.
+``claim`` takes the highest-priority pending item inside a ``BEGIN IMMEDIATE`` transaction, so two
+reviewers never receive the same patient. Claim is an index seek on ``(status, priority, id)``,
+O(log n) in the backlog size. Claims not completed within ``claim_timeout`` seconds can be
+handed back with ``release_expired``.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+
+from .prediction import PROBABILITY_COLUMN
+from .registry import SEVERITIES
+from .similarity import SIMILARITY_THRESHOLD
+
+AUDIT_RATE = 0.10
+
+SEVERITY_WEIGHTS = {severity: i + 1 for i, severity in enumerate(SEVERITIES)}
+FORMAT_FLAG_WEIGHT = SEVERITY_WEIGHTS["high"]
+COSINE_WEIGHT = 20.0
+RISK_WEIGHT = 5.0
+
+PENDING, CLAIMED, DONE = "pending", "claimed", "done"
+
+
+def review_priority(validation, probability, threshold=SIMILARITY_THRESHOLD):
+    """Higher means review sooner; 0 for a record with no flags, typical pattern and no risk."""
+    flags = validation.get("Flags", [])
+    score = sum(SEVERITY_WEIGHTS[flag["severity"]] for flag in flags)
+
+    # Format violations share the "Rule" messages with Rule-tier flags but carry no severity
+    format_violations = sum("❗" in msg for msg in validation["Rule"]) - sum(f["tier"] == "Rule" for f in flags)
+    score += FORMAT_FLAG_WEIGHT * format_violations
+
+    score += COSINE_WEIGHT * max(0.0, threshold - validation["CosineSimilarity"])
+    score += RISK_WEIGHT * probability
+    return round(score, 4)
+
+
+def in_audit_sample(patient_id, rate=AUDIT_RATE):
+    digest = hashlib.sha256(str(patient_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 < rate
+
+
+def needs_review(validation):
+    return "🔎" in validation["HITL"]
+
+
+class ReviewQueue:
+
+    def __init__(self, path, claim_timeout=30 * 60, audit_rate=AUDIT_RATE):
+        self.path = str(path)
+        self.claim_timeout = claim_timeout
+        self.audit_rate = audit_rate
+
+        # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+        self._db = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reviews ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " patient_id TEXT NOT NULL UNIQUE,"
+            " priority REAL NOT NULL,"
+            " reason TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " reviewer TEXT,"
+            " enqueued_at REAL NOT NULL,"
+            " claimed_at REAL,"
+            " completed_at REAL,"
+            " payload TEXT NOT NULL,"
+            " decision TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS reviews_next ON reviews (status, priority DESC, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS reviews_claims ON reviews (status, claimed_at)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def _entry(self, result):
+        """``(patient_id, priority, reason, payload)`` for a pipeline result, or None if not queued."""
+        validation = result["validation"]
+        if needs_review(validation):
+            reason = "flagged"
+            priority = review_priority(validation, result[PROBABILITY_COLUMN])
+        elif in_audit_sample(result["patient_id"], self.audit_rate):
+            # Audit items go behind every flagged case
+            reason, priority = "audit", 0.0
+        else:
+            return None
+        return str(result["patient_id"]), priority, reason, json.dumps(result, ensure_ascii=False)
+
+    def enqueue_many(self, results):
+        """Queue the results that need review or fall in the audit sample; returns how many were queued.
+
+        A patient already waiting is updated in place; one already claimed or reviewed is left alone.
+        """
+        entries = [e for e in map(self._entry, results) if e is not None]
+        if not entries:
+            return 0
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                "INSERT INTO reviews (patient_id, priority, reason, enqueued_at, payload) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (patient_id) DO UPDATE SET"
+                "  priority = excluded.priority, reason = excluded.reason, payload = excluded.payload"
+                " WHERE status = 'pending'",
+                [(pid, priority, reason, now, payload) for pid, priority, reason, payload in entries],
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return len(entries)
+
+    def enqueue(self, result):
+        return self.enqueue_many([result]) == 1
+
+    def claim(self, reviewer):
+        """Claim the highest-priority pending item; returns it as a dict, or None if the queue is empty."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                "SELECT id, patient_id, priority, reason, payload FROM reviews"
+                " WHERE status = 'pending' ORDER BY priority DESC, id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE reviews SET status = 'claimed', reviewer = ?, claimed_at = ? WHERE id = ?",
+                    (reviewer, time.time(), row[0]),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        item_id, patient_id, priority, reason, payload = row
+        return {"id": item_id, "patient_id": patient_id, "priority": priority, "reason": reason,
+                "result": json.loads(payload)}
+
+    def complete(self, item_id, reviewer, edits=None):
+        """Record the review outcome. Returns False if ``reviewer`` no longer holds the claim."""
+        cursor = self._db.execute(
+            "UPDATE reviews SET status = 'done', completed_at = ?, decision = ?"
+            " WHERE id = ? AND status = 'claimed' AND reviewer = ?",
+            (time.time(), json.dumps(edits or {}, ensure_ascii=False), item_id, reviewer),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, item_id, reviewer):
+        """Hand a claimed item back to the queue unreviewed."""
+        cursor = self._db.execute(
+            "UPDATE reviews SET status = 'pending', reviewer = NULL, claimed_at = NULL"
+            " WHERE id = ? AND status = 'claimed' AND reviewer = ?",
+            (item_id, reviewer),
+        )
+        return cursor.rowcount == 1
+
+    def release_expired(self):
+        """Return claims older than ``claim_timeout`` to the queue; returns how many were released."""
+        cursor = self._db.execute(
+            "UPDATE reviews SET status = 'pending', reviewer = NULL, claimed_at = NULL"
+            " WHERE status = 'claimed' AND claimed_at < ?",
+            (time.time() - self.claim_timeout,),
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        counts = dict(self._db.execute("SELECT status, COUNT(*) FROM reviews GROUP BY status").fetchall())
+        audit = self._db.execute("SELECT COUNT(*) FROM reviews WHERE reason = 'audit'").fetchone()[0]
+        return {"pending": counts.get(PENDING, 0), "claimed": counts.get(CLAIMED, 0),
+                "done": counts.get(DONE, 0), "audit": audit}
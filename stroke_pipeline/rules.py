@@ -0,0 +1,85 @@
+"""Columnar rule tier: evaluate the format rules of ``validate_data`` over a whole DataFrame at once.
+
+Each row is one patient with the same keys as ``extraction_results``. A ``records.RECORD_DTYPE``
+array works as well and skips the string comparisons. Every rule becomes a
+NumPy boolean mask, and the masks are packed into one ``uint32`` violation bitmap per row.
+Human-readable messages are only built when asked for.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .records import INVALID, INVALID_INT
+from .schema import BINARY_FIELDS, BINARY_VALUES, RANGE_RULES
+
+# Bit i of the bitmap corresponds to RULE_NAMES[i] / RULE_MESSAGES[i]
+RULE_NAMES = [f"{f}_binary" for f in BINARY_FIELDS] + [f"{f}_range" for f, _, _, _ in RANGE_RULES]
+RULE_MESSAGES = (
+    [f"❗ {f}: invalid binary (yes/no/unknown expected)." for f in BINARY_FIELDS]
+    + [f"❗ {message}" for _, _, _, message in RANGE_RULES]
+)
+PASS_MESSAGE = "✔ Passed all rule-based format checks."
+
+
+def extractions_to_frame(extractions):
+    """Build the columnar input from a mapping or list of extraction dicts."""
+    if isinstance(extractions, dict):
+        return pd.DataFrame.from_dict(extractions, orient="index")
+    return pd.DataFrame(list(extractions))
+
+
+def _array_masks(arr):
+    masks = np.empty((len(arr), len(RULE_NAMES)), dtype=bool)
+    col = 0
+
+    for f in BINARY_FIELDS:
+        masks[:, col] = arr[f] == INVALID
+        col += 1
+
+    for f, low, high, _ in RANGE_RULES:
+        values = arr[f]
+        masks[:, col] = (values == INVALID_INT) | (values < low) | (values > high)
+        col += 1
+
+    return masks
+
+
+def rule_masks(df):
+    """Return a (n_rows, n_rules) boolean matrix, True where a row violates a rule."""
+    if isinstance(df, np.ndarray):
+        return _array_masks(df)
+
+    masks = np.empty((len(df), len(RULE_NAMES)), dtype=bool)
+    col = 0
+
+    for f in BINARY_FIELDS:
+        masks[:, col] = ~df[f].isin(BINARY_VALUES).to_numpy()
+        col += 1
+
+    for f, low, high, _ in RANGE_RULES:
+        values = pd.to_numeric(df[f], errors="coerce").to_numpy(dtype=float)
+        # NaN (missing / non-numeric) fails both comparisons and is flagged
+        masks[:, col] = ~((values >= low) & (values <= high))
+        col += 1
+
+    return masks
+
+
+def evaluate_rules(df):
+    """Return one ``uint32`` violation bitmap per row (0 means all rules passed)."""
+    masks = rule_masks(df)
+    weights = np.left_shift(np.uint32(1), np.arange(masks.shape[1], dtype=np.uint32))
+    return masks.astype(np.uint32) @ weights
+
+
+def violation_frame(bitmap, index=None):
+    """Expand bitmaps into a boolean DataFrame with one column per rule."""
+    bits = (bitmap[:, None] >> np.arange(len(RULE_NAMES), dtype=np.uint32)) & 1
+    return pd.DataFrame(bits.astype(bool), columns=RULE_NAMES, index=index)
+
+
+def violation_messages(bits):
+    """Messages for a single row's bitmap, in the same form as ``validate_data(...)["Rule"]``."""
+    bits = int(bits)
+    msgs = [RULE_MESSAGES[i] for i in range(len(RULE_MESSAGES)) if bits >> i & 1]
+    return msgs or [PASS_MESSAGE]
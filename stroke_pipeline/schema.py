@@ -0,0 +1,36 @@
+"""Field lists and value domains of an extracted patient record."""
+
+# =====================================================================
+# EXTRACTION SCHEMA
+# =====================================================================
+
+BINARY_FIELDS = [
+    "Hypertension", "Diabetes", "Dyslipidemia", "Cardiovascular_Disease",
+    "Atrial_Fibrillation", "Old_CVA", "Malignancy", "ESRD",
+    "MRI_Acute_Infarct", "MRI_No_Lesion", "MRI_Other_Lesion",
+    "tPA_Administered", "IA_Thrombectomy"
+]
+
+INTEGER_FIELDS = ["Age", "NIHSS", "ASPECTS", "SBP"]
+
+# Every extracted variable, in the order the extraction dicts use
+EXTRACTION_FIELDS = (
+    ["Age", "Sex"]
+    + BINARY_FIELDS[:11]
+    + ["NIHSS", "ASPECTS"]
+    + BINARY_FIELDS[11:]
+    + ["Weakness_Side", "SBP"]
+)
+
+BINARY_VALUES = ["yes", "no", "unknown"]
+
+# (field, low, high, message) — values outside [low, high] are flagged
+RANGE_RULES = [
+    ("NIHSS", 0, 42, "NIHSS outside valid range."),
+    ("ASPECTS", 0, 10, "ASPECTS outside valid range."),
+    ("SBP", 40, 300, "SBP physiologically implausible."),
+]
+
+SEX_VALUES = ["male", "female"]
+
+WEAKNESS_SIDES = ["left", "right", "bilateral"]
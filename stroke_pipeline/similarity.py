@@ -0,0 +1,247 @@
+"""Cosine-similarity tier: compare extractions against a matrix of validated reference records.
+
+Each extraction is encoded as a numeric feature vector (integer fields as-is, yes/no/unknown as
+1/0/0.5, one-hot sex and weakness side), standardised with the reference set's mean and
+spread, and unit-normalised. The reference records are stored pre-normalised, so similarity
+for a whole batch is a single ``X @ R.T``.
+
+A reference is saved as ``<prefix>.npy`` (the normalised matrix, memory-mapped on load) plus
+``<prefix>.json`` (feature names, mean, scale):
+
+    python -m stroke_pipeline.similarity validated.jsonl -o reference
+
+The threshold comes from the reference's own spread. Each reference record is scored against its
+nearest other record (leave-one-out), and a record is atypical when it scores below the
+``THRESHOLD_PERCENTILE``-th percentile of those scores. By construction, about that share of
+clean records from the reference distribution is flagged. ``SIMILARITY_THRESHOLD`` is that value
+for the default reference, rounded to two decimals. The CLI prints the calibrated value for a
+newly built reference.
+"""
+
+import argparse
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from .records import INVALID_INT, to_array
+from .schema import BINARY_FIELDS, INTEGER_FIELDS, SEX_VALUES, WEAKNESS_SIDES
+from .synthetic import synthetic_extractions
+
+REFERENCE_SIZE = 200
+THRESHOLD_PERCENTILE = 5
+
+# default_reference().calibrated_threshold(): 5th percentile of leave-one-out similarity, 0.626
+SIMILARITY_THRESHOLD = 0.63
+
+FEATURE_NAMES = (
+    list(INTEGER_FIELDS)
+    + list(BINARY_FIELDS)
+    + ["Sex_male"]
+    + [f"Weakness_Side_{side}" for side in WEAKNESS_SIDES]
+)
+
+# Extraction field -> the feature-vector columns encoded from it
+FEATURE_COLUMNS = {f: [FEATURE_NAMES.index(f)] for f in list(INTEGER_FIELDS) + list(BINARY_FIELDS)}
+FEATURE_COLUMNS["Sex"] = [FEATURE_NAMES.index("Sex_male")]
+FEATURE_COLUMNS["Weakness_Side"] = [FEATURE_NAMES.index(f"Weakness_Side_{side}") for side in WEAKNESS_SIDES]
+
+# Extraction fields the feature vector reads
+FEATURE_FIELDS = list(FEATURE_COLUMNS)
+
+_BINARY_CODES = {"yes": 1.0, "no": 0.0}
+
+
+# =====================================================================
+# FEATURE ENCODING
+# =====================================================================
+
+def encode_frame(df):
+    """Encode a DataFrame of extractions (one row per patient) into an (n, d) float32 matrix."""
+    import pandas as pd
+
+    X = np.empty((len(df), len(FEATURE_NAMES)), dtype=np.float32)
+    col = 0
+
+    for f in INTEGER_FIELDS:
+        X[:, col] = pd.to_numeric(df[f], errors="coerce").fillna(0).to_numpy()
+        col += 1
+
+    for f in BINARY_FIELDS:
+        # "unknown" and anything malformed sit half-way between yes and no
+        X[:, col] = df[f].map(_BINARY_CODES).fillna(0.5).to_numpy()
+        col += 1
+
+    X[:, col] = (df["Sex"] == "male").to_numpy()
+    col += 1
+
+    for side in WEAKNESS_SIDES:
+        X[:, col] = (df["Weakness_Side"] == side).to_numpy()
+        col += 1
+
+    return X
+
+
+def encode_array(arr):
+    """Encode a ``records.RECORD_DTYPE`` array; same features as ``encode_frame``."""
+    X = np.empty((len(arr), len(FEATURE_NAMES)), dtype=np.float32)
+    col = 0
+
+    for f in INTEGER_FIELDS:
+        X[:, col] = np.where(arr[f] == INVALID_INT, 0, arr[f])
+        col += 1
+
+    for f in BINARY_FIELDS:
+        X[:, col] = np.where(arr[f] >= 0, arr[f], 0.5)
+        col += 1
+
+    X[:, col] = arr["Sex"] == SEX_VALUES.index("male")
+    col += 1
+
+    for i, _ in enumerate(WEAKNESS_SIDES):
+        X[:, col] = arr["Weakness_Side"] == i
+        col += 1
+
+    return X
+
+
+def encode_record(record):
+    """Encode one extraction dict into a (1, d) matrix without building a DataFrame."""
+    values = []
+    for f in INTEGER_FIELDS:
+        try:
+            values.append(float(record[f]))
+        except (TypeError, ValueError):
+            values.append(0.0)
+    values.extend(_BINARY_CODES.get(record[f], 0.5) for f in BINARY_FIELDS)
+    values.append(float(record["Sex"] == "male"))
+    values.extend(float(record["Weakness_Side"] == side) for side in WEAKNESS_SIDES)
+    return np.array([values], dtype=np.float32)
+
+
+def encode_records(records):
+    """Encode a list of extraction dicts (or a single dict) into an (n, d) float32 matrix."""
+    if isinstance(records, dict):
+        return encode_record(records)
+    if isinstance(records, np.ndarray):
+        return encode_array(records)
+    import pandas as pd
+
+    return encode_frame(pd.DataFrame(list(records)))
+
+
+def _unit_rows(X):
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+# =====================================================================
+# REFERENCE INDEX
+# =====================================================================
+
+class ReferenceIndex:
+
+    def __init__(self, matrix, mean, scale):
+        self.matrix = matrix
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def version(self):
+        """Content hash of the normalised matrix, mean and scale; computed once per index."""
+        if getattr(self, "_version", None) is None:
+            h = hashlib.sha256()
+            for part in (np.ascontiguousarray(self.matrix, dtype=np.float32), self.mean, self.scale):
+                h.update(np.asarray(part).tobytes())
+            self._version = h.hexdigest()[:12]
+        return self._version
+
+    @classmethod
+    def from_records(cls, records):
+        X = encode_records(records)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale < 1e-6] = 1.0
+        return cls(_unit_rows((X - mean) / scale).astype(np.float32), mean, scale)
+
+    @classmethod
+    def load(cls, prefix, mmap=True):
+        meta = json.loads(Path(f"{prefix}.json").read_text(encoding="utf-8"))
+        if meta["features"] != FEATURE_NAMES:
+            raise ValueError(f"{prefix}: reference was built with a different feature layout")
+        matrix = np.load(Path(f"{prefix}.npy"), mmap_mode="r" if mmap else None)
+        return cls(matrix, meta["mean"], meta["scale"])
+
+    def save(self, prefix):
+        np.save(Path(f"{prefix}.npy"), np.ascontiguousarray(self.matrix, dtype=np.float32))
+        meta = {"features": FEATURE_NAMES, "mean": self.mean.tolist(), "scale": self.scale.tolist()}
+        Path(f"{prefix}.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    def normalize(self, X):
+        return _unit_rows((np.asarray(X, dtype=np.float32) - self.mean) / self.scale)
+
+    def similarities(self, X):
+        """Full (n_queries, n_reference) cosine-similarity matrix."""
+        return self.normalize(X) @ self.matrix.T
+
+    def max_similarity(self, X):
+        return self.similarities(X).max(axis=1)
+
+    def leave_one_out_similarity(self, chunk=1024):
+        """Each reference record's similarity to its nearest other reference record."""
+        n = len(self)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, chunk):
+            block = np.asarray(self.matrix[start:start + chunk], dtype=np.float32) @ self.matrix.T
+            rows = np.arange(block.shape[0])
+            block[rows, start + rows] = -np.inf
+            out[start:start + block.shape[0]] = block.max(axis=1)
+        return out
+
+    def calibrated_threshold(self, percentile=THRESHOLD_PERCENTILE):
+        """Similarity below which a record is less typical than ``percentile``% of the reference."""
+        return float(np.percentile(self.leave_one_out_similarity(), percentile))
+
+    def top_k(self, X, k=5):
+        """Return (indices, similarities) of the ``k`` nearest reference records per row, best first."""
+        sims = self.similarities(X)
+        k = min(k, sims.shape[1])
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(sims, idx, axis=1)
+        order = np.argsort(-top, axis=1)
+        return np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+@lru_cache(maxsize=None)
+def default_reference():
+    """Reference set used when none is given: seeded synthetic records in the Table 1 distribution."""
+    # Packed first: synthetic values are clean, and the array encoder needs no pandas
+    return ReferenceIndex.from_records(to_array(synthetic_extractions(REFERENCE_SIZE, seed=0)))
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a cosine reference matrix from validated extractions.")
+    parser.add_argument("input", help="JSONL file with one validated extraction dict per line")
+    parser.add_argument("-o", "--output", required=True, help="Output prefix (writes <prefix>.npy and <prefix>.json)")
+    args = parser.parse_args(argv)
+
+    with open(args.input, encoding="utf-8") as fh:
+        records = [json.loads(line) for line in fh if line.strip()]
+    reference = ReferenceIndex.from_records(records)
+    reference.save(args.output)
+    print(f"Saved {len(records)} reference records → {args.output}.npy")
+    print(f"Calibrated threshold ({THRESHOLD_PERCENTILE}th percentile of leave-one-out similarity): "
+          f"{reference.calibrated_threshold():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Queryable store of batch results for the review dashboard.
+
+One SQLite row per patient holds:
+  - the summary columns the dashboard sorts and filters on (flag count, similarity, risk, ...)
+  - the full pipeline result as JSON
+  - the source documents
+
+``page`` runs the filter, sort and ``LIMIT``/``OFFSET`` in SQL against an index per sortable
+column, so the UI only ever holds one page. ``get`` loads one patient's documents and
+validation detail when a row is opened.
+
+    python -m stroke_pipeline.batch cohort.jsonl -o results.jsonl --store results.db
+"""
+
+import json
+import sqlite3
+import time
+
+from .prediction import PROBABILITY_COLUMN
+from .review import needs_review
+
+# Written in one transaction per block
+COMMIT_EVERY = 512
+
+# Summary column -> SQL type; every one is sortable and indexed
+SUMMARY_COLUMNS = {
+    "needs_review": "INTEGER",
+    "flags": "INTEGER",
+    "changes": "INTEGER",
+    "cosine": "REAL",
+    "probability": "REAL",
+    "age": "INTEGER",
+    "nihss": "INTEGER",
+    "aspects": "INTEGER",
+}
+SORT_COLUMNS = ["patient_id"] + list(SUMMARY_COLUMNS)
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summary_row(result):
+    validation = result["validation"]
+    corrected = result["corrected"]
+    return {
+        "needs_review": int(needs_review(validation)),
+        "flags": sum("❗" in msg for key in ("Rule", "RAG", "Cosine") for msg in validation[key]),
+        "changes": len(result["changes"]),
+        "cosine": validation["CosineSimilarity"],
+        "probability": result[PROBABILITY_COLUMN],
+        "age": _int_or_none(corrected.get("Age")),
+        "nihss": _int_or_none(corrected.get("NIHSS")),
+        "aspects": _int_or_none(corrected.get("ASPECTS")),
+    }
+
+
+class ResultStore:
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._db = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        columns = "".join(f" {name} {sql_type}," for name, sql_type in SUMMARY_COLUMNS.items())
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS patients ("
+            " patient_id TEXT PRIMARY KEY,"
+            f"{columns}"
+            " result TEXT NOT NULL,"
+            " neurology_note TEXT,"
+            " radiology_report TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+        for name in SUMMARY_COLUMNS:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS patients_{name} ON patients ({name}, patient_id)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM patients").fetchone()[0]
+
+    def add_many(self, results, cases=None):
+        """Insert or replace ``results``; ``cases`` (same order) supply the source documents."""
+        names = list(SUMMARY_COLUMNS)
+        sql = (
+            f"INSERT OR REPLACE INTO patients (patient_id, {', '.join(names)}, result,"
+            " neurology_note, radiology_report, updated_at)"
+            f" VALUES ({', '.join('?' * (len(names) + 5))})"
+        )
+        now = time.time()
+        rows = []
+        for i, result in enumerate(results):
+            case = cases[i] if cases is not None else {}
+            summary = summary_row(result)
+            rows.append((
+                str(result["patient_id"]), *(summary[n] for n in names), json.dumps(result, ensure_ascii=False),
+                case.get("neurology_note"), case.get("radiology_report"), now,
+            ))
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(sql, rows)
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    @staticmethod
+    def _where(needs_review=None, min_probability=None, max_cosine=None, patient_id=None):
+        clauses, params = [], []
+        if needs_review is not None:
+            clauses.append("needs_review = ?")
+            params.append(int(needs_review))
+        if min_probability is not None:
+            clauses.append("probability >= ?")
+            params.append(min_probability)
+        if max_cosine is not None:
+            clauses.append("cosine <= ?")
+            params.append(max_cosine)
+        if patient_id:
+            clauses.append("patient_id LIKE ? ESCAPE '\\'")
+            escaped = patient_id.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self._db.execute(f"SELECT COUNT(*) FROM patients{where}", params).fetchone()[0]
+
+    def page(self, offset=0, limit=50, sort="patient_id", descending=False, **filters):
+        """One page of summary rows (dicts) matching ``filters``, ordered by ``sort``.
+
+        ``filters``: needs_review (bool), min_probability, max_cosine, patient_id (substring).
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}; expected one of {SORT_COLUMNS}")
+        where, params = self._where(**filters)
+        direction = "DESC" if descending else "ASC"
+        columns = ["patient_id"] + list(SUMMARY_COLUMNS)
+        # patient_id breaks ties, so pages never overlap
+        rows = self._db.execute(
+            f"SELECT {', '.join(columns)} FROM patients{where}"
+            f" ORDER BY {sort} {direction}, patient_id {direction} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def get(self, patient_id):
+        """``{"result", "neurology_note", "radiology_report"}`` for one patient, or None."""
+        row = self._db.execute(
+            "SELECT result, neurology_note, radiology_report FROM patients WHERE patient_id = ?",
+            (str(patient_id),),
+        ).fetchone()
+        if row is None:
+            return None
+        result, note, report = row
+        return {"result": json.loads(result), "neurology_note": note, "radiology_report": report}
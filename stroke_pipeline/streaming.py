@@ -0,0 +1,421 @@
+"""Streaming ingestion: run notes through the pipeline as they arrive.
+
+Each stage is a worker reading from one bounded ``asyncio.Queue`` and writing to the next:
+
+    source → extract → rules → rag → cosine → hitl → predict → sink
+
+A slow stage fills its inbox, and the stage before it blocks on ``put``. Backpressure travels all
+the way to the source, so memory is bounded by ``queue_size`` per stage and not by the feed length.
+Extraction and prediction drain whatever is already queued (up to the LLM batch size or
+``predict_batch``), which gives batched calls under load and single calls when the feed is quiet.
+
+Sources for local testing:
+  - ``directory_source``: a spool directory with one sub-directory per patient (same layout as batch
+    mode). Write each patient under a temporary name and rename it into place when complete.
+  - ``tail_jsonl``: follows a JSONL file like ``tail -f``, one patient per line
+
+With a ``review.ReviewQueue`` the predict stage also queues flagged patients for reviewers. With a
+``calibration.CalibrationHistogram`` it also adds every patient that arrives with a 3-month outcome,
+and with a ``cohort.CohortStats`` every corrected record goes into the Table 1 aggregates. Each
+aggregate can come with a ``ledger.CountLedger`` of the patients it already counts, which are skipped.
+
+The CLI is restartable. Patients already in the output file are skipped (a line torn by a crash is
+cut off and that patient runs again), and the aggregates are saved every ``CHECKPOINT_SECONDS``
+and again on exit, including Ctrl-C or a failing stage.
+
+    python -m stroke_pipeline.streaming spool/ -o results.jsonl --idle-timeout 30
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import time
+from pathlib import Path
+
+from .batch import NOTE_FILE, RADIOLOGY_FILE, print_stage_summary, read_patient_dir
+from .calibration import CALIBRATION_KIND, CalibrationHistogram, poor_outcome, print_summary as print_calibration
+from .cohort import CohortStats, count_patient
+from .extraction import DEFAULT_MODEL, Extractor, OpenAICompatibleBackend
+from .ledger import CountLedger
+from .prediction import PROBABILITY_COLUMN, default_model
+from .profiling import PROFILER, span, trace_memory
+from .records import fill_missing
+from .registry import default_rules
+from .review import ReviewQueue
+from .similarity import SIMILARITY_THRESHOLD
+from .validation import (
+    FORMAT_CHECKS, assemble_validation, hitl_correction, record_similarity, source_mentions,
+)
+
+QUEUE_SIZE = 64
+PREDICT_BATCH = 64
+
+# Seconds between saves of the calibration and cohort aggregates while streaming
+CHECKPOINT_SECONDS = 30.0
+
+STAGES = ["extract", "rules", "rag", "cosine", "hitl", "predict"]
+
+_DONE = object()
+
+
+# =====================================================================
+# SOURCES
+# =====================================================================
+
+async def directory_source(path, poll_interval=1.0, idle_timeout=None, skip=()):
+    """Yield a case for each complete patient sub-directory, including ones created later.
+
+    Sub-directories named in ``skip`` (patients already processed) are never read.
+    """
+    path = Path(path)
+    seen = set(skip)
+    idle = 0.0
+    while True:
+        ready = sorted(
+            p for p in path.iterdir()
+            if p.is_dir() and p.name not in seen and (p / NOTE_FILE).exists() and (p / RADIOLOGY_FILE).exists()
+        )
+        for patient_dir in ready:
+            seen.add(patient_dir.name)
+            yield read_patient_dir(patient_dir)
+
+        idle = 0.0 if ready else idle + poll_interval
+        if idle_timeout is not None and idle >= idle_timeout:
+            return
+        await asyncio.sleep(poll_interval)
+
+
+async def tail_jsonl(path, poll_interval=1.0, idle_timeout=None, skip=()):
+    """Yield one case per line appended to ``path``, starting from the beginning of the file.
+
+    Cases whose patient_id is in ``skip`` (patients already processed) are passed over.
+    """
+    skip = set(skip)
+    idle = 0.0
+    partial = ""
+    with open(path, encoding="utf-8") as fh:
+        while True:
+            chunk = fh.readline()
+            if chunk:
+                idle = 0.0
+                partial += chunk
+                # A writer may flush half a line; wait for the newline
+                if partial.endswith("\n"):
+                    if partial.strip():
+                        case = json.loads(partial)
+                        if str(case.get("patient_id")) not in skip:
+                            yield case
+                    partial = ""
+                continue
+
+            idle += poll_interval
+            if idle_timeout is not None and idle >= idle_timeout:
+                return
+            await asyncio.sleep(poll_interval)
+
+
+# =====================================================================
+# STAGES
+# =====================================================================
+
+async def _take(inbox, limit):
+    """Wait for one item, then drain up to ``limit`` already queued; stops at end-of-stream."""
+    items = [await inbox.get()]
+    while len(items) < limit and items[-1] is not _DONE and not inbox.empty():
+        items.append(inbox.get_nowait())
+    if items[-1] is _DONE:
+        items.pop()
+        # Leave the marker for sibling workers of the same stage
+        inbox.put_nowait(_DONE)
+        return items, True
+    return items, False
+
+
+async def _run_stage(fn, inbox, outbox, workers=1, batch=1):
+    remaining = workers
+
+    async def worker():
+        nonlocal remaining
+        while True:
+            items, done = await _take(inbox, batch)
+            if items:
+                results = fn(items)
+                if inspect.isawaitable(results):
+                    results = await results
+                for item in results:
+                    await outbox.put(item)
+            if done:
+                break
+        remaining -= 1
+        if remaining == 0:
+            await outbox.put(_DONE)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+def _each(fn):
+    return lambda items: [fn(item) for item in items]
+
+
+class StreamingPipeline:
+
+    def __init__(self, extractor=None, rules=None, reference=None, model=None, review_queue=None,
+                 calibration=None, cohort_stats=None, threshold=SIMILARITY_THRESHOLD, queue_size=QUEUE_SIZE,
+                 predict_batch=PREDICT_BATCH, calibration_ledger=None, cohort_ledger=None):
+        self.extractor = extractor
+        self.review_queue = review_queue
+        self.calibration = calibration
+        self.calibration_ledger = calibration_ledger
+        self.cohort_ledger = cohort_ledger
+        self.cohort_stats = cohort_stats
+        self.rules = rules or default_rules()
+        self.reference = reference
+        self.model = model or default_model()
+        self.threshold = threshold
+        self.queue_size = queue_size
+        self.predict_batch = predict_batch
+        self.queues = {}
+
+    # ---- stage functions; each takes and returns the per-patient state dict ----
+
+    async def _extract(self, cases):
+        missing = [c for c in cases if "extraction" not in c]
+        if missing:
+            if self.extractor is None:
+                raise ValueError(f"Patient {missing[0]['patient_id']!r} has no extraction and no extractor is configured")
+            extracted = await self.extractor.extract_many(
+                [(c["patient_id"], c["neurology_note"], c["radiology_report"]) for c in missing]
+            )
+            for case in missing:
+                case["extraction"] = extracted[case["patient_id"]]
+        for case in cases:
+            case["extraction"] = fill_missing(case["extraction"])
+        return cases
+
+    def _rules(self, state):
+        with span("rules", state["patient_id"]):
+            state["format_msgs"] = [check(state["extraction"]) for _, _, check in FORMAT_CHECKS]
+        return state
+
+    def _rag(self, state):
+        with span("rag", state["patient_id"]):
+            mentions = source_mentions(state["neurology_note"], state["radiology_report"])
+            state["fired"] = self.rules.evaluate(state["extraction"], mentions)
+        return state
+
+    def _cosine(self, state):
+        with span("cosine", state["patient_id"]):
+            state["similarity"] = record_similarity(state["extraction"], self.reference)
+        return state
+
+    def _hitl(self, state):
+        validation = assemble_validation(state.pop("format_msgs"), state.pop("fired"), state.pop("similarity"),
+                                         self.threshold)
+        corrected, changed, changes = hitl_correction(
+            state["patient_id"], state["extraction"], validation, state.get("reviewer_edits")
+        )
+        result = {
+            "patient_id": state["patient_id"],
+            "extraction": state["extraction"],
+            "validation": validation,
+            "corrected": corrected,
+            "changed": changed,
+            "changes": changes,
+        }
+        outcome = poor_outcome(state)
+        if outcome is not None:
+            result["outcome"] = outcome
+        return result
+
+    def _predict(self, results):
+        with span("predict_batch"):
+            probs = self.model.predict_records([r["corrected"] for r in results])
+        for result, prob in zip(results, probs):
+            result[PROBABILITY_COLUMN] = float(prob)
+        if self.review_queue is not None:
+            self.review_queue.enqueue_many(results)
+        if self.calibration is not None:
+            ledger = self.calibration_ledger
+            labelled = [r for r in results if "outcome" in r
+                        and (ledger is None or ledger.claim(CALIBRATION_KIND, r["patient_id"]))]
+            if labelled:
+                self.calibration.update([r[PROBABILITY_COLUMN] for r in labelled], [r["outcome"] for r in labelled])
+        if self.cohort_stats is not None:
+            for r in results:
+                count_patient(self.cohort_stats, r["corrected"], r.get("outcome"), r["patient_id"], self.cohort_ledger)
+        return results
+
+    # ---- wiring ----
+
+    async def _feed(self, source, outbox):
+        async for case in source:
+            await outbox.put(dict(case))
+        await outbox.put(_DONE)
+
+    async def stream(self, source):
+        """Yield finished results (in completion order) for every case produced by ``source``."""
+        self.queues = {name: asyncio.Queue(self.queue_size) for name in STAGES + ["out"]}
+        q = self.queues
+        extract_workers = self.extractor.concurrency if self.extractor else 1
+        extract_batch = self.extractor.batch_size if self.extractor else 1
+
+        tasks = [
+            asyncio.create_task(self._feed(source, q["extract"])),
+            asyncio.create_task(_run_stage(self._extract, q["extract"], q["rules"], extract_workers, extract_batch)),
+            asyncio.create_task(_run_stage(_each(self._rules), q["rules"], q["rag"])),
+            asyncio.create_task(_run_stage(_each(self._rag), q["rag"], q["cosine"])),
+            asyncio.create_task(_run_stage(_each(self._cosine), q["cosine"], q["hitl"])),
+            asyncio.create_task(_run_stage(_each(self._hitl), q["hitl"], q["predict"])),
+            asyncio.create_task(_run_stage(self._predict, q["predict"], q["out"], batch=self.predict_batch)),
+        ]
+        running = set(tasks)
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(q["out"].get())
+                while not getter.done():
+                    # Also wake up when a stage dies, instead of waiting on its queue forever
+                    done, _ = await asyncio.wait(running | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done - {getter}:
+                        running.discard(task)
+                        task.result()
+                item = getter.result()
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            if getter is not None:
+                getter.cancel()
+            for task in tasks:
+                task.cancel()
+
+    def depths(self):
+        """Current queue depth per stage inbox; a persistently full inbox marks the bottleneck."""
+        return {name: queue.qsize() for name, queue in self.queues.items()}
+
+
+def processed_ids(path):
+    """patient_ids already written to a results JSONL file; empty if it does not exist yet."""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    ids = set()
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                ids.add(str(json.loads(line)["patient_id"]))
+            except (ValueError, KeyError):
+                # A line cut short by a crash; that patient is processed again
+                continue
+    return ids
+
+
+def _truncate_torn_line(path):
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "rb+") as fh:
+        data = fh.read()
+        if data and not data.endswith(b"\n"):
+            fh.truncate(data.rfind(b"\n") + 1)
+
+
+async def run_to_jsonl(pipeline, source, path, checkpoint=None, checkpoint_seconds=CHECKPOINT_SECONDS):
+    """Append each result to ``path`` as soon as it is ready; returns the number written.
+
+    ``checkpoint()``, if given, is called after a result whenever ``checkpoint_seconds`` have passed.
+    A torn last line left by a crash is cut off first, so the next result starts on a line of its own.
+    """
+    _truncate_torn_line(path)
+    count = 0
+    last = time.monotonic()
+    with open(path, "a", encoding="utf-8") as fh:
+        async for result in pipeline.stream(source):
+            fh.write(json.dumps(result, ensure_ascii=False) + "\n")
+            fh.flush()
+            count += 1
+            if checkpoint is not None and time.monotonic() - last >= checkpoint_seconds:
+                checkpoint()
+                last = time.monotonic()
+    return count
+
+
+# =====================================================================
+# CLI
+# =====================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream patients from a spool directory or JSONL feed.")
+    parser.add_argument("source", help="Spool directory (one sub-directory per patient) or a JSONL file to follow")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Stop after this many idle seconds")
+    parser.add_argument("--review-queue", default=None, help="SQLite review queue for flagged and audit-sampled patients")
+    parser.add_argument("--calibration", default=None,
+                        help="Calibration histogram JSON, updated with patients that carry a 3-month outcome")
+    parser.add_argument("--cohort-stats", default=None, help="Table 1 aggregates JSON, updated with every corrected record")
+    parser.add_argument("--trace", default=None, help="Write per-stage timings as a Chrome trace JSON on exit")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record peak memory per stage with tracemalloc (slows the run; also STROKE_TRACE_MEMORY=1)")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE, help="Capacity of each stage queue")
+    parser.add_argument("--llm-url", default=None, help="OpenAI-compatible server for patients without an extraction")
+    parser.add_argument("--llm-model", default=DEFAULT_MODEL)
+    parser.add_argument("--llm-batch-size", type=int, default=4)
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+    if args.trace_memory:
+        trace_memory()
+
+    extractor = None
+    if args.llm_url:
+        backend = OpenAICompatibleBackend(args.llm_url, model=args.llm_model)
+        extractor = Extractor(backend, batch_size=args.llm_batch_size, concurrency=args.llm_concurrency)
+
+    # A restart picks up where the output file ends
+    done = processed_ids(args.output)
+    source_path = Path(args.source)
+    if source_path.is_dir():
+        source = directory_source(source_path, args.poll_interval, args.idle_timeout, skip=done)
+    else:
+        source = tail_jsonl(source_path, args.poll_interval, args.idle_timeout, skip=done)
+
+    review_queue = ReviewQueue(args.review_queue) if args.review_queue else None
+    calibration = CalibrationHistogram.load(args.calibration) if args.calibration else None
+    calibration_ledger = CountLedger.beside(args.calibration) if args.calibration else None
+    cohort_stats = CohortStats.load(args.cohort_stats) if args.cohort_stats else None
+    cohort_ledger = CountLedger.beside(args.cohort_stats) if args.cohort_stats else None
+    pipeline = StreamingPipeline(extractor=extractor, review_queue=review_queue, calibration=calibration,
+                                 cohort_stats=cohort_stats, queue_size=args.queue_size,
+                                 calibration_ledger=calibration_ledger, cohort_ledger=cohort_ledger)
+
+    def checkpoint():
+        # Each ledger is committed only once its aggregate is on disk
+        if calibration is not None:
+            calibration.save(args.calibration)
+            calibration_ledger.commit()
+        if cohort_stats is not None:
+            cohort_stats.save(args.cohort_stats)
+            cohort_ledger.commit()
+
+    try:
+        n = asyncio.run(run_to_jsonl(pipeline, source, args.output, checkpoint))
+    finally:
+        checkpoint()
+        for ledger in (calibration_ledger, cohort_ledger):
+            if ledger is not None:
+                ledger.close()
+        if review_queue is not None:
+            review_queue.close()
+
+    if calibration is not None:
+        print_calibration(calibration)
+    if args.trace:
+        PROFILER.dump_chrome_trace(args.trace)
+        print_stage_summary(PROFILER.summary())
+    skipped = f" ({len(done):,} already in the output)" if done else ""
+    print(f"Processed {n} patients{skipped} → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Seeded synthetic extractions matching the Table 1 cohort distributions.
+
+Used as the default cosine reference set when no site-validated records are available,
+as training data for the default outcome model, and (with generated notes and reports) for
+benchmarks and load testing. Rates not reported in Table 1 (dyslipidemia, prior stroke, ...) are
+plausible placeholders.
+"""
+
+import numpy as np
+
+from .schema import BINARY_FIELDS
+
+# Table 1 (n=1,166)
+AGE_MEAN, AGE_SD = 65.68, 15.90
+MALE_RATE = 0.562
+NIHSS_BUCKETS = [(0, 0), (1, 4), (5, 15), (16, 20), (21, 42)]
+NIHSS_BUCKET_RATES = [0.254, 0.403, 0.263, 0.057, 0.023]
+MRI_INFARCT_RATE = 0.594
+
+# Marginal rates for binary history / treatment fields
+BINARY_RATES = {
+    "Hypertension": 0.574,
+    "Diabetes": 0.244,
+    "Atrial_Fibrillation": 0.149,
+    "Dyslipidemia": 0.25,
+    "Cardiovascular_Disease": 0.10,
+    "Old_CVA": 0.15,
+    "Malignancy": 0.05,
+    "ESRD": 0.03,
+}
+TPA_RATE = 0.090
+IA_RATE = 0.075
+POOR_OUTCOME_RATE = 0.284
+
+# Log-odds of poor outcome (mRS 3-6) per unit; the intercept is solved to hit POOR_OUTCOME_RATE
+OUTCOME_LOG_ODDS = {
+    "Age": 0.035,
+    "NIHSS": 0.16,
+    "ASPECTS": -0.30,
+    "Hypertension": 0.20,
+    "Diabetes": 0.25,
+    "Atrial_Fibrillation": 0.50,
+    "tPA_Administered": -0.45,
+    "IA_Thrombectomy": -0.40,
+}
+
+
+def _yes_no(mask):
+    return np.where(mask, "yes", "no")
+
+
+def synthetic_columns(n, seed=0):
+    """Return the synthetic cohort as a dict of NumPy columns keyed by extraction field."""
+    rng = np.random.default_rng(seed)
+
+    age = np.clip(np.rint(rng.normal(AGE_MEAN, AGE_SD, n)), 18, 100).astype(int)
+    sex = np.where(rng.random(n) < MALE_RATE, "male", "female")
+
+    bucket = rng.choice(len(NIHSS_BUCKETS), size=n, p=NIHSS_BUCKET_RATES)
+    low = np.array([b[0] for b in NIHSS_BUCKETS])[bucket]
+    high = np.array([b[1] for b in NIHSS_BUCKETS])[bucket]
+    nihss = rng.integers(low, high + 1)
+
+    infarct = rng.random(n) < MRI_INFARCT_RATE
+    no_lesion = ~infarct & (rng.random(n) < 0.8)
+    other_lesion = ~infarct & ~no_lesion
+
+    # Larger deficits go with lower ASPECTS; no infarct means a normal score
+    aspects = np.where(infarct, np.clip(10 - rng.poisson(0.8 + nihss / 8), 0, 10), 10)
+
+    # Treatment only for patients with an acute infarct, scaled to hit the cohort-wide rate
+    tpa = infarct & (rng.random(n) < TPA_RATE / MRI_INFARCT_RATE)
+    ia = infarct & (rng.random(n) < IA_RATE / MRI_INFARCT_RATE)
+
+    cols = {"Age": age, "Sex": sex}
+    for f in BINARY_FIELDS:
+        if f in BINARY_RATES:
+            cols[f] = _yes_no(rng.random(n) < BINARY_RATES[f])
+    cols.update({
+        "MRI_Acute_Infarct": _yes_no(infarct),
+        "MRI_No_Lesion": _yes_no(no_lesion),
+        "MRI_Other_Lesion": _yes_no(other_lesion),
+        "NIHSS": nihss,
+        "ASPECTS": aspects,
+        "tPA_Administered": _yes_no(tpa),
+        "IA_Thrombectomy": _yes_no(ia),
+        "Weakness_Side": rng.choice(["left", "right", "bilateral"], size=n, p=[0.45, 0.45, 0.10]),
+        "SBP": np.clip(np.rint(rng.normal(155, 25, n)), 80, 260).astype(int),
+    })
+    return cols
+
+
+def _records(cols):
+    keys = list(cols)
+    rows = zip(*(cols[k].tolist() for k in keys))
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def synthetic_extractions(n, seed=0):
+    """Return ``n`` synthetic extraction dicts in the same shape as ``extraction_results``."""
+    return _records(synthetic_columns(n, seed))
+
+
+def _outcome_logits(cols):
+    logits = np.zeros(len(cols["Age"]))
+    for f, weight in OUTCOME_LOG_ODDS.items():
+        x = cols[f] == "yes" if cols[f].dtype.kind == "U" else cols[f].astype(float)
+        logits += weight * x
+    return logits
+
+
+def synthetic_outcomes(cols, seed=0):
+    """Draw poor-outcome labels (1 = mRS 3-6) for a synthetic cohort at the Table 1 rate."""
+    rng = np.random.default_rng(seed)
+    logits = _outcome_logits(cols)
+
+    # Bisect the intercept so the expected poor-outcome rate matches the cohort
+    lo, hi = -20.0, 20.0
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if np.mean(1 / (1 + np.exp(-(logits + mid)))) < POOR_OUTCOME_RATE:
+            lo = mid
+        else:
+            hi = mid
+    p = 1 / (1 + np.exp(-(logits + lo)))
+    return (rng.random(len(p)) < p).astype(np.int8)
+
+
+def synthetic_cohort(n, seed=0):
+    """Return ``(extractions, outcomes)`` for ``n`` synthetic patients."""
+    cols = synthetic_columns(n, seed)
+    return _records(cols), synthetic_outcomes(cols, seed)
+
+
+# =====================================================================
+# SYNTHETIC NOTES AND REPORTS
+# =====================================================================
+
+HISTORY_TERMS = {
+    "Hypertension": "hypertension",
+    "Diabetes": "diabetes mellitus",
+    "Dyslipidemia": "dyslipidemia",
+    "Cardiovascular_Disease": "coronary artery disease",
+    "Atrial_Fibrillation": "atrial fibrillation",
+    "Old_CVA": "prior stroke",
+    "Malignancy": "malignancy",
+    "ESRD": "ESRD on hemodialysis",
+}
+
+WEAKNESS_PHRASES = {
+    "left": "left-sided arm and leg weakness",
+    "right": "right-sided arm and leg weakness",
+    "bilateral": "bilateral leg weakness",
+}
+
+# Fields an extraction error is injected into, and the wrong value used
+ERROR_VALUES = {
+    "tPA_Administered": {"yes": "no", "no": "yes"},
+    "Hypertension": {"yes": "no", "no": "yes"},
+    "Weakness_Side": {"left": "right", "right": "left", "bilateral": "left"},
+}
+ERROR_RATE = 0.05
+
+
+def _join(terms):
+    return terms[0] if len(terms) == 1 else ", ".join(terms[:-1]) + " and " + terms[-1]
+
+
+def synthetic_note(record):
+    """Neurology note consistent with ``record``."""
+    sex = "male" if record["Sex"] == "male" else "female"
+    present = [term for f, term in HISTORY_TERMS.items() if record[f] == "yes"]
+    absent = [term for f, term in HISTORY_TERMS.items() if record[f] != "yes"]
+
+    history = f"a history of {_join(present)}" if present else "no significant past medical history"
+    if present and absent:
+        history += f", but without {_join(absent)}"
+
+    lines = [
+        f"A {record['Age']}-year-old {sex} with {history}, presented with sudden "
+        f"{WEAKNESS_PHRASES[record['Weakness_Side']]}.",
+        f"On arrival, BP {record['SBP']}/88, HR 80. Initial NIHSS score was {record['NIHSS']}.",
+    ]
+    if record["tPA_Administered"] == "yes":
+        lines.append("IV tPA was administered at a dose of 0.9 mg/kg.")
+    else:
+        lines.append("No IV tPA was given due to clinical judgment.")
+    if record["IA_Thrombectomy"] == "yes":
+        lines.append("Mechanical thrombectomy of the occluded segment was performed.")
+    return "\n".join(lines) + "\n"
+
+
+def synthetic_report(record):
+    """MRI report consistent with ``record``."""
+    if record["MRI_Acute_Infarct"] == "yes":
+        findings = (f"DWI shows restricted diffusion in the MCA territory, ASPECTS {record['ASPECTS']}.\n"
+                    "Conclusion:\nFindings consistent with acute ischemic infarction.")
+    elif record["MRI_Other_Lesion"] == "yes":
+        findings = "Chronic small vessel change in the periventricular white matter.\nConclusion:\nNo acute lesion."
+    else:
+        findings = "Gray-white differentiation preserved.\nConclusion:\nNormal MRI brain."
+    return f"MRI BRAIN WITHOUT CONTRAST\nFindings:\n{findings}\n"
+
+
+def synthetic_cases(n, seed=0, error_rate=ERROR_RATE):
+    """Return ``n`` batch-mode cases (notes, report, extraction, outcome) for load testing.
+
+    Notes and reports are written from the true record. ``error_rate`` of the extractions then get
+    one field wrong, as in the demo cases, so the RAG and HITL paths see realistic traffic.
+    """
+    records, outcomes = synthetic_cohort(n, seed)
+    rng = np.random.default_rng(seed + 1)
+    wrong = rng.random(n) < error_rate
+    fields = rng.choice(list(ERROR_VALUES), size=n)
+
+    cases = []
+    for i, (record, outcome) in enumerate(zip(records, outcomes)):
+        extraction = dict(record)
+        if wrong[i]:
+            field = fields[i]
+            extraction[field] = ERROR_VALUES[field][record[field]]
+        cases.append({
+            "patient_id": f"SYN-{seed}-{i:06d}",
+            "neurology_note": synthetic_note(record),
+            "radiology_report": synthetic_report(record),
+            "extraction": extraction,
+            "outcome": int(outcome),
+        })
+    return cases
@@ -0,0 +1,131 @@
+"""Validation and HITL correction for a single extracted record."""
+
+from .evidence import mention_status, scan_documents
+from .profiling import span
+from .registry import default_rules
+from .schema import BINARY_FIELDS, BINARY_VALUES, RANGE_RULES
+from .similarity import SIMILARITY_THRESHOLD, default_reference, encode_records
+
+# =====================================================================
+# FORMAT CHECKS
+# =====================================================================
+
+def _binary_check(field):
+    msg = f"❗ {field}: invalid binary (yes/no/unknown expected)."
+    return lambda record: None if record[field] in BINARY_VALUES else msg
+
+
+def _range_check(field, low, high, message):
+    msg = f"❗ {message}"
+    return lambda record: None if low <= record[field] <= high else msg
+
+
+# (name, field read, check(record) -> message or None); names match rules.RULE_NAMES
+FORMAT_CHECKS = (
+    [(f"{f}_binary", f, _binary_check(f)) for f in BINARY_FIELDS]
+    + [(f"{f}_range", f, _range_check(f, low, high, message)) for f, low, high, message in RANGE_RULES]
+)
+
+# =====================================================================
+# VALIDATION LOGIC
+# =====================================================================
+
+def source_mentions(note_text, radiology_text):
+    # One pass per document; negated mentions ("No IV tPA") are not treated as positives
+    return mention_status(scan_documents({"neurology_note": note_text, "radiology_report": radiology_text}))
+
+
+def record_similarity(extracted, reference=None):
+    reference = reference or default_reference()
+    return float(reference.max_similarity(encode_records(extracted))[0])
+
+
+def assemble_validation(format_msgs, fired, similarity, threshold=SIMILARITY_THRESHOLD):
+    """Build the ``validate_data`` result from per-check outcomes."""
+    val = {}
+
+    rule_msgs = [msg for msg in format_msgs if msg]
+    rule_msgs.extend(f"❗ {r.message}" for r in fired if r.tier == "Rule")
+    rag = [f"❗ {r.message}" for r in fired if r.tier == "RAG"]
+
+    if not rule_msgs:
+        rule_msgs.append("✔ Passed all rule-based format checks.")
+
+    if not rag:
+        rag.append("✔ No semantic mismatch.")
+
+    val["Rule"] = rule_msgs
+    val["RAG"] = rag
+    val["Flags"] = [
+        {"rule": r.name, "tier": r.tier, "field": r.field, "severity": r.severity, "correction": r.correction}
+        for r in fired
+    ]
+
+    # ---- Cosine similarity vs validated reference records ----
+    cos = []
+    sim = round(float(similarity), 4)
+
+    if sim < threshold:
+        cos.append(f"❗ Cosine similarity {sim:.2f} → atypical pattern")
+    else:
+        cos.append(f"✔ Cosine similarity {sim:.2f} → typical pattern")
+
+    val["Cosine"] = cos
+    val["CosineSimilarity"] = sim
+
+    flagged = any("❗" in msg for key in ["Rule", "RAG", "Cosine"] for msg in val[key])
+    val["HITL"] = "🔎 Needs manual review." if flagged else "✔ Auto-acceptable."
+
+    return val
+
+
+def validate_data(selected, extracted, note_text, radiology_text, rules=None,
+                  reference=None, threshold=SIMILARITY_THRESHOLD, similarity=None):
+
+    rules = rules or default_rules()
+
+    # ---- Binary / range format checks ----
+    with span("rules", selected):
+        format_msgs = [check(extracted) for _, _, check in FORMAT_CHECKS]
+
+    # ---- Registry checks (cross-field + RAG) ----
+    with span("rag", selected):
+        mentions = source_mentions(note_text, radiology_text)
+        fired = rules.evaluate(extracted, mentions)
+
+    # ---- Cosine similarity ----
+    # (batch callers pass ``similarity`` precomputed for the whole cohort in one matmul)
+    if similarity is None:
+        with span("cosine", selected):
+            similarity = record_similarity(extracted, reference)
+
+    return assemble_validation(format_msgs, fired, similarity, threshold)
+
+# =====================================================================
+# HITL ASSISTED CORRECTION MODULE
+# =====================================================================
+
+def hitl_correction(selected, extracted, validation, reviewer_edits=None):
+    with span("hitl", selected):
+        return _hitl_correction(extracted, validation, reviewer_edits)
+
+
+def _hitl_correction(extracted, validation, reviewer_edits):
+
+    corrected = extracted.copy()
+
+    # Suggested corrections from fired rules, then anything the reviewer set by hand
+    # (reviewer edits apply whether or not the record was flagged)
+    edits = {}
+    if "❗" in str(validation):
+        edits = {f["field"]: f["correction"] for f in validation.get("Flags", []) if f["correction"] is not None}
+    edits.update(reviewer_edits or {})
+
+    changes = {}
+    for field, value in edits.items():
+        if extracted[field] != value:
+            corrected[field] = value
+            changes[field] = {"from": extracted[field], "to": value}
+
+    return corrected, len(changes) > 0, changes
+
@@ -0,0 +1,100 @@
+"""SHAP attributions: exact weights, efficiency (sum to logit - base_value), additive = coalition."""
+
+from itertools import permutations
+from math import factorial
+
+import numpy as np
+import pytest
+
+from stroke_pipeline.attribution import Attributor, _coalition_shapley, _coalitions, _logit
+from stroke_pipeline.batch import attach_attributions
+from stroke_pipeline.prediction import _TabularModel, _sigmoid, default_model, feature_matrix
+from stroke_pipeline.synthetic import synthetic_extractions
+
+
+class InteractionModel(_TabularModel):
+    """Not additive in log-odds, so attributions go through the coalition path."""
+
+    kind = "interaction"
+
+    def _fit(self, Z, y):
+        pass
+
+    def _predict(self, Z):
+        return _sigmoid(Z[:, 0] * Z[:, 1] - 0.5 * Z[:, 2] + 0.3 * Z[:, 3] ** 2)
+
+
+@pytest.fixture(scope="module")
+def patients():
+    return synthetic_extractions(40, seed=5)
+
+
+def test_coalition_weights_are_exact_shapley_weights():
+    d = 4
+    masks, weights = _coalitions(d)
+    # phi_j = sum over orderings of the marginal contribution of j, for a random set function
+    v = np.random.default_rng(0).normal(size=2 ** d)
+    index = {tuple(m): i for i, m in enumerate(masks.tolist())}
+    phi = np.zeros(d)
+    for order in permutations(range(d)):
+        present = [False] * d
+        for j in order:
+            before = v[index[tuple(present)]]
+            present[j] = True
+            phi[j] += v[index[tuple(present)]] - before
+    np.testing.assert_allclose(v @ weights, phi / factorial(d))
+
+
+@pytest.mark.parametrize("kind", ["logistic", "gbm"])
+def test_additive_attributions_sum_to_logit_minus_base(kind, patients):
+    attributor = Attributor(default_model(kind))
+    phi = attributor.explain_records(patients)
+    logits = _logit(attributor.model.predict_records(patients))
+    np.testing.assert_allclose(phi.sum(axis=1), logits - attributor.base_value, atol=1e-9)
+
+
+@pytest.mark.parametrize("kind", ["logistic", "gbm"])
+def test_additive_path_equals_coalition_path(kind, patients):
+    attributor = Attributor(default_model(kind))
+    Z = attributor.model._prepare(feature_matrix(patients[:8], attributor.features))
+    np.testing.assert_allclose(attributor.explain_records(patients[:8]),
+                               _coalition_shapley(attributor.model, Z, attributor.background), atol=1e-9)
+
+
+def test_coalition_attributions_sum_to_logit_minus_base(patients):
+    X = feature_matrix(patients, default_model("logistic").features)
+    model = InteractionModel(default_model("logistic").features).fit(X, np.zeros(len(X)))
+    attributor = Attributor(model, background=X[:20])
+    assert not attributor.exact_additive
+    phi = attributor.explain(X)
+    np.testing.assert_allclose(phi.sum(axis=1), _logit(model.predict_proba(X)) - attributor.base_value, atol=1e-9)
+
+
+def test_explain_serves_repeats_from_the_cache(patients):
+    attributor = Attributor(default_model("logistic"))
+    first = attributor.explain_records(patients)
+    size = attributor.cache_size()
+    np.testing.assert_array_equal(attributor.explain_records(patients + patients), np.vstack([first, first]))
+    assert attributor.cache_size() == size
+
+
+def test_cache_is_bounded_and_missing_values_still_hit(patients):
+    attributor = Attributor(default_model("logistic"), max_entries=10)
+    attributor.explain_records(patients)
+    assert attributor.cache_size() == 10
+
+    record = {**patients[0], "NIHSS": -1, "SBP": -1}
+    first = attributor.explain_one(record)
+    size = attributor.cache_size()
+    assert attributor.explain_one(record) == first
+    assert attributor.cache_size() == size
+    assert list(first) == attributor.features
+
+
+def test_batch_attributions_match_one_at_a_time(patients):
+    attributor = Attributor(default_model("gbm"))
+    results = [{"patient_id": i, "corrected": record} for i, record in enumerate(patients[:12])]
+    results = list(attach_attributions(results, attributor, block=5))
+    fresh = Attributor(default_model("gbm"))
+    for result in results:
+        assert result["attributions"] == pytest.approx(fresh.explain_one(result["corrected"]), abs=1e-12)
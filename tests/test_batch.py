@@ -0,0 +1,71 @@
+"""Batch mode: cohort loading, the per-patient pipeline and result output."""
+
+import csv
+import json
+
+import pytest
+
+from stroke_pipeline.batch import _coerce_integer, load_cohort, run_batch, write_results
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+from stroke_pipeline.records import from_array, to_array
+from stroke_pipeline.schema import EXTRACTION_FIELDS
+from stroke_pipeline.synthetic import synthetic_cases
+
+
+@pytest.fixture
+def cases():
+    return synthetic_cases(12, seed=5)
+
+
+@pytest.mark.parametrize("cell, value", [("12", 12), (" 7 ", 7), ("3.0", 3), ("", -1), (None, -1),
+                                         ("unknown", -1), ("n/a", -1), ("N/A", -1), ("nan", -1), ("inf", -1)])
+def test_coerce_integer(cell, value):
+    assert _coerce_integer(cell) == value
+
+
+def test_csv_with_non_numeric_cells_loads(cases, tmp_path):
+    path = tmp_path / "cohort.csv"
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, ["patient_id", "neurology_note", "radiology_report"] + EXTRACTION_FIELDS)
+        writer.writeheader()
+        for case in cases:
+            writer.writerow({"patient_id": case["patient_id"], "neurology_note": case["neurology_note"],
+                             "radiology_report": case["radiology_report"], **case["extraction"]})
+        writer.writerow({"patient_id": "bad", "neurology_note": "", "radiology_report": "",
+                         **cases[0]["extraction"], "NIHSS": "n/a", "SBP": "not recorded"})
+    loaded = load_cohort(path)
+    assert loaded[-1]["extraction"]["NIHSS"] == -1 and loaded[-1]["extraction"]["SBP"] == -1
+    results = list(run_batch(loaded, workers=1))
+    assert len(results) == len(cases) + 1
+    assert "❗ NIHSS outside valid range." in results[-1]["validation"]["Rule"]
+
+
+def test_missing_fields_are_not_documented(cases):
+    del cases[3]["extraction"]["NIHSS"]
+    del cases[3]["extraction"]["Weakness_Side"]
+    record = from_array(to_array([c["extraction"] for c in cases]))[3]
+    assert record["NIHSS"] == -1 and record["Weakness_Side"] == "unknown"
+
+    results = list(run_batch(cases, workers=1))
+    assert [r["patient_id"] for r in results] == [c["patient_id"] for c in cases]
+    assert results[3]["corrected"]["NIHSS"] == -1
+    assert "🔎" in results[3]["validation"]["HITL"]
+
+
+def test_workers_match_single_process(cases):
+    single = list(run_batch(cases, workers=1))
+    pooled = list(run_batch(cases, workers=2, chunksize=3))
+    assert [r["patient_id"] for r in pooled] == [r["patient_id"] for r in single]
+    assert [r[PROBABILITY_COLUMN] for r in pooled] == pytest.approx([r[PROBABILITY_COLUMN] for r in single])
+
+
+def test_jsonl_and_csv_output(cases, tmp_path):
+    results = list(run_batch(cases, workers=1))
+    assert write_results(results, tmp_path / "out.jsonl") == len(cases)
+    lines = (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["patient_id"] for line in lines] == [c["patient_id"] for c in cases]
+
+    assert write_results(results, tmp_path / "out.csv") == len(cases)
+    with open(tmp_path / "out.csv", newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    assert float(rows[0][PROBABILITY_COLUMN]) == pytest.approx(results[0][PROBABILITY_COLUMN])
@@ -0,0 +1,45 @@
+"""Benchmark report and --compare."""
+
+import json
+
+import pytest
+
+from stroke_pipeline.benchmark import bench_size, compare, main
+
+STAGES = ["validate_data", "hitl_correction", "predict", "predict_batch"]
+
+
+def test_bench_size_reports_every_stage():
+    stages = bench_size(40, seed=1)
+    for stage in STAGES:
+        s = stages[stage]
+        assert s["n"] == 40 and s["p50_ms"] <= s["p95_ms"] <= s["p99_ms"]
+    assert 0 <= stages["checks"]["needs_review_rate"] <= 1
+
+
+def _report(throughput, size="100"):
+    return {"sizes": {size: {stage: {"throughput_per_s": throughput, "p95_ms": 1.0} for stage in STAGES}}}
+
+
+def test_compare_flags_drops_beyond_the_tolerance(capsys):
+    assert compare(_report(1000.0), _report(950.0), tolerance=0.10) == []
+    assert compare(_report(1000.0), _report(800.0), tolerance=0.10) == [("100", stage) for stage in STAGES]
+    # New sizes or stages without a baseline are not compared
+    assert compare({"sizes": {}}, _report(1.0)) == []
+    assert capsys.readouterr().out == ""
+
+
+def test_compare_keeps_stdout_for_the_json_report(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    main(["--sizes", "20", "-o", str(baseline)])
+    capsys.readouterr()
+
+    baseline.write_text(json.dumps(_report(1e12, size="20")), encoding="utf-8")
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--sizes", "20", "--compare", str(baseline)])
+    assert exit_info.value.code == 1
+
+    out, err = capsys.readouterr()
+    report = json.loads(out)
+    assert list(report["sizes"]) == ["20"] and report["meta"]["seed"] == 0
+    assert "regression" in err
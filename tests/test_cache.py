@@ -0,0 +1,94 @@
+"""Content-addressed result cache: keys, pipeline-version invalidation and LRU eviction."""
+
+import itertools
+
+import numpy as np
+
+from stroke_pipeline.batch import lookup_cached, merge_cached
+from stroke_pipeline.cache import ResultCache, case_key, content_key, pipeline_version
+from stroke_pipeline.prediction import train_model
+from stroke_pipeline.registry import RuleSet, default_rules
+from stroke_pipeline.similarity import ReferenceIndex, SIMILARITY_THRESHOLD, default_reference
+
+NOTE = "72-year-old woman with  left-sided weakness.\nNIHSS 12."
+REPORT = "Acute infarction in the right MCA territory."
+
+
+def test_key_ignores_whitespace_but_not_content():
+    key = content_key(NOTE, REPORT)
+    assert content_key(" ".join(NOTE.split()), REPORT + "\n") == key
+    assert content_key(NOTE.replace("12", "14"), REPORT) != key
+
+
+def test_supplied_extraction_and_edits_change_the_key():
+    case = {"neurology_note": NOTE, "radiology_report": REPORT}
+    keys = {
+        case_key(case),
+        case_key({**case, "extraction": {"NIHSS": 12}}),
+        case_key({**case, "extraction": {"NIHSS": 12}, "reviewer_edits": {"NIHSS": 14}}),
+    }
+    assert len(keys) == 3
+
+
+def test_pipeline_version_changes_with_each_component():
+    rules = default_rules()
+    reference = default_reference()
+    base = pipeline_version()
+    changed = [
+        pipeline_version(rules=RuleSet(rules.rules, version=rules.version + "-edited")),
+        pipeline_version(model=train_model(n=300, seed=1)),
+        pipeline_version(reference=ReferenceIndex(np.asarray(reference.matrix)[:-1], reference.mean,
+                                                  reference.scale)),
+        pipeline_version(threshold=SIMILARITY_THRESHOLD + 0.01),
+    ]
+    assert pipeline_version() == base
+    assert len({base, *changed}) == 5
+
+
+def test_version_change_invalidates_cached_results(tmp_path):
+    cases = [{"patient_id": "p1", "neurology_note": NOTE, "radiology_report": REPORT}]
+    old = pipeline_version()
+    new = pipeline_version(threshold=SIMILARITY_THRESHOLD + 0.01)
+
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        keys, hits, todo = lookup_cached(cases, cache, old)
+        assert todo == cases
+        list(merge_cached(cases, keys, hits, [{"patient_id": "p1", "Valid": True}], cache))
+
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        assert len(cache) == 1
+        _, hits, todo = lookup_cached(cases, cache, old)
+        assert todo == [] and hits[0]["Valid"] is True
+        _, hits, todo = lookup_cached(cases, cache, new)
+        assert todo == cases and hits == [None]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_hits_are_relabelled_with_the_requesting_patient(tmp_path):
+    cases = [{"patient_id": p, "neurology_note": NOTE, "radiology_report": REPORT} for p in ("p1", "p2")]
+    with ResultCache(tmp_path / "cache.sqlite") as cache:
+        cache.put(case_key(cases[0]), {"patient_id": "p1", "Valid": True})
+        keys, hits, todo = lookup_cached(cases, cache)
+        assert todo == []
+        assert [r["patient_id"] for r in merge_cached(cases, keys, hits, [], cache)] == ["p1", "p2"]
+
+
+def test_lru_eviction_by_entries_and_bytes(tmp_path, monkeypatch):
+    # A strictly increasing clock, so access order never ties
+    clock = itertools.count()
+    monkeypatch.setattr("stroke_pipeline.cache.time.time", lambda: float(next(clock)))
+
+    with ResultCache(tmp_path / "entries.sqlite", max_entries=2) as cache:
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1  # "b" is now least recently used
+        cache.put("c", 3)
+        assert "b" not in cache and "a" in cache and "c" in cache
+        assert cache.stats()["evictions"] == 1
+
+    with ResultCache(tmp_path / "bytes.sqlite", max_bytes=25) as cache:
+        for key in "abc":
+            cache.put(key, "x" * 10)  # 12 bytes of JSON each
+        assert len(cache) == 2 and "a" not in cache
+        cache.put("c", "y")  # replacing an entry frees its old size
+        assert cache.stats()["bytes"] == 12 + 3
@@ -0,0 +1,85 @@
+"""Calibration histograms: merging partial histograms must equal one pass over everything."""
+
+import json
+
+import numpy as np
+import pytest
+
+from stroke_pipeline.batch import track_calibration
+from stroke_pipeline.calibration import CALIBRATION_KIND, CalibrationHistogram, chi2_sf, main
+from stroke_pipeline.ledger import CountLedger, ledger_path
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+
+
+def _predictions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    p = rng.uniform(0, 1, n)
+    return p, (rng.uniform(0, 1, n) < p).astype(int)
+
+
+def test_calibration_merge_equals_one_shot():
+    p, y = _predictions(3_000)
+    whole = CalibrationHistogram().update(p, y)
+    parts = [CalibrationHistogram().update(p[i::3], y[i::3]) for i in range(3)]
+    merged = parts[0] + parts[1] + parts[2]
+    for name in ("count", "expected", "observed", "squared_error"):
+        np.testing.assert_allclose(getattr(merged, name), getattr(whole, name))
+    assert merged.brier() == pytest.approx(whole.brier())
+    assert merged.hosmer_lemeshow() == pytest.approx(whole.hosmer_lemeshow())
+
+
+def test_calibration_brier_and_hosmer_lemeshow_match_direct_computation():
+    p, y = _predictions(2_000, seed=1)
+    hist = CalibrationHistogram(10).update(p, y)
+    assert hist.brier() == pytest.approx(np.mean((p - y) ** 2))
+
+    groups = np.minimum((p * 10).astype(int), 9)
+    statistic = 0.0
+    for g in range(10):
+        n, e, o = (groups == g).sum(), p[groups == g].sum(), y[groups == g].sum()
+        statistic += (o - e) ** 2 / (e * (1 - e / n))
+    hl = hist.hosmer_lemeshow()
+    assert hl["statistic"] == pytest.approx(statistic)
+    assert hl["df"] == 8
+
+
+@pytest.mark.parametrize("x, df", [(3.841, 1), (5.991, 2), (7.815, 3), (15.507, 8), (18.307, 10)])
+def test_chi2_sf_at_five_percent_critical_values(x, df):
+    assert chi2_sf(x, df) == pytest.approx(0.05, abs=2e-4)
+
+
+def test_state_holds_only_the_bin_sums():
+    p, y = _predictions(5_000, seed=2)
+    state = CalibrationHistogram().update(p, y).to_dict()
+    assert set(state) == {"bins", "count", "expected", "observed", "squared_error"}
+    assert all(len(state[name]) == 10 for name in ("count", "expected", "observed", "squared_error"))
+
+
+def test_track_calibration_skips_patients_in_the_ledger(tmp_path):
+    results = [{"patient_id": f"P{i}", PROBABILITY_COLUMN: i / 10} for i in range(10)]
+    cases = [{"outcome": i % 2} if i < 8 else {} for i in range(10)]
+    hist = CalibrationHistogram()
+    with CountLedger(tmp_path / "ledger") as ledger:
+        assert list(track_calibration(results, cases, hist, ledger, block=3)) == results
+        assert len(hist) == 8
+        list(track_calibration(results + results[:2], cases + cases[:2], hist, ledger))
+        assert len(hist) == 8
+        assert ledger.count(CALIBRATION_KIND) == 8
+
+
+def test_cli_counts_each_patient_once_across_runs(tmp_path, capsys):
+    results = tmp_path / "results.jsonl"
+    results.write_text("".join(json.dumps({"patient_id": f"P{i}", PROBABILITY_COLUMN: i / 20, "outcome": i % 2}) + "\n"
+                               for i in range(20)), encoding="utf-8")
+    state = tmp_path / "calibration.json"
+    main([str(results), "--state", str(state)])
+    main([str(results), "--state", str(state)])
+    assert "Added 0 labelled predictions (20 patients already counted)" in capsys.readouterr().out
+    assert len(CalibrationHistogram.load(state)) == 20
+    assert ledger_path(state).exists()
+
+    worker = tmp_path / "worker.json"
+    main([str(results), "--state", str(worker)])
+    with pytest.raises(SystemExit):
+        main(["--state", str(state), "--merge", str(worker)])
+    assert len(CalibrationHistogram.load(state)) == 20
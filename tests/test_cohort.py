@@ -0,0 +1,116 @@
+"""Table 1 cohort statistics: merging partial aggregates must equal one pass over everything."""
+
+import numpy as np
+import pytest
+
+from stroke_pipeline.batch import track_cohort
+from stroke_pipeline.cohort import CohortStats, IntegerHistogram, RunningMoments, count_patient, main
+from stroke_pipeline.ledger import CountLedger
+from stroke_pipeline.synthetic import synthetic_cohort
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    records, outcomes = synthetic_cohort(600, seed=11)
+    ids = [f"P{i:04d}" for i in range(len(records))]
+    return records, list(outcomes), ids
+
+
+def test_running_moments_chan_merge():
+    x = np.random.default_rng(2).normal(60, 15, 1_001)
+    parts = []
+    for chunk in np.array_split(x, 7):
+        moments = RunningMoments()
+        for value in chunk:
+            moments.add(value)
+        parts.append(moments)
+    merged = RunningMoments()
+    for part in parts:
+        merged.merge(part)
+    assert merged.n == len(x)
+    assert merged.mean == pytest.approx(x.mean())
+    assert merged.sd == pytest.approx(x.std(ddof=1))
+
+
+def test_integer_histogram_quantiles_match_numpy_and_merge():
+    values = np.random.default_rng(3).integers(0, 43, 777)
+    whole, a, b = IntegerHistogram(0, 42), IntegerHistogram(0, 42), IntegerHistogram(0, 42)
+    for i, v in enumerate(values):
+        whole.add(v)
+        (a if i % 2 else b).add(v)
+    merged = a.merge(b)
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    for q in (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1):
+        assert merged.quantile(q) == pytest.approx(np.quantile(values, q))
+    assert not whole.add(43)
+
+
+def test_cohort_stats_merge_equals_one_shot(cohort):
+    records, outcomes, ids = cohort
+    whole = CohortStats().update_many(records, outcomes)
+    first = CohortStats().update_many(records[:250], outcomes[:250])
+    second = CohortStats().update_many(records[250:], outcomes[250:])
+    merged = CohortStats.from_dict((first + second).to_dict())
+
+    assert merged.n == whole.n == len(records)
+    assert merged.table1() == whole.table1()
+    assert merged.nihss_distribution() == whole.nihss_distribution()
+    assert merged.outcomes == whole.outcomes
+    for field in whole.moments:
+        assert merged.moments[field].mean == pytest.approx(whole.moments[field].mean)
+        assert merged.moments[field].m2 == pytest.approx(whole.moments[field].m2)
+
+
+def test_ledger_counts_each_patient_once(cohort, tmp_path):
+    records, outcomes, ids = cohort
+    stats = CohortStats()
+    with CountLedger(tmp_path / "ledger") as ledger:
+        for record, patient_id in zip(records[:10], ids[:10]):
+            count_patient(stats, record, None, patient_id, ledger)
+        # A second visit adds only the outcome that has arrived since
+        for record, outcome, patient_id in zip(records[:10], outcomes[:10], ids[:10]):
+            count_patient(stats, record, outcome, patient_id, ledger)
+        for record, outcome, patient_id in zip(records[:10], outcomes[:10], ids[:10]):
+            count_patient(stats, record, outcome, patient_id, ledger)
+    assert stats.n == 10
+    assert sum(stats.outcomes.values()) == 10
+    assert stats.table1() == CohortStats().update_many(records[:10], outcomes[:10]).table1()
+
+
+def test_state_holds_no_patient_ids(cohort):
+    records, outcomes, ids = cohort
+    state = CohortStats().update_many(records, outcomes).to_dict()
+    assert set(state) == {"n", "moments", "scores", "categories", "outcomes"}
+    assert not any(patient_id in str(state) for patient_id in ids[:5])
+
+
+def test_track_cohort_rerun_adds_nothing(cohort, tmp_path):
+    records, outcomes, ids = cohort
+    results = [{"patient_id": i, "corrected": r} for i, r in zip(ids[:20], records[:20])]
+    cases = [{"outcome": y} for y in outcomes[:20]]
+    stats = CohortStats()
+    with CountLedger(tmp_path / "ledger") as ledger:
+        for _ in range(2):
+            assert list(track_cohort(results, cases, stats, ledger)) == results
+    assert stats.n == 20 and sum(stats.outcomes.values()) == 20
+
+
+def test_cli_merge_refuses_overlapping_workers(cohort, tmp_path, capsys):
+    records, outcomes, ids = cohort
+    paths = []
+    for name, share in (("a", slice(0, 30)), ("b", slice(30, 60)), ("c", slice(50, 70))):
+        stats = CohortStats()
+        path = tmp_path / f"{name}.json"
+        with CountLedger.beside(path) as ledger:
+            for record, outcome, patient_id in zip(records[share], outcomes[share], ids[share]):
+                count_patient(stats, record, outcome, patient_id, ledger)
+            stats.save(path)
+            ledger.commit()
+        paths.append(str(path))
+
+    total = str(tmp_path / "total.json")
+    main([total, "--merge", paths[0], paths[1]])
+    assert CohortStats.load(total).n == 60
+    with pytest.raises(SystemExit):
+        main([total, "--merge", paths[2]])
+    assert CohortStats.load(total).n == 60
@@ -0,0 +1,57 @@
+"""Columnar (Parquet / Arrow) batch output."""
+
+import pytest
+
+from stroke_pipeline.batch import main, output_format, run_batch, write_results
+from stroke_pipeline.synthetic import synthetic_cases
+
+pa = pytest.importorskip("pyarrow")
+from stroke_pipeline.columnar import read_column, write_columnar  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def results():
+    return list(run_batch(synthetic_cases(40, seed=6), workers=1))
+
+
+@pytest.mark.parametrize("path, partition_by, expected", [
+    ("out.jsonl", None, "jsonl"), ("out.csv", None, "csv"), ("out.parquet", None, "columnar"),
+    ("out.arrow", "Needs_Review", "columnar"), ("dataset", "Sex", "columnar"),
+])
+def test_output_format(path, partition_by, expected):
+    assert output_format(path, partition_by) == expected
+
+
+@pytest.mark.parametrize("path, partition_by", [("out.jsonl", "Sex"), ("out.csv", "Sex"), ("out.txt", None)])
+def test_output_format_rejects(path, partition_by):
+    with pytest.raises(ValueError):
+        output_format(path, partition_by)
+
+
+def test_cli_rejects_partitioned_row_output(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "missing.jsonl"), "-o", str(tmp_path / "out.jsonl"), "--partition-by", "Sex"])
+    assert not (tmp_path / "out.jsonl").exists()
+
+
+def test_single_file_round_trip(results, tmp_path):
+    path = tmp_path / "out.parquet"
+    assert write_results(results, path, row_group_size=16) == len(results)
+    assert read_column(path, "patient_id").to_pylist() == [r["patient_id"] for r in results]
+    assert pa.parquet.ParquetFile(path).num_row_groups == 3
+
+
+def test_dataset_runs_append(results, tmp_path):
+    write_results(results, tmp_path / "dataset")
+    write_results(results[:10], tmp_path / "dataset")
+    assert len(read_column(tmp_path / "dataset", "patient_id")) == len(results) + 10
+
+
+def test_partition_writers_are_capped(results, tmp_path):
+    path = tmp_path / "by_nihss"
+    n = write_columnar(results, path, partition_by="NIHSS", row_group_size=1, max_open_writers=2)
+    assert n == len(results)
+    partitions = {p.name for p in path.iterdir()}
+    assert partitions == {f"NIHSS={r['corrected']['NIHSS']}" for r in results}
+    assert sum(1 for _ in path.rglob("*.parquet")) > len(partitions)
+    assert sorted(read_column(path, "patient_id").to_pylist()) == sorted(r["patient_id"] for r in results)
@@ -0,0 +1,43 @@
+"""Evidence scanner: offsets, NegEx-style scopes and pseudo-negations."""
+
+from stroke_pipeline.evidence import NEGATION_WINDOW, mention_status, scan, scan_documents
+
+
+def _status(text):
+    return mention_status(scan_documents({"note": text}))
+
+
+def test_hits_carry_offsets_into_the_text():
+    text = "History of  Atrial\nFibrillation and HTN."
+    hits = scan(text, "note")
+    assert [(h.concept, h.phrase) for h in hits] == [("Atrial_Fibrillation", "atrial fibrillation"),
+                                                     ("Hypertension", "htn")]
+    assert all(text[h.start:h.end].lower().split() == h.phrase.split() for h in hits)
+    assert {h.document for h in hits} == {"note"}
+
+
+def test_negated_lists_chain_until_a_terminator():
+    status = _status("A 70-year-old without atrial fibrillation, prior stroke, malignancy, or ESRD, "
+                     "but with hypertension.")
+    assert status == {"Atrial_Fibrillation": "negated", "Old_CVA": "negated", "Malignancy": "negated",
+                      "ESRD": "negated", "Hypertension": "positive"}
+
+
+def test_negation_scope_ends_at_a_sentence_or_the_window():
+    assert _status("No diabetes. Hypertension on ramipril.")["Hypertension"] == "positive"
+    assert _status("No 0.9 mg/kg tPA")["tPA_Administered"] == "negated"
+    far = "No " + "x" * (NEGATION_WINDOW + 1) + " diabetes"
+    assert _status(far)["Diabetes"] == "positive"
+
+
+def test_pseudo_negations_do_not_negate():
+    assert _status("In the absence of contraindications, IV tPA was given.")["tPA_Administered"] == "positive"
+
+
+def test_any_affirmed_mention_wins():
+    assert _status("Denies prior stroke. MRI shows an old CVA.")["Old_CVA"] == "positive"
+
+
+def test_large_territory_infarcts_are_their_own_concept():
+    status = mention_status(scan_documents({"mri": "Extensive infarction of the entire MCA territory."}))
+    assert status == {"Large_Territory_Infarct": "positive"}
@@ -0,0 +1,51 @@
+"""LLM extraction: response parsing, batching and the per-patient result cache."""
+
+import json
+
+from stroke_pipeline.extraction import Extractor, StubBackend, cache_key, parse_response, prompt_version
+
+
+def test_malformed_fields_are_coerced_one_by_one():
+    item = {"patient_id": "a", "Age": "63.0", "NIHSS": "approx 9", "ASPECTS": "N/A", "SBP": "120/80",
+            "Sex": "M", "Hypertension": True, "Diabetes": " Absent ", "Weakness_Side": "Both", "Malignancy": "maybe"}
+    extraction = parse_response("Here you go:\n" + json.dumps([item, "noise"]), ["a"])["a"]
+    assert (extraction["Age"], extraction["NIHSS"], extraction["ASPECTS"], extraction["SBP"]) == (63, 9, -1, -1)
+    assert extraction["Sex"] == "male" and extraction["Weakness_Side"] == "bilateral"
+    assert (extraction["Hypertension"], extraction["Diabetes"]) == ("yes", "no")
+    # Left for the format checks to flag
+    assert extraction["Malignancy"] == "maybe"
+    assert extraction["ESRD"] == "unknown"
+
+
+def _cases(n):
+    return [(f"p{i}", f"Note for patient {i}.", f"Report for patient {i}.") for i in range(n)]
+
+
+def test_patients_are_batched_into_prompts():
+    cases = _cases(10)
+    backend = StubBackend({pid: {"Age": 60 + i, "Sex": "female"} for i, (pid, _, _) in enumerate(cases)})
+    results = Extractor(backend, batch_size=4).extract(cases)
+    assert backend.calls == 3
+    assert list(results) == [pid for pid, _, _ in cases]
+    assert results["p7"]["Age"] == 67 and results["p7"]["NIHSS"] == -1
+
+
+def test_unchanged_notes_are_served_from_the_cache():
+    cases = _cases(5)
+    backend = StubBackend({pid: {"NIHSS": 4} for pid, _, _ in cases})
+    extractor = Extractor(backend, batch_size=2)
+    first = extractor.extract(cases)
+    calls = backend.calls
+
+    # A new patient with the same documents shares the entry; an amended note misses
+    second = extractor.extract(cases[:4] + [("p9", cases[0][1], cases[0][2]), ("p4", "Amended note.", cases[4][2])])
+    assert backend.calls == calls + 1
+    assert (extractor.hits, extractor.misses) == (5, 6)
+    assert second["p9"] == first["p0"]
+
+
+def test_cache_is_keyed_on_the_prompt_version():
+    assert cache_key("note", "report", "m", 0.1) == cache_key("note", "report", "m", 0.1)
+    assert cache_key("note", "report", "m", 0.1) != cache_key("note", "report", "m", 0.1, prompt_version="other")
+    assert cache_key("note", "report", "m", 0.1) != cache_key("note", "report", "m", 0.2)
+    assert prompt_version(512) != prompt_version(1024)
@@ -0,0 +1,78 @@
+"""Image service: thumbnails on disk and the in-memory LRU of encoded bytes."""
+
+import io
+import os
+
+import pytest
+
+from stroke_pipeline import images
+from stroke_pipeline.images import ImageService, make_thumbnail, thumbnail_path
+
+
+def _png(path, size=(1200, 800)):
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", size, (120, 30, 200)).save(path, "PNG")
+    return path
+
+
+def test_full_bytes_are_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "scan.bin"
+    path.write_bytes(b"a" * 100)
+    service = ImageService()
+    assert service.full(path) == b"a" * 100
+    assert service.full(path) == b"a" * 100
+    assert (service.hits, service.misses) == (1, 1)
+
+    path.write_bytes(b"b" * 100)
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+    assert service.full(path) == b"b" * 100
+    assert service.misses == 2
+
+
+def test_lru_is_bounded_by_bytes(tmp_path):
+    paths = []
+    for name in "abc":
+        paths.append(tmp_path / name)
+        paths[-1].write_bytes(name.encode() * 40)
+    service = ImageService(max_bytes=100)
+    for path in paths:
+        service.full(path)
+    assert service.stats()["entries"] == 2 and service.stats()["bytes"] == 80
+
+    # "a" was evicted; "c" is still cached
+    service.full(paths[2])
+    service.full(paths[0])
+    assert (service.hits, service.misses) == (1, 4)
+
+    too_big = tmp_path / "big"
+    too_big.write_bytes(b"x" * 200)
+    assert service.full(too_big) == b"x" * 200
+    assert service.stats()["bytes"] <= 100
+
+
+def test_thumbnail_is_downscaled_and_written_once(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    path = _png(tmp_path / "aspects.png")
+    data = make_thumbnail(path, edge=300)
+    with Image.open(io.BytesIO(data)) as im:
+        assert im.format == "WEBP" and im.size == (300, 200)
+    target = thumbnail_path(path, 300)
+    assert target.read_bytes() == data
+
+    # A second call reads the copy on disk instead of decoding the original
+    target.write_bytes(b"cached")
+    os.utime(target, ns=(target.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+    assert make_thumbnail(path, edge=300) == b"cached"
+
+
+def test_small_images_are_served_as_is(tmp_path):
+    path = _png(tmp_path / "small.png", size=(200, 100))
+    assert make_thumbnail(path, edge=400) == path.read_bytes()
+    assert not thumbnail_path(path, 400).exists()
+
+
+def test_without_pillow_the_thumbnail_is_the_full_image(tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "_pil_image", lambda: None)
+    path = tmp_path / "figure.png"
+    path.write_bytes(b"not decoded")
+    assert ImageService().thumbnail(path) == b"not decoded"
@@ -0,0 +1,67 @@
+"""Incremental re-validation after reviewer edits."""
+
+import random
+
+import pytest
+
+from stroke_pipeline.cases import extraction_results, neurology_notes, radiology_reports
+from stroke_pipeline.incremental import IncrementalValidator
+from stroke_pipeline.synthetic import synthetic_extractions
+from stroke_pipeline.validation import validate_data
+
+CASE = "Example Case 1"
+
+
+def _validate(record):
+    return validate_data(CASE, record, neurology_notes[CASE], radiology_reports[CASE])
+
+
+def _validator():
+    return IncrementalValidator(extraction_results[CASE], neurology_notes[CASE], radiology_reports[CASE],
+                                predict=None)
+
+
+def test_incremental_updates_match_full_validation():
+    validator = _validator()
+    assert validator.validation == _validate(extraction_results[CASE])
+
+    rng = random.Random(0)
+    for record in synthetic_extractions(30, seed=4):
+        for field in rng.sample(list(record), 3):
+            validator.update(field, record[field])
+            full = _validate(validator.record)
+            assert validator.validation["CosineSimilarity"] == pytest.approx(full["CosineSimilarity"], abs=1e-4)
+            assert {k: v for k, v in validator.validation.items() if k != "CosineSimilarity"} == \
+                   {k: v for k, v in full.items() if k != "CosineSimilarity"}
+
+
+def test_only_dependents_are_recomputed():
+    validator = _validator()
+    recomputed = validator.update("NIHSS", 12)
+    assert "NIHSS_range" in recomputed and "cosine" in recomputed
+    assert "ASPECTS_range" not in recomputed and "prediction" not in recomputed
+    assert validator.update("not_a_field", 1) == []
+
+
+def test_update_many_matches_full_validation_of_edited_record():
+    validator = _validator()
+    edits = {"NIHSS": 22, "ASPECTS": 4, "Hypertension": "yes"}
+    validator.update_many({**extraction_results[CASE], **edits})
+    full = _validate({**extraction_results[CASE], **edits})
+    assert validator.record == {**extraction_results[CASE], **edits}
+    assert validator.validation["Rule"] == full["Rule"] and validator.validation["RAG"] == full["RAG"]
+    assert validator.similarity == pytest.approx(full["CosineSimilarity"], abs=1e-4)
+
+
+def test_baseline_is_a_read_only_snapshot_of_the_extraction():
+    validator = _validator()
+    original = _validate(extraction_results[CASE])
+    validator.update_many({"NIHSS": 40, "Weakness_Side": "right", "tPA_Administered": "yes"})
+    assert validator.validation != original
+
+    baseline = validator.baseline
+    assert list(baseline["Rule"]) == original["Rule"] and list(baseline["RAG"]) == original["RAG"]
+    assert baseline["CosineSimilarity"] == original["CosineSimilarity"]
+    assert [dict(flag) for flag in baseline["Flags"]] == original["Flags"]
+    with pytest.raises(TypeError):
+        baseline["HITL"] = "✔ Auto-acceptable."
@@ -0,0 +1,45 @@
+"""Ledger of counted patients and the atomic JSON state files."""
+
+import pytest
+
+from stroke_pipeline.ledger import CountLedger, ledger_path, load_json, save_json
+
+
+def test_claim_reports_new_patients_once(tmp_path):
+    with CountLedger(tmp_path / "ledger") as ledger:
+        assert ledger.claim_many("calibration", ["a", "b", "a"]) == [True, True, False]
+        assert ledger.claim("calibration", "b") is False
+        assert ledger.claim("outcome", "b") is True
+        assert ledger.count("calibration") == 2
+
+
+def test_claims_are_kept_only_once_committed(tmp_path):
+    path = tmp_path / "ledger"
+    with CountLedger(path) as ledger:
+        ledger.claim("cohort", "a")
+        ledger.commit()
+        ledger.claim("cohort", "b")
+    with CountLedger(path) as ledger:
+        assert ledger.claim_many("cohort", ["a", "b"]) == [False, True]
+
+
+def test_merge_refuses_overlapping_ledgers(tmp_path):
+    with CountLedger(tmp_path / "a") as a, CountLedger(tmp_path / "b") as b, CountLedger(tmp_path / "c") as c:
+        a.claim_many("cohort", ["1", "2"])
+        b.claim_many("cohort", ["3"])
+        c.claim_many("cohort", ["2", "4"])
+        a.merge(b)
+        with pytest.raises(ValueError):
+            a.merge(c)
+        # The failed merge adds nothing and keeps the earlier claims
+        assert a.claim_many("cohort", ["1", "3", "4"]) == [False, False, True]
+
+
+def test_json_state_round_trip(tmp_path):
+    path = tmp_path / "state.json"
+    assert load_json(path) is None
+    save_json(path, {"n": 1})
+    save_json(path, {"n": 2})
+    assert load_json(path) == {"n": 2}
+    assert not path.with_name("state.json.tmp").exists()
+    assert ledger_path(path) == tmp_path / "state.json.ledger"
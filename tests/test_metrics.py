@@ -0,0 +1,114 @@
+"""Discrimination metrics against direct (quadratic / per-resample) computations."""
+
+import json
+
+import numpy as np
+import pytest
+
+from stroke_pipeline.metrics import (
+    auroc, average_precision, bootstrap, evaluate, labelled_predictions, pr_curve, roc_curve,
+)
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+
+
+def _labelled(n, seed=0, ties=False):
+    rng = np.random.default_rng(seed)
+    y = rng.uniform(0, 1, n) < 0.3
+    scores = rng.normal(0, 1, n) + 0.8 * y
+    if ties:
+        scores = np.round(scores, 1)
+    return y.astype(int), scores
+
+
+def _mann_whitney(y, scores):
+    pos, neg = scores[y == 1], scores[y == 0]
+    wins = (pos[:, None] > neg[None, :]).sum() + 0.5 * (pos[:, None] == neg[None, :]).sum()
+    return wins / (len(pos) * len(neg))
+
+
+def _brute_force_ap(y, scores):
+    # Precision at every distinct threshold, weighted by the recall it adds
+    total, ap, previous_recall = y.sum(), 0.0, 0.0
+    for threshold in np.unique(scores)[::-1]:
+        called = scores >= threshold
+        recall = y[called].sum() / total
+        ap += (recall - previous_recall) * y[called].mean()
+        previous_recall = recall
+    return ap
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_auroc_equals_mann_whitney(ties):
+    y, scores = _labelled(500, seed=1, ties=ties)
+    assert auroc(y, scores) == pytest.approx(_mann_whitney(y, scores))
+
+
+@pytest.mark.parametrize("ties", [False, True])
+def test_average_precision_equals_brute_force(ties):
+    y, scores = _labelled(400, seed=2, ties=ties)
+    assert average_precision(y, scores) == pytest.approx(_brute_force_ap(y, scores))
+
+
+def test_curves_run_corner_to_corner():
+    y, scores = _labelled(300, seed=3)
+    fpr, tpr, _ = roc_curve(y, scores)
+    recall, precision, _ = pr_curve(y, scores)
+    assert (fpr[0], tpr[0], fpr[-1], tpr[-1]) == (0, 0, 1, 1)
+    assert np.all(np.diff(fpr) >= 0) and np.all(np.diff(tpr) >= 0)
+    assert recall[0] == 0 and recall[-1] == 1 and precision[-1] == pytest.approx(y.mean())
+
+
+def test_bootstrap_matches_index_resampling():
+    y, scores = _labelled(300, seed=4, ties=True)
+    summary = bootstrap(y, scores, resamples=2_000, seed=0)
+
+    rng = np.random.default_rng(1)
+    direct = {"auroc": [], "auprc": []}
+    for _ in range(2_000):
+        idx = rng.integers(0, len(y), len(y))
+        if 0 < y[idx].sum() < len(y):
+            direct["auroc"].append(auroc(y[idx], scores[idx]))
+            direct["auprc"].append(average_precision(y[idx], scores[idx]))
+
+    for name in ("auroc", "auprc"):
+        lo, hi = summary[name]["ci"]
+        assert lo < summary[name]["estimate"] < hi
+        # Two independent Monte Carlo runs of the same percentile interval
+        np.testing.assert_allclose((lo, hi), np.percentile(direct[name], [2.5, 97.5]), atol=0.015)
+
+
+def test_bootstrap_is_seeded():
+    y, scores = _labelled(200, seed=5)
+    assert bootstrap(y, scores, resamples=500, seed=7) == bootstrap(y, scores, resamples=500, seed=7)
+
+
+def test_labels_need_both_classes():
+    with pytest.raises(ValueError):
+        auroc([1, 1, 1], [0.1, 0.2, 0.3])
+
+
+def test_evaluate_thins_curves_and_keeps_the_bootstrap():
+    y, scores = _labelled(3_000, seed=6)
+    summary = evaluate(y, scores, resamples=300, points=50)
+    assert summary["auroc"] == bootstrap(y, scores, resamples=300)["auroc"]
+    assert len(summary["roc"]["fpr"]) <= 52 and len(summary["pr"]["recall"]) <= 52
+    assert (summary["roc"]["fpr"][-1], summary["roc"]["tpr"][-1]) == (1, 1)
+
+
+def test_grouped_cells_keep_the_estimate_and_widen_little():
+    y, scores = _labelled(4_000, seed=7)
+    exact = bootstrap(y, scores, resamples=1_000, max_cells=10_000)
+    grouped = bootstrap(y, scores, resamples=1_000, max_cells=64)
+    assert grouped["auroc"]["estimate"] == exact["auroc"]["estimate"]
+    np.testing.assert_allclose(grouped["auroc"]["ci"], exact["auroc"]["ci"], atol=0.01)
+
+
+def test_labels_are_matched_on_patient_id(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text("".join(json.dumps({"patient_id": pid, PROBABILITY_COLUMN: p}) + "\n"
+                               for pid, p in [(1, 0.9), ("2", 0.2), ("3", 0.4)]), encoding="utf-8")
+    labels = tmp_path / "labels.csv"
+    labels.write_text("patient_id,outcome\n3,0\n1,1\n2,\n", encoding="utf-8")
+
+    y, scores, ids = labelled_predictions(results, labels, with_ids=True)
+    assert ids == ["1", "3"] and y.tolist() == [1, 0] and scores.tolist() == [0.9, 0.4]
@@ -0,0 +1,50 @@
+"""Typed patient records: packing extraction dicts into a structured array and back."""
+
+import numpy as np
+
+from stroke_pipeline.records import (INVALID, INVALID_VALUE, MISSING_VALUES, RECORD_DTYPE, UNKNOWN, fill_missing,
+                                     from_array, to_array, to_frame)
+from stroke_pipeline.schema import EXTRACTION_FIELDS
+from stroke_pipeline.synthetic import synthetic_extractions
+
+
+def test_record_array_round_trip():
+    records = synthetic_extractions(50, seed=1)
+    assert from_array(to_array(records)) == records
+
+
+def test_row_is_compact():
+    assert RECORD_DTYPE.names == tuple(EXTRACTION_FIELDS)
+    assert RECORD_DTYPE.itemsize < 2 * len(EXTRACTION_FIELDS)
+
+
+def test_out_of_vocabulary_values_decode_as_invalid():
+    record = {**synthetic_extractions(1, seed=2)[0], "Sex": "M", "Diabetes": "maybe", "NIHSS": "approx 9",
+              "SBP": 10 ** 6, "ASPECTS": "unknown"}
+    arr = to_array(record)
+    assert arr["Sex"][0] == INVALID and arr["Diabetes"][0] == INVALID
+    decoded = from_array(arr)[0]
+    assert decoded["Sex"] == decoded["Diabetes"] == INVALID_VALUE
+    assert decoded["NIHSS"] == decoded["SBP"] == decoded["ASPECTS"] == INVALID_VALUE
+
+
+def test_csv_strings_pack_like_ints():
+    records = synthetic_extractions(20, seed=3)
+    as_strings = [{k: str(v) for k, v in r.items()} for r in records]
+    np.testing.assert_array_equal(to_array(as_strings), to_array(records))
+
+
+def test_missing_fields_pack_as_not_documented():
+    records = synthetic_extractions(3, seed=4)
+    del records[1]["ASPECTS"], records[1]["Hypertension"]
+    arr = to_array(records)
+    assert arr["ASPECTS"][1] == -1 and arr["Hypertension"][1] == UNKNOWN
+    assert from_array(arr)[1] == fill_missing(records[1]) == {**MISSING_VALUES, **records[1]}
+    assert fill_missing(records[0]) is records[0]
+
+
+def test_frame_matches_from_array():
+    records = synthetic_extractions(10, seed=5)
+    records[2]["NIHSS"] = "n/a"
+    arr = to_array(records)
+    assert to_frame(arr).to_dict("records") == from_array(arr)
@@ -0,0 +1,27 @@
+"""Consistency-rule registry."""
+
+from stroke_pipeline.registry import default_rules
+from stroke_pipeline.synthetic import synthetic_cases
+from stroke_pipeline.validation import source_mentions
+
+LARGE_TERRITORY_REPORT = "Findings:\nExtensive infarction of the left MCA territory with mass effect.\n"
+
+
+def _fired(record, note, report):
+    return {rule.name for rule in default_rules().evaluate(record, source_mentions(note, report))}
+
+
+def test_rules_rarely_fire_on_clean_synthetic_cases():
+    cases = synthetic_cases(500, seed=3, error_rate=0.0)
+    flagged = sum(bool(_fired(c["extraction"], c["neurology_note"], c["radiology_report"])) for c in cases)
+    assert flagged / len(cases) < 0.1
+
+
+def test_high_aspects_fires_only_against_a_large_territory_infarct():
+    case = next(c for c in synthetic_cases(200, seed=3, error_rate=0.0)
+                if c["extraction"]["MRI_Acute_Infarct"] == "yes")
+    record = {**case["extraction"], "ASPECTS": 9}
+    assert "aspects_vs_large_territory_infarct" not in _fired(record, case["neurology_note"], case["radiology_report"])
+    assert "aspects_vs_large_territory_infarct" in _fired(record, case["neurology_note"], LARGE_TERRITORY_REPORT)
+    assert "aspects_vs_large_territory_infarct" not in _fired({**record, "ASPECTS": 4}, "", LARGE_TERRITORY_REPORT)
+    assert "aspects_vs_large_territory_infarct" not in _fired(record, "", "No large territory infarct.\n")
@@ -0,0 +1,88 @@
+"""Vector index for the RAG verification tier: appends, tombstones and reopening."""
+
+import numpy as np
+
+from stroke_pipeline.cases import neurology_notes, radiology_reports
+from stroke_pipeline.retrieval import VectorIndex, embed, retrieve_evidence, split_sentences
+
+CASE = "Example Case 1"
+
+
+def _documents(case=CASE):
+    return {"neurology": neurology_notes[case], "radiology": radiology_reports[case]}
+
+
+def test_embeddings_are_unit_vectors():
+    X = embed(["acute infarction in the left MCA territory", "atrial fibrillation"], dim=256)
+    assert X.shape == (2, 256)
+    assert np.allclose(np.linalg.norm(X, axis=1), 1.0, atol=1e-6)
+
+
+def test_split_sentences_keeps_decimal_points():
+    sentences = [s for _, _, s in split_sentences("IV tPA 0.9 mg/kg given. NIHSS 12\nASPECTS 7")]
+    assert sentences == ["IV tPA 0.9 mg/kg given", "NIHSS 12", "ASPECTS 7"]
+
+
+def test_readding_unchanged_documents_is_a_noop():
+    index = VectorIndex(dim=256)
+    added = index.add_patient("p1", _documents())
+    assert added == len(index) > 0
+    assert index.add_patient("p1", _documents()) == 0
+    assert len(index) == added
+
+
+def test_amended_documents_tombstone_earlier_rows():
+    index = VectorIndex(dim=256)
+    index.add_patient("p1", {"neurology": "History of atrial fibrillation."})
+    index.add_patient("p2", {"neurology": "No significant past history."})
+    index.add_patient("p1", {"neurology": "History of diabetes mellitus."})
+
+    assert index.dead == [(0, 1)]
+    assert index.patients["p1"] == (2, 3)
+    assert not index.live_rows()[0]
+    hits = index.search(["atrial fibrillation"], k=3)[0]
+    assert all("atrial" not in span["text"] for _, span in hits)
+    assert len(hits) == 2
+
+
+def test_patient_search_only_returns_that_patients_spans():
+    index = VectorIndex(dim=512)
+    index.add_patient("p1", _documents("Example Case 1"))
+    index.add_patient("p2", _documents("Example Case 2"))
+    for _, span in index.search(["nihss score"], k=5, patient_id="p2")[0]:
+        assert span["patient_id"] == "p2"
+    assert index.search(["nihss score"], patient_id="missing") == [[]]
+
+
+def test_retrieve_evidence_returns_offsets_into_the_documents():
+    index = VectorIndex(dim=512)
+    documents = _documents()
+    index.add_patient("p1", documents)
+    evidence = retrieve_evidence(index, "p1", fields=["NIHSS", "Atrial_Fibrillation", "Unknown"], k=2)
+    assert set(evidence) == {"NIHSS", "Atrial_Fibrillation"}
+    for hits in evidence.values():
+        assert len(hits) == 2
+        for hit in hits:
+            assert documents[hit["document"]][hit["start"]:hit["end"]] == hit["text"]
+
+
+def test_reopened_index_matches_and_drops_a_torn_append(tmp_path):
+    index = VectorIndex(tmp_path / "index", dim=256)
+    index.add_patient("p1", _documents("Example Case 1"))
+    index.add_patient("p2", _documents("Example Case 2"))
+    expected = index.search(["restricted diffusion"], k=3)
+
+    # A crash after the vectors were written but mid-way through the spans
+    with open(tmp_path / "index" / "vectors.f32", "ab") as fh:
+        fh.write(embed(["orphan"], 256).tobytes())
+    with open(tmp_path / "index" / "spans.jsonl", "a", encoding="utf-8") as fh:
+        fh.write('{"patient_id": "p3", "te')
+
+    reopened = VectorIndex(tmp_path / "index")
+    assert reopened.dim == 256
+    assert len(reopened) == len(index)
+    assert "p3" not in reopened
+    assert (tmp_path / "index" / "vectors.f32").stat().st_size == len(index) * 256 * 4
+    assert [[(round(s, 5), span) for s, span in hits] for hits in reopened.search(["restricted diffusion"], k=3)] == \
+           [[(round(s, 5), span) for s, span in hits] for hits in expected]
+    assert reopened.add_patient("p1", _documents("Example Case 1")) == 0
@@ -0,0 +1,112 @@
+"""Review queue: priority order, claim/complete, expired claims and the audit sample."""
+
+import threading
+
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+from stroke_pipeline.review import ReviewQueue, in_audit_sample, review_priority
+
+
+def _validation(flags=(), similarity=0.9):
+    flags = [{"tier": "Rule", "severity": severity, "message": "❗ flag"} for severity in flags]
+    return {"Rule": [f["message"] for f in flags] or ["✔ ok"], "Flags": flags, "CosineSimilarity": similarity,
+            "HITL": "🔎 Needs review" if flags else "✔ Auto-accepted"}
+
+
+def _result(patient_id, flags=(), similarity=0.9, probability=0.2):
+    return {"patient_id": patient_id, "validation": _validation(flags, similarity), PROBABILITY_COLUMN: probability}
+
+
+def _unaudited(prefix, n):
+    ids = (f"{prefix}{i}" for i in range(1000))
+    return [pid for pid in ids if not in_audit_sample(pid)][:n]
+
+
+def test_priority_grows_with_severity_similarity_gap_and_risk():
+    base = review_priority(_validation(["low"]), 0.1)
+    assert review_priority(_validation(["high"]), 0.1) > base
+    assert review_priority(_validation(["low", "low"]), 0.1) > base
+    assert review_priority(_validation(["low"], similarity=0.3), 0.1) > base
+    assert review_priority(_validation(["low"]), 0.9) > base
+    assert review_priority(_validation(), 0.0) == 0
+
+
+def test_audit_sample_is_deterministic_and_near_the_rate():
+    ids = [f"patient-{i}" for i in range(5000)]
+    sample = [pid for pid in ids if in_audit_sample(pid, 0.1)]
+    assert sample == [pid for pid in ids if in_audit_sample(pid, 0.1)]
+    assert 400 < len(sample) < 600
+    assert not any(in_audit_sample(pid, 0.0) for pid in ids)
+
+
+def test_claims_come_out_in_priority_order(tmp_path):
+    low, high, mid, clean = _unaudited("p", 4)
+    with ReviewQueue(tmp_path / "queue.sqlite") as queue:
+        queued = queue.enqueue_many([_result(low, ["low"]), _result(high, ["high", "high"]),
+                                     _result(mid, ["medium"]), _result(clean)])
+        assert queued == 3
+        order = [queue.claim("ann")["patient_id"] for _ in range(3)]
+        assert order == [high, mid, low]
+        assert queue.claim("ann") is None
+
+
+def test_complete_only_by_the_claiming_reviewer(tmp_path):
+    pid = _unaudited("p", 1)[0]
+    with ReviewQueue(tmp_path / "queue.sqlite") as queue:
+        queue.enqueue(_result(pid, ["high"]))
+        item = queue.claim("ann")
+        assert item["result"]["patient_id"] == pid and item["reason"] == "flagged"
+        assert not queue.complete(item["id"], "bob")
+        assert queue.complete(item["id"], "ann", {"NIHSS": 12})
+        assert not queue.complete(item["id"], "ann")
+        assert queue.stats() == {"pending": 0, "claimed": 0, "done": 1, "audit": 0}
+
+        # Re-running the pipeline does not requeue a reviewed patient
+        queue.enqueue(_result(pid, ["high"]))
+        assert queue.claim("ann") is None
+
+
+def test_release_and_expired_claims_return_to_the_queue(tmp_path):
+    first, second = _unaudited("p", 2)
+    with ReviewQueue(tmp_path / "queue.sqlite", claim_timeout=-1) as queue:
+        queue.enqueue_many([_result(first, ["high"]), _result(second, ["low"])])
+        item = queue.claim("ann")
+        assert not queue.release(item["id"], "bob")
+        assert queue.release(item["id"], "ann")
+        assert queue.claim("bob")["id"] == item["id"]
+
+        queue.claim("bob")
+        assert queue.release_expired() == 2
+        assert queue.stats()["pending"] == 2
+
+
+def test_concurrent_reviewers_never_share_a_patient(tmp_path):
+    path = tmp_path / "queue.sqlite"
+    with ReviewQueue(path) as queue:
+        queue.enqueue_many([_result(pid, ["medium"]) for pid in _unaudited("p", 60)])
+
+    claimed = {}
+
+    def reviewer(name):
+        with ReviewQueue(path) as queue:
+            claimed[name] = []
+            while (item := queue.claim(name)) is not None:
+                claimed[name].append(item["patient_id"])
+                queue.complete(item["id"], name)
+
+    threads = [threading.Thread(target=reviewer, args=(f"r{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [pid for items in claimed.values() for pid in items]
+    assert len(ids) == len(set(ids)) == 60
+
+
+def test_audit_items_queue_behind_flagged_ones(tmp_path):
+    audited = next(f"a{i}" for i in range(1000) if in_audit_sample(f"a{i}"))
+    flagged = _unaudited("p", 1)[0]
+    with ReviewQueue(tmp_path / "queue.sqlite") as queue:
+        assert queue.enqueue_many([_result(audited), _result(flagged, ["low"])]) == 2
+        assert queue.claim("ann")["patient_id"] == flagged
+        assert queue.claim("ann")["reason"] == "audit"
+        assert queue.stats()["audit"] == 1
@@ -0,0 +1,59 @@
+"""Columnar rule bitmap: structured array, DataFrame and per-record checks must agree."""
+
+import numpy as np
+
+from stroke_pipeline.records import to_array
+from stroke_pipeline.rules import RULE_NAMES, evaluate_rules, extractions_to_frame, violation_frame, violation_messages
+from stroke_pipeline.synthetic import synthetic_extractions
+from stroke_pipeline.validation import FORMAT_CHECKS
+
+
+def _records_with_errors(n=300, seed=8):
+    records = synthetic_extractions(n, seed=seed)
+    rng = np.random.default_rng(seed)
+    for record in records:
+        for _ in range(rng.integers(0, 3)):
+            name, field, _ = FORMAT_CHECKS[rng.integers(len(FORMAT_CHECKS))]
+            if name.endswith("_binary"):
+                record[field] = "maybe"
+            else:
+                record[field] = int(rng.choice([-1, 999]))
+    return records
+
+
+def test_structured_array_bitmap_matches_frame_and_per_record_checks():
+    records = _records_with_errors()
+    from_records = evaluate_rules(to_array(records))
+    np.testing.assert_array_equal(from_records, evaluate_rules(extractions_to_frame(records)))
+
+    assert from_records.any()
+    for record, bits in zip(records, from_records):
+        expected = [msg for _, _, check in FORMAT_CHECKS if (msg := check(record))]
+        assert violation_messages(bits) == (expected or violation_messages(0))
+
+
+def test_bit_order_follows_rule_names():
+    records = synthetic_extractions(1, seed=0)
+    records[0]["NIHSS"] = 99
+    frame = violation_frame(evaluate_rules(to_array(records)))
+    assert frame.columns.tolist() == RULE_NAMES
+    assert frame.loc[0][frame.loc[0]].index.tolist() == ["NIHSS_range"]
+
+
+def test_missing_and_non_numeric_values_are_flagged_in_both_inputs():
+    records = synthetic_extractions(4, seed=2)
+    records[0]["NIHSS"] = "n/a"
+    records[1]["SBP"] = None
+    records[2]["Diabetes"] = "maybe"
+    frame_bits = evaluate_rules(extractions_to_frame(records))
+    np.testing.assert_array_equal(frame_bits, evaluate_rules(to_array(records)))
+    flagged = violation_frame(frame_bits)
+    assert flagged.loc[0, "NIHSS_range"] and flagged.loc[1, "SBP_range"] and flagged.loc[2, "Diabetes_binary"]
+    assert violation_messages(frame_bits[3]) == ["✔ Passed all rule-based format checks."]
+
+
+def test_mapping_input_keeps_patient_ids_as_index():
+    records = synthetic_extractions(3, seed=3)
+    frame = extractions_to_frame({f"P{i}": r for i, r in enumerate(records)})
+    bitmap = evaluate_rules(frame)
+    assert violation_frame(bitmap, index=frame.index).index.tolist() == ["P0", "P1", "P2"]
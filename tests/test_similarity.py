@@ -0,0 +1,50 @@
+"""Cosine tier: reference index and threshold calibration."""
+
+import numpy as np
+import pytest
+
+from stroke_pipeline.records import to_array
+from stroke_pipeline.similarity import (SIMILARITY_THRESHOLD, THRESHOLD_PERCENTILE, ReferenceIndex,
+                                        default_reference, encode_records)
+from stroke_pipeline.synthetic import synthetic_extractions
+
+
+def test_default_threshold_is_calibrated_from_the_reference():
+    assert SIMILARITY_THRESHOLD == round(default_reference().calibrated_threshold(), 2)
+
+
+def test_clean_synthetic_records_mostly_pass():
+    clean = default_reference().max_similarity(encode_records(to_array(synthetic_extractions(2000, seed=1))))
+    assert (clean < SIMILARITY_THRESHOLD).mean() < 2 * THRESHOLD_PERCENTILE / 100
+
+
+def test_leave_one_out_excludes_the_record_itself():
+    reference = default_reference()
+    sims = np.asarray(reference.matrix, dtype=np.float64) @ np.asarray(reference.matrix, dtype=np.float64).T
+    np.fill_diagonal(sims, -np.inf)
+    loo = reference.leave_one_out_similarity(chunk=7)
+    assert np.allclose(loo, sims.max(axis=1), atol=1e-5)
+    assert (loo < 1 - 1e-6).any()
+
+
+def test_encoders_agree():
+    records = synthetic_extractions(50, seed=2)
+    assert np.allclose(encode_records(records), encode_records(to_array(records)))
+    assert np.allclose(encode_records(records[0]), encode_records(records)[:1])
+
+
+def test_save_load_round_trip(tmp_path):
+    reference = ReferenceIndex.from_records(synthetic_extractions(40, seed=3))
+    reference.save(tmp_path / "ref")
+    loaded = ReferenceIndex.load(tmp_path / "ref")
+    assert loaded.version == reference.version
+    query = encode_records(synthetic_extractions(5, seed=4))
+    assert np.allclose(loaded.max_similarity(query), reference.max_similarity(query))
+
+
+def test_top_k_is_sorted_and_matches_max():
+    reference = default_reference()
+    query = encode_records(synthetic_extractions(10, seed=5))
+    idx, top = reference.top_k(query, k=3)
+    assert idx.shape == (10, 3) and (np.diff(top, axis=1) <= 0).all()
+    assert top[:, 0] == pytest.approx(reference.max_similarity(query))
@@ -0,0 +1,57 @@
+"""Results store behind the review dashboard."""
+
+import pytest
+
+from stroke_pipeline.batch import run_batch
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+from stroke_pipeline.store import ResultStore
+from stroke_pipeline.synthetic import synthetic_cases
+
+
+@pytest.fixture(scope="module")
+def cohort():
+    cases = synthetic_cases(60, seed=7)
+    return cases, list(run_batch(cases, workers=1))
+
+
+@pytest.fixture
+def store(cohort, tmp_path):
+    cases, results = cohort
+    with ResultStore(tmp_path / "results.db") as store:
+        store.add_many(results, cases)
+        yield store
+
+
+def test_pages_cover_every_patient_once(cohort, store):
+    _, results = cohort
+    seen = []
+    for offset in range(0, len(results), 7):
+        seen += [row["patient_id"] for row in store.page(offset, 7, sort="probability", descending=True)]
+    assert sorted(seen) == sorted(r["patient_id"] for r in results)
+    probabilities = [row["probability"] for row in store.page(0, len(results), sort="probability", descending=True)]
+    assert probabilities == sorted(probabilities, reverse=True)
+
+
+def test_filters_match_the_results(cohort, store):
+    _, results = cohort
+    flagged = {r["patient_id"] for r in results if "🔎" in r["validation"]["HITL"]}
+    assert store.count(needs_review=True) == len(flagged)
+    assert {row["patient_id"] for row in store.page(0, 100, needs_review=True)} == flagged
+    high = {r["patient_id"] for r in results if r[PROBABILITY_COLUMN] >= 0.5}
+    assert {row["patient_id"] for row in store.page(0, 100, min_probability=0.5)} == high
+
+
+def test_get_returns_the_full_result_and_documents(cohort, store):
+    cases, results = cohort
+    detail = store.get(cases[4]["patient_id"])
+    assert detail["result"][PROBABILITY_COLUMN] == pytest.approx(results[4][PROBABILITY_COLUMN])
+    assert detail["neurology_note"] == cases[4]["neurology_note"]
+    assert store.get("nobody") is None
+
+
+def test_rerun_replaces_rows_and_sort_is_checked(cohort, store):
+    cases, results = cohort
+    store.add_many(results[:5], cases[:5])
+    assert len(store) == len(results)
+    with pytest.raises(ValueError):
+        store.page(sort="result; DROP TABLE patients")
@@ -0,0 +1,107 @@
+"""Streaming ingestion: stage pipeline, restarts from the output file and checkpoints."""
+
+import asyncio
+import json
+
+from stroke_pipeline.calibration import CalibrationHistogram
+from stroke_pipeline.cases import extraction_results, neurology_notes, radiology_reports
+from stroke_pipeline.prediction import PROBABILITY_COLUMN
+from stroke_pipeline.streaming import StreamingPipeline, main, processed_ids, run_to_jsonl, tail_jsonl
+
+
+def _cases(n, start=0):
+    names = list(extraction_results)
+    cases = []
+    for i in range(start, start + n):
+        name = names[i % len(names)]
+        cases.append({"patient_id": f"p{i}", "neurology_note": neurology_notes[name],
+                      "radiology_report": radiology_reports[name], "extraction": dict(extraction_results[name]),
+                      "mRS_3_Month": i % 7})
+    return cases
+
+
+async def _source(cases):
+    for case in cases:
+        yield case
+
+
+async def _collect(pipeline, cases):
+    return [r async for r in pipeline.stream(_source(cases))]
+
+
+def _write_feed(path, cases, mode="w"):
+    with open(path, mode, encoding="utf-8") as fh:
+        fh.writelines(json.dumps(c) + "\n" for c in cases)
+
+
+def test_every_case_comes_out_scored():
+    cases = _cases(20)
+    results = asyncio.run(_collect(StreamingPipeline(queue_size=2, predict_batch=4), cases))
+    assert sorted(r["patient_id"] for r in results) == sorted(c["patient_id"] for c in cases)
+    for r in results:
+        assert 0.0 <= r[PROBABILITY_COLUMN] <= 1.0
+        assert r["outcome"] in (0, 1)
+        assert set(r) >= {"validation", "corrected", "changed"}
+
+
+def test_a_failing_stage_ends_the_stream():
+    cases = _cases(3)
+    del cases[1]["extraction"]  # no extractor configured for it
+    try:
+        asyncio.run(_collect(StreamingPipeline(), cases))
+    except ValueError as exc:
+        assert "p1" in str(exc)
+    else:
+        raise AssertionError("expected the extract stage to fail")
+
+
+def test_tail_skips_processed_patients_and_waits_for_a_full_line(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, _cases(3))
+    with open(feed, "a", encoding="utf-8") as fh:
+        fh.write('{"patient_id": "half')
+
+    async def read():
+        return [c["patient_id"] async for c in tail_jsonl(feed, poll_interval=0.01, idle_timeout=0.03, skip={"p1"})]
+
+    assert asyncio.run(read()) == ["p0", "p2"]
+
+
+def test_processed_ids_ignore_a_torn_last_line(tmp_path):
+    out = tmp_path / "results.jsonl"
+    assert processed_ids(out) == set()
+    out.write_text('{"patient_id": "p0"}\n{"patient_id": 1}\n{"patient_id": "p2", "vali', encoding="utf-8")
+    assert processed_ids(out) == {"p0", "1"}
+
+
+def test_checkpoint_is_called_while_writing(tmp_path):
+    calls = []
+    out = tmp_path / "results.jsonl"
+    n = asyncio.run(run_to_jsonl(StreamingPipeline(), _source(_cases(5)), out,
+                                 checkpoint=lambda: calls.append(len(out.read_text().splitlines())),
+                                 checkpoint_seconds=0))
+    assert n == 5
+    # Each checkpoint sees the results written before it
+    assert calls == [1, 2, 3, 4, 5]
+
+
+def test_restart_resumes_without_double_counting(tmp_path):
+    feed, out, calibration = tmp_path / "feed.jsonl", tmp_path / "results.jsonl", tmp_path / "calibration.json"
+    args = [str(feed), "-o", str(out), "--calibration", str(calibration),
+            "--poll-interval", "0.01", "--idle-timeout", "0.05"]
+
+    _write_feed(feed, _cases(4))
+    main(args)
+    assert len(CalibrationHistogram.load(calibration)) == 4
+
+    # A crash mid-way through the last result, then more patients arrive before the restart
+    lines = out.read_text(encoding="utf-8").splitlines(keepends=True)
+    torn = next(line for line in lines if json.loads(line)["patient_id"] == "p3")
+    out.write_text("".join(line for line in lines if line is not torn) + torn[:40], encoding="utf-8")
+    _write_feed(feed, _cases(3, start=4), mode="a")
+    main(args)
+
+    ids = [json.loads(line)["patient_id"] for line in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(ids) == [f"p{i}" for i in range(7)]
+    # p3 is processed again but was already counted before the crash
+    assert len(CalibrationHistogram.load(calibration)) == 7
@@ -0,0 +1,33 @@
+"""Synthetic cohort generator: seeded, and notes consistent with the true records."""
+
+from stroke_pipeline.synthetic import synthetic_cases, synthetic_cohort
+from stroke_pipeline.validation import validate_data
+
+
+def _rag_flagged(case):
+    validation = validate_data(case["patient_id"], case["extraction"], case["neurology_note"], case["radiology_report"])
+    return any(flag["tier"] == "RAG" for flag in validation["Flags"])
+
+
+def test_cases_are_seeded():
+    assert synthetic_cases(50, seed=1) == synthetic_cases(50, seed=1)
+    assert synthetic_cases(50, seed=1) != synthetic_cases(50, seed=2)
+    assert len({c["patient_id"] for c in synthetic_cases(50, seed=1)}) == 50
+
+
+def test_only_injected_errors_contradict_the_notes():
+    cases = synthetic_cases(300, seed=3, error_rate=0.5)
+    records, outcomes = synthetic_cohort(300, seed=3)
+    assert [c["outcome"] for c in cases] == [int(o) for o in outcomes]
+
+    wrong = [c for c, record in zip(cases, records) if c["extraction"] != record]
+    right = [c for c, record in zip(cases, records) if c["extraction"] == record]
+    assert 100 < len(wrong) < 200
+    assert not any(map(_rag_flagged, right))
+    assert sum(map(_rag_flagged, wrong)) > 0.7 * len(wrong)
+
+
+def test_error_rate_zero_keeps_every_extraction():
+    cases = synthetic_cases(100, seed=4, error_rate=0.0)
+    records, _ = synthetic_cohort(100, seed=4)
+    assert [c["extraction"] for c in cases] == records
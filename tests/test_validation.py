@@ -0,0 +1,43 @@
+"""HITL correction and re-validation of the corrected record."""
+
+from stroke_pipeline.cases import extraction_results, neurology_notes, radiology_reports
+from stroke_pipeline.synthetic import synthetic_extractions
+from stroke_pipeline.validation import hitl_correction, validate_data
+
+CASE = "Example Case 1"
+
+
+def _validate(record):
+    return validate_data(CASE, record, neurology_notes[CASE], radiology_reports[CASE])
+
+
+def test_reviewer_edits_apply_to_unflagged_records():
+    record = synthetic_extractions(1, seed=0)[0]
+    validation = {"Rule": ["✔ Passed all rule-based format checks."], "RAG": [], "Cosine": [], "Flags": []}
+    corrected, changed, changes = hitl_correction("P1", record, validation, {"NIHSS": record["NIHSS"] + 1})
+    assert changed and corrected["NIHSS"] == record["NIHSS"] + 1
+    assert changes == {"NIHSS": {"from": record["NIHSS"], "to": record["NIHSS"] + 1}}
+    assert hitl_correction("P1", record, validation) == (record, False, {})
+
+
+def test_flagged_records_take_rule_corrections_then_reviewer_edits():
+    extracted = extraction_results[CASE]
+    validation = _validate(extracted)
+    corrected, changed, changes = hitl_correction(CASE, extracted, validation,
+                                                  {"ASPECTS": 5, "Weakness_Side": "left"})
+    assert changed
+    assert corrected["tPA_Administered"] == "yes"
+    # The reviewer overrides the rule's suggested correction
+    assert corrected["Weakness_Side"] == "left" and changes["ASPECTS"] == {"from": extracted["ASPECTS"], "to": 5}
+
+
+def test_revalidation_of_the_corrected_record_leaves_the_raw_flags_alone():
+    extracted = extraction_results[CASE]
+    raw = _validate(extracted)
+    corrected, _, _ = hitl_correction(CASE, extracted, raw)
+    revalidated = _validate(corrected)
+
+    assert {f["rule"] for f in raw["Flags"]} == {"tpa_given_in_note", "right_sided_weakness"}
+    assert revalidated["Flags"] == [] and "❗" not in str(revalidated["RAG"])
+    # The raw validation is still what the extraction produced
+    assert raw == _validate(extracted)